@@ -1,6 +1,68 @@
 import requests
+from requests.adapters import HTTPAdapter
+import asyncio
+import fnmatch
+import gzip
+import heapq
+import itertools
+import json
+import random
+import re
+import signal
+import sqlite3
+import threading
 import time
 import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from operator import itemgetter
+from email.utils import parsedate_to_datetime
+from typing import Any
+from urllib.parse import quote, unquote, urlsplit
+
+try:
+    import aiohttp  # Only needed for AsyncBTD6API
+except ImportError:
+    aiohttp = None
+
+try:
+    import numpy as np  # Only needed for BTD6ColumnarLeaderboard, makes LeaderboardArchive faster
+except ImportError:
+    np = None
+
+try:
+    import orjson  # Optional, decodes responses faster
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec  # Optional, decodes responses faster when orjson isn't installed
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    decode_json = orjson.loads
+elif msgspec is not None:
+    JSON_BACKEND = "msgspec"
+    _msgspec_decoder = msgspec.json.Decoder()
+
+    def decode_json(content):
+        try:
+            return _msgspec_decoder.decode(content)
+        except msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+else:
+    JSON_BACKEND = "json"
+    decode_json = json.loads
 
 """ Uncomment to enable logging for debugging purposes
 with open('api_log.log', 'w'): pass # Clear Log File
@@ -58,6 +120,76 @@ class InvalidGuildID(Exception):
     def __init__(self, message):
         super().__init__(message)
 
+class RequestFailed(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+class CircuitOpen(RequestFailed):
+    def __init__(self, message):
+        super().__init__(message)
+
+"""
+LAZY LOADING
+"""
+class _LazyAttribute:
+    """
+    An attribute that is fetched through the API the first time it's read, and remembered after that.
+    Reading it on an object without an api_instance gives None
+
+    :param loader: Name of the function on the object that fetches the value
+    :param args: Arguments given to the loader
+    """
+
+    def __init__(self, loader: str, *args):
+        self.loader = loader
+        self.args = args
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        values = instance._lazy_values
+        if self.name in values:
+            return values[self.name]
+        if instance.api_instance is None:
+            return None
+
+        logging.debug(f"Lazy load: '{self.name}'")
+        value = getattr(instance, self.loader)(*self.args)
+        values[self.name] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance._lazy_values[self.name] = value
+
+    def __delete__(self, instance):
+        instance._lazy_values.pop(self.name, None)
+
+class _LazyLoadable:
+    """
+    Base for objects with attributes that are only fetched from the API when they're first used
+    """
+    __slots__ = ()
+    _lazy_fields = ()
+
+    def refresh(self):
+        """
+        Forgets everything that has been fetched, so it's fetched again the next time it's used
+        """
+        self._lazy_values.clear()
+
+    def prefetch(self):
+        """
+        Fetches every attribute that hasn't been fetched yet
+        :return: The same object
+        """
+        for name in self._lazy_fields:
+            getattr(self, name)
+        return self
+
 """
 EVENTS
 """
@@ -77,25 +209,28 @@ class BTD6SubmissionEntry:
         self.submissionTime = submissionTime
         self.profile = profile
 
-        logging.debug(f"Created Submission Entry Variable, Display Name: {self.displayName}")
+        logging.debug("Created Submission Entry Variable, Display Name: %s", self.displayName)
+
+    _fields = ("displayName", "score", "scoreParts", "submissionTime", "profile") # keys in the API, in argument order
 
     @classmethod
     def from_dict(cls, data_dict):
-        return cls(**data_dict)
+        return cls(*map(data_dict.__getitem__, cls._fields))
 
 class BTD6EventLeaderboard:
     """
     A list of Submission Entries
 
     :param body: The body of the API response JSON object. Example: response['body']
+    :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
     """
 
-    def __init__(self, body: list):
+    def __init__(self, body: list, entry_class=BTD6SubmissionEntry):
         self.leaderboardList = body
         self.leaderboard = []
 
         for elem in self.leaderboardList:
-            entry = BTD6SubmissionEntry.from_dict(elem)
+            entry = entry_class.from_dict(elem)
             self.leaderboard.append(entry)
 
         logging.debug("Created Event Leaderboard")
@@ -103,6 +238,13 @@ class BTD6EventLeaderboard:
     def get_leaderboard(self):
         return self.leaderboard
 
+    def to_columnar(self, lower_is_better=True):
+        """
+        :param lower_is_better: If a lower score is a better one, like the time in a race
+        :return: The leaderboard as a BTD6ColumnarLeaderboard, needs numpy
+        """
+        return BTD6ColumnarLeaderboard.from_entries(self.leaderboard, lower_is_better)
+
 class Event:
     """
     Event class
@@ -119,12 +261,19 @@ class Event:
         self.start = start
         self.end = end
 
-        logging.debug(f"Created Event: {self.name}")
+        logging.debug("Created Event: %s", self.name)
 
 """
 RACES
 """
-class BTD6RaceEvent(Event):
+class BTD6RaceEvent(Event, _LazyLoadable):
+    """
+    A race event. The leaderboard and metadata are fetched the first time you use them, use refresh() to fetch them again
+    """
+    _lazy_fields = ("leaderboard", "metadata")
+    leaderboard = _LazyAttribute("get_leaderboard")
+    metadata = _LazyAttribute("get_metadata")
+
     def __init__(self, id_, name, start, end, totalScores, leaderboard, metadata, api_instance=None):
         super().__init__(id_, name, start, end)
         self.totalScores = totalScores
@@ -132,11 +281,9 @@ class BTD6RaceEvent(Event):
         self.metadataURL = metadata
 
         self.api_instance = api_instance
+        self._lazy_values = {}
 
-        self.leaderboard = self.get_leaderboard() if api_instance else None
-        self.metadata = self.get_metadata() if api_instance else None
-
-        logging.debug(f"Created Race Event: {self.name}")
+        logging.debug("Created Race Event: %s", self.name)
 
     def get_leaderboard(self):
         """
@@ -154,20 +301,29 @@ class BTD6RaceEvent(Event):
         :return: A BTD6ChallengeDocument object with all the rules and details
         """
         logging.debug(f"Get: '{self.name}' metadata")
-        metadata_data = self.api_instance.get_response(self.metadataURL, raw=True)['body']
+        metadata_data = self.api_instance.get_document(f"race:{self.id}", self.metadataURL, raw=True)
         metadata = BTD6ChallengeDocument.from_dict(metadata_data)
         return metadata
 
+    _fields = ("id", "name", "start", "end", "totalScores", "leaderboard", "metadata") # keys in the API, in argument order
+
     @classmethod
     def from_dict(cls, data_dict):
-        # Adjust the dictionary key for id
-        data_dict['id_'] = data_dict.pop('id')
-        return cls(**data_dict)
+        return cls(*map(data_dict.__getitem__, cls._fields))
 
 """
 BOSSES
 """
-class BTD6BossEvent(Event):
+class BTD6BossEvent(Event, _LazyLoadable):
+    """
+    A boss event. The leaderboards and metadata are fetched the first time you use them, use refresh() to fetch them again
+    """
+    _lazy_fields = ("leaderboard_standard_players_1", "leaderboard_elite_players_1", "metadataStandard", "metadataElite")
+    leaderboard_standard_players_1 = _LazyAttribute("get_leaderboard_one_player", "standard")
+    leaderboard_elite_players_1 = _LazyAttribute("get_leaderboard_one_player", "elite")
+    metadataStandard = _LazyAttribute("get_metadata", "standard")
+    metadataElite = _LazyAttribute("get_metadata", "elite")
+
     def __init__(self, id_, name, start, end, bossType, bossTypeURL, totalScores_standard, totalScores_elite,
                  leaderboard_standard_players_1, leaderboard_elite_players_1, metadataStandard, metadataElite,
                  scoringType, api_instance=None):
@@ -183,14 +339,9 @@ class BTD6BossEvent(Event):
         self.scoringType = scoringType
 
         self.api_instance = api_instance
+        self._lazy_values = {}
 
-        self.leaderboard_standard_players_1 = self.get_leaderboard_one_player("standard") if api_instance else None
-        self.leaderboard_elite_players_1 = self.get_leaderboard_one_player("elite") if api_instance else None
-
-        self.metadataStandard = self.get_metadata("standard") if api_instance else None
-        self.metadataElite = self.get_metadata("elite") if api_instance else None
-
-        logging.debug(f"Created Boss Event: {self.name}")
+        logging.debug("Created Boss Event: %s", self.name)
 
     def get_leaderboard_one_player(self, mode: str):
         """
@@ -218,9 +369,9 @@ class BTD6BossEvent(Event):
         """
         logging.debug(f"Get: {mode} boss metadata")
         if mode == "standard":
-            metadata_data = self.api_instance.get_response(self.metadataStandard, raw=True)['body']
+            metadata_data = self.api_instance.get_document(f"boss:{self.id}:standard", self.metadataStandardURL, raw=True)
         elif mode == "elite":
-            metadata_data = self.api_instance.get_response(self.metadataEliteURL, raw=True)['body']
+            metadata_data = self.api_instance.get_document(f"boss:{self.id}:elite", self.metadataEliteURL, raw=True)
         else:
             logging.error(f"Metadata type '{mode}' isn't valid!")
             raise ValueError("Invalid Mode!")
@@ -228,11 +379,66 @@ class BTD6BossEvent(Event):
         metadata = BTD6ChallengeDocument.from_dict(metadata_data)
         return metadata
 
+    def get_bundle(self, max_workers: int = 10):
+        """
+        Every leaderboard (standard and elite, teams of 1 to 4) and both metadata documents at once, see get_boss_bundle
+        :return: A BTD6BossBundle
+        """
+        return self.api_instance.get_boss_bundle(self, max_workers=max_workers)
+
+    _fields = ("id", "name", "start", "end", "bossType", "bossTypeURL", "totalScores_standard", "totalScores_elite",
+               "leaderboard_standard_players_1", "leaderboard_elite_players_1", "metadataStandard", "metadataElite",
+               "scoringType") # keys in the API, in argument order
+
     @classmethod
     def from_dict(cls, data_dict):
-        # Adjust the dictionary key for id
-        data_dict['id_'] = data_dict.pop('id')
-        return cls(**data_dict)
+        return cls(*map(data_dict.__getitem__, cls._fields))
+
+BOSS_DIFFICULTIES = ("standard", "elite")
+BOSS_TEAM_SIZES = (1, 2, 3, 4)
+
+def check_team_size(teamSize):
+    """
+    Boss leaderboards exist for teams of 1 to 4 players
+    :param teamSize: The size of the team
+    """
+    if teamSize > BOSS_TEAM_SIZES[-1]:
+        raise TooBigTeamSize(f"Team Sizes bigger than {BOSS_TEAM_SIZES[-1]} don't exist")
+    if teamSize < BOSS_TEAM_SIZES[0]:
+        raise InvalidTeamSize(f"Team Size {teamSize} isn't valid")
+
+class BTD6BossBundle:
+    """
+    Everything about one boss event, from get_boss_bundle: the first page of every leaderboard and the metadata of
+    both difficulties
+
+    :param boss_id: The id of the boss event
+    :param leaderboards: {(difficulty, teamSize): BTD6EventLeaderboard}, None if nobody has a score in that bracket yet
+    :param metadata: {difficulty: BTD6ChallengeDocument}
+    """
+    __slots__ = ("boss_id", "leaderboards", "metadata")
+
+    def __init__(self, boss_id, leaderboards, metadata):
+        self.boss_id = boss_id
+        self.leaderboards = leaderboards
+        self.metadata = metadata
+
+    def leaderboard(self, difficulty, teamSize=1):
+        """
+        :return: The BTD6EventLeaderboard of that difficulty and team size, None if it's empty
+        """
+        return self.leaderboards.get((difficulty, teamSize))
+
+    def entries(self, difficulty, teamSize=1) -> list:
+        """
+        :return: The BTD6SubmissionEntry objects of that difficulty and team size, an empty list if it's empty
+        """
+        leaderboard = self.leaderboards.get((difficulty, teamSize))
+        return leaderboard.get_leaderboard() if leaderboard is not None else []
+
+    @property
+    def empty_brackets(self) -> list:
+        return [key for key, leaderboard in self.leaderboards.items() if leaderboard is None]
 
 """
 USER
@@ -263,9 +469,32 @@ class BTD6UserProfile:
         self._medalsCTGlobal = _medalsCTGlobal
         self._medalsRace = _medalsRace
 
+    _fields = ("displayName", "rank", "veteranRank", "achievements", "mostExperiencedMonkey", "avatar", "banner",
+               "avatarURL", "bannerURL", "followers", "bloonsPopped", "gameplay", "heroesPlaced", "_medalsSinglePlayer",
+               "_medalsMultiplayer", "_medalsBoss", "_medalsBossElite", "_medalsCTLocal", "_medalsCTGlobal",
+               "_medalsRace") # keys in the API, in argument order
+
     @classmethod
     def from_dict(cls, data_dict):
-        return cls(**data_dict)
+        return cls(*map(data_dict.__getitem__, cls._fields))
+
+class ProfileResult:
+    """
+    The result of one user from get_user_profiles
+
+    :param user_id: The id of the user
+    :param profile: The BTD6UserProfile, or None if it couldn't be fetched
+    :param error: The exception that happened while fetching the profile, for example InvalidUserID
+    """
+
+    def __init__(self, user_id, profile=None, error=None):
+        self.user_id = user_id
+        self.profile = profile
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 """
 CHALLENGES
@@ -322,16 +551,29 @@ class BTD6ChallengeDocument:
         self.bloonModifiers = _bloonModifiers
         self.towers = _towers
 
-        logging.debug(f"Created Challenge Document: {self.name}")
+        logging.debug("Created Challenge Document: %s", self.name)
+
+    _fields = ("name", "createdAt", "id", "creator", "gameVersion", "map", "mapURL", "mode", "difficulty",
+               "disableDoubleCash", "disableInstas", "disableMK", "disablePowers", "disableSelling", "startingCash",
+               "lives", "maxLives", "maxTowers", "maxParagons", "startRound", "endRound", "plays", "wins", "losses",
+               "upvotes", "playsUnique", "restarts", "winsUnique", "lossesUnique",
+               "abilityCooldownReductionMultiplier", "leastCashUsed", "leastTiersUsed", "noContinues", "seed",
+               "removeableCostMultiplier", "roundSets", "_powers", "_bloonModifiers",
+               "_towers") # keys in the API, in argument order
 
     @classmethod
     def from_dict(cls, data_dict):
-        # Adjust the dictionary key for id and map
-        data_dict['id_'] = data_dict.pop('id')
-        data_dict['map_'] = data_dict.pop('map')
-        return cls(**data_dict)
+        return cls(*map(data_dict.__getitem__, cls._fields))
+
+class BTD6Challenge(_LazyLoadable):
+    """
+    A challenge from a challenge list. The creator and metadata are fetched the first time you use them,
+    use refresh() to fetch them again
+    """
+    _lazy_fields = ("creator", "metadata")
+    creator = _LazyAttribute("get_creator")
+    metadata = _LazyAttribute("get_metadata")
 
-class BTD6Challenge:
     def __init__(self, name, createdAt, id_, creator, metadata, api_instance=None):
         self.name = name
         self.createdAt = createdAt
@@ -340,9 +582,7 @@ class BTD6Challenge:
         self.metadataURL = metadata
 
         self.api_instance = api_instance
-
-        self.creator = self.get_creator() if api_instance else None
-        self.metadata = self.get_metadata() if api_instance else None
+        self._lazy_values = {}
 
     def get_creator(self):
         """
@@ -360,245 +600,4870 @@ class BTD6Challenge:
         :return: A BTD6ChallengeDocument object with all the rules and details
         """
         logging.debug(f"Get: '{self.name}' metadata")
-        metadata_data = self.api_instance.get_response(self.metadataURL, raw=True)['body']
+        metadata_data = self.api_instance.get_document(f"challenge:{self.id_}", self.metadataURL, raw=True)
         metadata = BTD6ChallengeDocument.from_dict(metadata_data)
         return metadata
 
+    _fields = ("name", "createdAt", "id", "creator", "metadata") # keys in the API, in argument order
+
     @classmethod
     def from_dict(cls, data_dict):
-        # Adjust the dictionary key for id
-        data_dict['id_'] = data_dict.pop('id')
-        return cls(**data_dict)
+        return cls(*map(data_dict.__getitem__, cls._fields))
 
 """
-API
+CONTESTED TERRITORY
 """
-class SingletonMeta(type):
-    _instances = {}
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super().__call__(*args, **kwargs)
-        return cls._instances[cls]
+class _TolerantModel:
+    """
+    Base for the models of endpoints that aren't documented well. Keys that are missing are None instead of a KeyError,
+    and keys that aren't known end up in extra, so new fields in the API don't break anything
+    """
+    _fields = ()
 
-class BTD6API(metaclass=SingletonMeta):
-    def __init__(self, api_token: str = None):
-        self.url_prefix = "https://data.ninjakiwi.com"
-        self.api_token = api_token
+    @classmethod
+    def from_dict(cls, data_dict):
+        model = cls(*map(data_dict.get, cls._fields))
+        model.extra = {key: value for key, value in data_dict.items() if key not in cls._fields}
+        return model
 
-    def get_response(self, link: str, raw=False) -> dict | None:
-        """
-        Tries to access the API
-        :param link: The link to the API
-        :param raw: If you input the whole link, or just the suffix
-        :return: A JSON object of the debugrmation
-        """
-        logging.debug("Get response from API")
-        l: str = link if raw else f"{self.url_prefix}{link}"
-        if not l.startswith("https://data.ninjakiwi.com"):
-            raise InvalidLinkError("You're trying to access another website/api!")
-        try:
-            response = requests.get(l)
-        except requests.exceptions.HTTPError as http_err:
-            print(f"HTTP error ocurred: {http_err}")
-        except Exception as err:
-            print(f"Other exception occurred: {err}")
-        else:
-            response_json = response.json()
+class BTD6CTSubmissionEntry(_TolerantModel):
+    """
+    An entry of a Contested Territory leaderboard
+    :param displayName: The name of the player, or of the team on the team leaderboard
+    :param score: Score of the player or team
+    :param profile: URL to the players public profile, or to the guild on the team leaderboard
+    """
 
-            if not response_json['success']: # if the request wasn't successfull, error in request
-                self.get_error(response_json['error'])
-                return None
+    def __init__(self, displayName, score, profile):
+        self.displayName = displayName
+        self.score = score
+        self.profile = profile
+        self.extra = {}
 
-            return response_json
-        logging.warning("An error occured with get reponse function from API")
-        return None
+    _fields = ("displayName", "score", "profile") # keys in the API, in argument order
 
-    @staticmethod
-    def get_error(err: str):
-        match err.lower():
-            case "no race with that id exists":
-                raise InvalidRaceID(err)
-            case "no boss with that id exists":
-                raise InvalidBossID(err)
-            case "invalid boss type":
-                raise InvalidBossType(err)
-            case "invalid team size":
-                raise InvalidTeamSize(err)
-            case "invalid boss difficulty":
-                raise InvalidBossType(err)
-            case "invalid user id / player does not play this game":
-                raise InvalidUserID(err)
-            case "invalid filter type":
-                raise InvalidFilterType(err)
-            case "no challenge with that id exists":
-                raise InvalidChallengeID(err)
-            case "no ct with that id exists":
-                raise InvalidCTID(err)
-            case "no scores available":
-                raise NoScoresAvailable(err)
-            case "invalid guild id":
-                raise InvalidGuildID(err)
+class BTD6CTTile(_TolerantModel):
+    """
+    A tile of a Contested Territory event
+    :param id_: The id of the tile, for example 'MRX'
+    :param type_: The type of the tile, for example 'Banner' or 'Relic'
+    :param gameData: The rules of the game on the tile (map, mode, difficulty, ...), as a dictionary
+    :param metadata: URL to the full document of the tile. The documented tiles endpoint gives the whole tiles and
+                     no link, so it's usually None. A document per tile (/btd6/ct/{id}/tiles/{tile}) isn't confirmed,
+                     it's only followed when the tiles response has this link
+    """
 
+    def __init__(self, id_, type_, gameData, metadata):
+        self.id = id_
+        self.type = type_
+        self.gameData = gameData
+        self.metadataURL = metadata
+        self.extra = {}
 
-    def get_available_race_events(self) -> list:
+    _fields = ("id", "type", "gameData", "metadata") # keys in the API, in argument order
+
+    @property
+    def link(self) -> str | None:
         """
-        Gives you a list of recent race events
-        :return: List of BTD6RaceEvent objects
+        :return: The link to the full document of the tile, or None if the tile is complete already
         """
-        endpoint = "/btd6/races"
+        return self.metadataURL
 
-        responses = self.get_response(endpoint)['body']
-        races = []
+def ct_tile_list(body) -> list:
+    """
+    :param body: The body of /btd6/ct/{id}/tiles, either a list of tiles or a dictionary with them in 'tiles'
+    :return: List of BTD6CTTile objects
+    """
+    if isinstance(body, dict):
+        body = body.get("tiles") or []
+    return [BTD6CTTile.from_dict(elem) for elem in body]
 
-        for elem in responses:
-            race = BTD6RaceEvent.from_dict(elem)
-            race.api_instance = self
-            races.append(race)
+class CTTileResult:
+    """
+    The result of one tile from crawl_ct_tiles
 
-        logging.debug(f"Get: Available races, latest is '{races[0].name}'")
-        return races
+    :param tile_id: The id of the tile
+    :param tile: The BTD6CTTile, or None if it couldn't be fetched
+    :param error: The exception that happened while fetching the tile
+    """
 
-    def get_latest_race(self) -> BTD6RaceEvent:
-        """
-        Gives you the latest Race Event
-        :return: A BTD6RaceEvent
-        """
-        races = self.get_available_race_events()
-        latest_race = max(races, key=lambda r: r.start)
-        latest_race.api_instance = self
-        logging.debug(f"Get: Latest race: '{latest_race.name}'")
-        return latest_race
+    def __init__(self, tile_id, tile=None, error=None):
+        self.tile_id = tile_id
+        self.tile = tile
+        self.error = error
 
-    def get_race_leaderboard(self, race_id) -> BTD6EventLeaderboard:
-        """
-        Gives you the leaderboard of a specific race event
-        :param race_id: The id of the race event
-        :return: A BTD6EventLeaderboard of the race event provided
-        """
-        endpoint = f"/btd6/races/{race_id}/leaderboard"
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
-        response = self.get_response(endpoint)
-        leaderboard = BTD6EventLeaderboard(response['body'])
-        logging.debug(f"Get: Race Leaderboard")
-        return leaderboard
+class BTD6CTEvent(Event, _TolerantModel, _LazyLoadable):
+    """
+    A Contested Territory event. The tiles and leaderboards are fetched the first time you use them, use refresh()
+    to fetch them again
+    """
+    _lazy_fields = ("tiles", "leaderboard_player", "leaderboard_team")
+    tiles = _LazyAttribute("get_tiles")
+    leaderboard_player = _LazyAttribute("get_leaderboard", "player")
+    leaderboard_team = _LazyAttribute("get_leaderboard", "team")
 
-    def get_race_metadata(self, race_id) -> BTD6ChallengeDocument:
-        """
-        Gives you the metadata (map debugrmation) of a race event
-        :param race_id: The id of the race event
-        :return: A BTD6ChallengeDocument of the race event provided
-        """
-        endpoint = f"/btd6/races/{race_id}/metadata"
+    def __init__(self, id_, start, end, totalScores_player, totalScores_team, tiles, leaderboard_player,
+                 leaderboard_team, api_instance=None):
+        super().__init__(id_, id_, start, end) # CT events don't have a name
+        self.totalScores_player = totalScores_player
+        self.totalScores_team = totalScores_team
+        self.tilesURL = tiles
+        self.leaderboard_playerURL = leaderboard_player
+        self.leaderboard_teamURL = leaderboard_team
+        self.extra = {}
 
-        response = self.get_response(endpoint)
-        metadata = BTD6ChallengeDocument.from_dict(response['body'])
-        logging.debug(f"Get: Race ({metadata.name}) Metadata")
-        return metadata
+        self.api_instance = api_instance
+        self._lazy_values = {}
 
-    @staticmethod
-    def race_event_is_ongoing(race: BTD6RaceEvent) -> bool:
+        logging.debug("Created CT Event: %s", self.id)
+
+    def get_tiles(self):
         """
-        Tells you if a race event is ongoing
-        :param race: The race event you want to test for
-        :return: Bool that says if the provided race event is ongoing respectively
+        :return: List of BTD6CTTile objects, as the tiles of the event give them, see crawl_ct_tiles for the full ones
         """
-        logging.debug(f"Get: Race event ({race}) is ongoing")
-        return True if time.time() - race.end < 0 else False
+        logging.debug(f"Get: '{self.id}' tiles")
+        return self.api_instance.get_ct_tiles(self.id)
 
-    def get_available_boss_events(self) -> list:
+    def get_leaderboard(self, type_: str):
         """
-        Gives you a list of recent boss events
-        :return: List of recent boss events
+        Gets the leaderboard of players or of teams
+        :param type_: Either player or team
+        :return: List of BTD6CTSubmissionEntry objects
         """
-        endpoint = "/btd6/bosses"
-
-        responses = self.get_response(endpoint)['body']
-        bosses = []
+        logging.debug(f"Get: '{self.id}' {type_} leaderboard")
+        if type_ == "player":
+            leaderboard_data = self.api_instance.get_response(self.leaderboard_playerURL, raw=True)['body']
+        elif type_ == "team":
+            leaderboard_data = self.api_instance.get_response(self.leaderboard_teamURL, raw=True)['body']
+        else:
+            logging.error(f"Leaderboard type '{type_}' isn't valid!")
+            raise ValueError("Invalid Leaderboard Type!")
 
-        for elem in responses:
-            boss = BTD6BossEvent.from_dict(elem)
-            boss.api_instance = self
-            bosses.append(boss)
+        leaderboard = BTD6EventLeaderboard(leaderboard_data, entry_class=BTD6CTSubmissionEntry)
+        return leaderboard.get_leaderboard()
 
-        logging.debug(f"Get: Available bosses, latest is '{bosses[0].name}'")
-        return bosses
+    _fields = ("id", "start", "end", "totalScores_player", "totalScores_team", "tiles", "leaderboard_player",
+               "leaderboard_team") # keys in the API, in argument order
 
-    def get_boss_leaderboard(self, boss_id, type_, teamSize) -> BTD6EventLeaderboard:
-        """
-        Gives you a boss leaderboard
-        :param boss_id: The id of the boss event
-        :param type_: Difficulty, either standard or elite
-        :param teamSize: The size of the time. Keep in mind that no teams bigger than 1 is supported
-        :return: A BTD6EventLeaderboard for the boss event provided
-        """
-        endpoint = f"/btd6/bosses/{boss_id}/leaderboard/{type_}/{teamSize}"
+class BTD6CTSnapshot:
+    """
+    Everything about one Contested Territory event at one moment, from get_ct_snapshot
 
-        if teamSize > 1:
-            raise TooBigTeamSize("Team Sizes bigger than 1 aren't supported")
+    :param event: The BTD6CTEvent
+    :param tiles: The CTTileResult of every tile
+    :param leaderboard_player: The first page of the player leaderboard, BTD6CTSubmissionEntry objects
+    :param leaderboard_team: The first page of the team leaderboard, BTD6CTSubmissionEntry objects
+    """
+    __slots__ = ("event", "tiles", "leaderboard_player", "leaderboard_team")
 
-        response = self.get_response(endpoint)
-        leaderboard = BTD6EventLeaderboard(response['body'])
-        logging.debug(f"Get: Boss Leaderboard")
-        return leaderboard
+    def __init__(self, event, tiles, leaderboard_player, leaderboard_team):
+        self.event = event
+        self.tiles = tiles
+        self.leaderboard_player = leaderboard_player
+        self.leaderboard_team = leaderboard_team
 
-    def get_boss_metadata(self, boss_id, difficulty) -> BTD6ChallengeDocument:
-        """
-        Gives you the metadata (map debugrmation) of a boss event
-        :param boss_id: The id of the boss event
-        :param difficulty: Difficulty, standard or elite
-        :return: A BTD6EventLeaderboard for the boss event provided
-        """
-        endpoint = f"/btd6/bosses/{boss_id}/metadata/{difficulty}"
+    @property
+    def failed_tiles(self) -> list:
+        return [result for result in self.tiles if not result.ok]
 
-        response = self.get_response(endpoint)
-        metadata = BTD6ChallengeDocument.from_dict(response['body'])
-        logging.debug(f"Get: Boss ({metadata.name}) Metadata")
-        return metadata
+"""
+GUILDS
+"""
+class BTD6Guild(_TolerantModel):
+    """
+    A guild (team) of players
+    :param id_: The id of the guild
+    :param name: The name of the guild
+    :param numMembers: How many members the guild has
+    :param status: If anyone can join, for example 'OPEN'
+    :param owner: URL to the public profile of the owner
+    """
 
-    def get_user_profile(self, user_id) -> BTD6UserProfile:
-        """
-        Gives you debugrmation about a user
-        :param user_id: The id of the user
-        :return: A BTD6UserProfile of the id provided
-        """
-        endpoint = f"/btd6/users/{user_id}"
+    def __init__(self, id_, name, numMembers, status, owner, tags, banner, bannerURL, frame, frameURL, icon, iconURL):
+        self.id = id_
+        self.name = name
+        self.numMembers = numMembers
+        self.status = status
+        self.owner = owner
+        self.tags = tags
+        self.banner = banner
+        self.bannerURL = bannerURL
+        self.frame = frame
+        self.frameURL = frameURL
+        self.icon = icon
+        self.iconURL = iconURL
+        self.extra = {}
 
-        response = self.get_response(endpoint)
-        user = BTD6UserProfile.from_dict(response)
-        logging.debug(f"Get: User Profile Information, Display Name: {user.displayName}")
-        return user
+        logging.debug("Created Guild: %s", self.name)
 
-    def get_challenges_with_filter(self, filter_) -> list:
-        """
-        Gives you a list of recent challenges with the filter provided
-        :param filter_: Either newest, trending or daily
-        :return: List with BTD6Challenge objects
-        """
-        endpoint = f"/btd6/challenges/filter/{filter_}"
-        if filter_ not in ['newest', 'trending', 'daily']:
-            logging.error(f"'{filter_}' isn't a valid filter for challenges!")
-            raise InvalidFilterType("Filter can either be 'newest', 'trending' or 'daily'")
+    _fields = ("id", "name", "numMembers", "status", "owner", "tags", "banner", "bannerURL", "frame", "frameURL", "icon",
+               "iconURL") # keys in the API, in argument order
 
-        responses = self.get_response(endpoint)['body']
-        challenges = []
+"""
+COMPACT MODELS
+"""
+class BTD6CompactSubmissionEntry:
+    """
+    The same as BTD6SubmissionEntry, but with __slots__ instead of a __dict__, so it takes a lot less memory.
+    Use it when you keep a lot of entries around, see BTD6EventLeaderboard(entry_class=...)
+    """
+    __slots__ = ("displayName", "score", "scoreParts", "submissionTime", "profile")
+
+    def __init__(self, displayName, score, scoreParts, submissionTime, profile):
+        # No logging here, compact models are made in bulk
+        self.displayName = displayName
+        self.score = score
+        self.scoreParts = scoreParts
+        self.submissionTime = submissionTime
+        self.profile = profile
+
+    _fields = BTD6SubmissionEntry._fields
+    from_dict = classmethod(BTD6SubmissionEntry.from_dict.__func__)
+
+class BTD6CompactUserProfile:
+    """
+    The same as BTD6UserProfile, but with __slots__ instead of a __dict__, so it takes less memory
+    """
+    __slots__ = ("displayName", "rank", "veteranRank", "achievements", "mostExperiencedMonkey", "avatar", "banner",
+                 "avatarURL", "bannerURL", "followers", "bloonsPopped", "gameplay", "heroesPlaced",
+                 "_medalsSinglePlayer", "_medalsMultiplayer", "_medalsBoss", "_medalsBossElite", "_medalsCTLocal",
+                 "_medalsCTGlobal", "_medalsRace")
+
+    __init__ = BTD6UserProfile.__init__ # doesn't log, so it can be shared
+    _fields = BTD6UserProfile._fields
+    from_dict = classmethod(BTD6UserProfile.from_dict.__func__)
+
+class BTD6CompactChallengeDocument:
+    """
+    The same as BTD6ChallengeDocument, but with __slots__ instead of a __dict__, so it takes less memory
+    """
+    __slots__ = ("name", "createdAt", "id_", "creator", "gameVersion", "map_", "mapURL", "mode", "difficulty",
+                 "disableDoubleCash", "disableInstas", "disableMK", "disablePowers", "disableSelling", "startingCash",
+                 "lives", "maxLives", "maxTowers", "maxParagons", "startRound", "endRound", "plays", "wins", "losses",
+                 "upvotes", "playsUnique", "restarts", "winsUnique", "lossesUnique",
+                 "abilityCooldownReductionMultiplier", "leastCashUsed", "leastTiersUsed", "noContinues", "seed",
+                 "removeableCostMultiplier", "roundSets", "powers", "bloonModifiers", "towers")
+
+    def __init__(
+            self, name, createdAt, id_, creator, gameVersion, map_, mapURL, mode, difficulty,
+            disableDoubleCash, disableInstas, disableMK, disablePowers, disableSelling, startingCash,
+            lives, maxLives, maxTowers, maxParagons, startRound, endRound, plays, wins, losses, upvotes,
+            playsUnique, restarts, winsUnique, lossesUnique, abilityCooldownReductionMultiplier,
+            leastCashUsed, leastTiersUsed, noContinues, seed, removeableCostMultiplier, roundSets,
+            _powers, _bloonModifiers, _towers
+    ):
+        self.name = name
+        self.createdAt = createdAt
+        self.id_ = id_
+        self.creator = creator
+        self.gameVersion = gameVersion
+        self.map_ = map_
+        self.mapURL = mapURL
+        self.mode = mode
+        self.difficulty = difficulty
+        self.disableDoubleCash = disableDoubleCash
+        self.disableInstas = disableInstas
+        self.disableMK = disableMK
+        self.disablePowers = disablePowers
+        self.disableSelling = disableSelling
+        self.startingCash = startingCash
+        self.lives = lives
+        self.maxLives = maxLives
+        self.maxTowers = maxTowers
+        self.maxParagons = maxParagons
+        self.startRound = startRound
+        self.endRound = endRound
+        self.plays = plays
+        self.wins = wins
+        self.losses = losses
+        self.upvotes = upvotes
+        self.playsUnique = playsUnique
+        self.restarts = restarts
+        self.winsUnique = winsUnique
+        self.lossesUnique = lossesUnique
+        self.abilityCooldownReductionMultiplier = abilityCooldownReductionMultiplier
+        self.leastCashUsed = leastCashUsed
+        self.leastTiersUsed = leastTiersUsed
+        self.noContinues = noContinues
+        self.seed = seed
+        self.removeableCostMultiplier = removeableCostMultiplier
+        self.roundSets = roundSets
+        self.powers = _powers
+        self.bloonModifiers = _bloonModifiers
+        self.towers = _towers
+
+    _fields = BTD6ChallengeDocument._fields
+    from_dict = classmethod(BTD6ChallengeDocument.from_dict.__func__)
+
+class BTD6CompactEvent:
+    """
+    The same as Event, but with __slots__ instead of a __dict__
+    """
+    __slots__ = ("id", "name", "start", "end")
+
+    def __init__(self, id_, name, start, end):
+        self.id = id_
+        self.name = name
+        self.start = start
+        self.end = end
+
+class BTD6CompactRaceEvent(BTD6CompactEvent, _LazyLoadable):
+    """
+    The same as BTD6RaceEvent, but with __slots__ instead of a __dict__, so it takes less memory
+    """
+    __slots__ = ("totalScores", "leaderboardURL", "metadataURL", "api_instance", "_lazy_values")
+    _lazy_fields = BTD6RaceEvent._lazy_fields
+    leaderboard = _LazyAttribute("get_leaderboard")
+    metadata = _LazyAttribute("get_metadata")
+
+    def __init__(self, id_, name, start, end, totalScores, leaderboard, metadata, api_instance=None):
+        super().__init__(id_, name, start, end)
+        self.totalScores = totalScores
+        self.leaderboardURL = leaderboard
+        self.metadataURL = metadata
+
+        self.api_instance = api_instance
+        self._lazy_values = {}
+
+    get_leaderboard = BTD6RaceEvent.get_leaderboard
+    get_metadata = BTD6RaceEvent.get_metadata
+    _fields = BTD6RaceEvent._fields
+    from_dict = classmethod(BTD6RaceEvent.from_dict.__func__)
+
+class BTD6CompactBossEvent(BTD6CompactEvent, _LazyLoadable):
+    """
+    The same as BTD6BossEvent, but with __slots__ instead of a __dict__, so it takes less memory
+    """
+    __slots__ = ("bossType", "bossTypeURL", "totalScores_standard", "totalScores_elite",
+                 "leaderboard_standard_players_1_URL", "leaderboard_elite_players_1_URL", "metadataStandardURL",
+                 "metadataEliteURL", "scoringType", "api_instance", "_lazy_values")
+    _lazy_fields = BTD6BossEvent._lazy_fields
+    leaderboard_standard_players_1 = _LazyAttribute("get_leaderboard_one_player", "standard")
+    leaderboard_elite_players_1 = _LazyAttribute("get_leaderboard_one_player", "elite")
+    metadataStandard = _LazyAttribute("get_metadata", "standard")
+    metadataElite = _LazyAttribute("get_metadata", "elite")
+
+    def __init__(self, id_, name, start, end, bossType, bossTypeURL, totalScores_standard, totalScores_elite,
+                 leaderboard_standard_players_1, leaderboard_elite_players_1, metadataStandard, metadataElite,
+                 scoringType, api_instance=None):
+        super().__init__(id_, name, start, end)
+        self.bossType = bossType
+        self.bossTypeURL = bossTypeURL
+        self.totalScores_standard = totalScores_standard
+        self.totalScores_elite = totalScores_elite
+        self.leaderboard_standard_players_1_URL = leaderboard_standard_players_1
+        self.leaderboard_elite_players_1_URL = leaderboard_elite_players_1
+        self.metadataStandardURL = metadataStandard
+        self.metadataEliteURL = metadataElite
+        self.scoringType = scoringType
+
+        self.api_instance = api_instance
+        self._lazy_values = {}
+
+    get_leaderboard_one_player = BTD6BossEvent.get_leaderboard_one_player
+    get_metadata = BTD6BossEvent.get_metadata
+    get_bundle = BTD6BossEvent.get_bundle
+    _fields = BTD6BossEvent._fields
+    from_dict = classmethod(BTD6BossEvent.from_dict.__func__)
+
+"""
+DECODING
+"""
+def decode_models(content: bytes, model_class) -> list:
+    """
+    Decodes a response from the API straight into model objects. Uses orjson or msgspec when they're installed,
+    see JSON_BACKEND, and the dictionaries from the response are never changed
+    :param content: The raw bytes of the response, or of just its body
+    :param model_class: The class of the objects in the body, for example BTD6SubmissionEntry
+    :return: List of model objects, with one object if the body isn't a list
+    """
+    data = decode_json(content)
+    if isinstance(data, dict) and "body" in data and "success" in data:
+        if not data["success"]:
+            BTD6API.get_error(data["error"])
+        data = data["body"]
+    if isinstance(data, dict):
+        data = [data]
+
+    from_dict = model_class.from_dict
+    return [from_dict(elem) for elem in data]
+
+"""
+LAZY VIEWS
+"""
+def _close_bracket(content: bytes, begin: int, end: int) -> int:
+    """
+    :return: The index after the bracket that closes the one at begin, found without decoding anything in between.
+        Brackets in strings are skipped by counting quotes, so the content can't have escaped quotes
+    """
+    find = content.find
+    opener = content[begin:begin + 1]
+    closer = b"}" if opener == b"{" else b"]"
+    pos = begin + 1
+    while True:
+        close = find(closer, pos, end)
+        if close == -1:
+            raise ValueError("Unterminated JSON object or list")
+        inner = find(opener, pos, close) # brackets of the other kind are balanced in between, they don't matter
+        found = close if inner == -1 else inner
+        if content.count(b'"', pos, found) & 1: # it's in a string, go on after the string
+            pos = find(b'"', found, end) + 1
+            if pos == 0:
+                raise ValueError("Unterminated JSON string")
+        elif inner == -1:
+            return close + 1
+        else:
+            pos = _close_bracket(content, inner, end)
+
+def _split_object(content: bytes) -> dict:
+    """
+    Decodes a JSON object, but leaves the objects and lists in it as raw bytes. Used when msgspec isn't installed
+    """
+    content = content.strip()
+    # With an escaped quote the quotes can't be counted, and with an escaped NUL a string could look like one of
+    # the placeholders (the only way to get a NUL out of JSON is \u0000), so everything is decoded then
+    if content[:1] != b"{" or content.find(b'\\"') != -1 or content.find(b"\\u0000") != -1:
+        values = decode_json(content)
+        if not isinstance(values, dict):
+            raise ValueError("Not a JSON object")
+        return values
+
+    find = content.find
+    end = len(content) - 1
+    pieces, nested = [], []
+    last = pos = 1
+    curly = square = 0
+    while True:
+        if -1 < curly < pos: # only look again when the last one was passed
+            curly = find(b"{", pos, end)
+        if -1 < square < pos:
+            square = find(b"[", pos, end)
+        begin = curly if square == -1 or -1 < curly < square else square
+        if begin == -1:
+            break
+        if content.count(b'"', pos, begin) & 1: # it's in a string
+            pos = find(b'"', begin, end) + 1
+            continue
+        pos = _close_bracket(content, begin, end)
+        pieces += content[last:begin], b'"\\u0000%d"' % len(nested) # placeholder, decoded as '\x00' + index
+        nested.append(content[begin:pos])
+        last = pos
+    if not nested:
+        return decode_json(content)
+
+    values = decode_json(b"{" + b"".join(pieces) + content[last:])
+    for key, value in values.items():
+        if type(value) is str and value[:1] == "\x00":
+            values[key] = nested[int(value[1:])]
+    return values
+
+if msgspec is not None:
+    _RAW_TYPES = (bytes, msgspec.Raw)
+    _any_decoder = msgspec.json.Decoder()
+    _envelope_decoder = msgspec.json.Decoder(msgspec.defstruct("Envelope", [
+        ("success", Any, None), ("error", Any, None), ("body", msgspec.Raw, None), ("next", Any, None),
+        ("prev", Any, None),
+    ]))
+
+    def decode_raw(raw):
+        return _any_decoder.decode(raw)
+
+    def decode_envelope(content) -> dict:
+        """
+        Decodes a response from the API, but leaves the body as raw JSON, for the views
+        :param content: The raw bytes of the response
+        :return: Dictionary with success, error, next, prev and the raw body
+        """
+        return msgspec.structs.asdict(_envelope_decoder.decode(content))
+else:
+    _RAW_TYPES = (bytes,)
+    decode_raw = decode_json
+
+    def decode_envelope(content) -> dict:
+        """
+        Decodes a response from the API, but leaves the body as raw JSON, for the views
+        :param content: The raw bytes of the response
+        :return: Dictionary with success, error, next, prev and the raw body
+        """
+        response = _split_object(content)
+        response.setdefault("next", None)
+        response.setdefault("prev", None)
+        return response
+
+class _ViewField:
+    """
+    An attribute of a view, it's decoded the first time it's read
+    """
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.get(self.key)
+
+class _ModelView:
+    """
+    Base for the views. A view has the same attributes as its model, but only the simple fields are decoded up front,
+    nested objects and lists are kept as raw JSON until they're first read, and remembered after that.
+    With msgspec installed the fields are found by msgspec, otherwise by scanning the raw bytes for brackets.
+    Fields that are missing in the API are None
+    """
+    __slots__ = ("_values",)
+    _model = None # the class of the model
+    _lazy = () # keys in the API that are kept as raw JSON by msgspec, without msgspec every object and list is
+    _renamed = {} # attribute name -> key in the API, for the attributes of the model with a different name
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        attributes = {key: attribute for attribute, key in cls._renamed.items()}
+        for key in cls._model._fields:
+            setattr(cls, attributes.get(key, key), _ViewField(key))
+        cls._decoder = None
+
+    def __init__(self, values: dict):
+        self._values = values
+
+    @classmethod
+    def from_bytes(cls, content):
+        """
+        :param content: The raw JSON of the body of a response, for example decode_envelope(content)['body'].
+        Without msgspec that can already be a dict, when the response had to be decoded completely
+        :return: A view of it
+        """
+        if isinstance(content, dict):
+            return cls(dict(content))
+        if msgspec is None:
+            return cls(_split_object(content))
+        if cls._decoder is None:
+            cls._decoder = msgspec.json.Decoder(msgspec.defstruct(f"{cls.__name__}Fields", [
+                (key, msgspec.Raw if key in cls._lazy else Any, None) for key in cls._model._fields
+            ]))
+        return cls(msgspec.structs.asdict(cls._decoder.decode(content)))
+
+    def get(self, key: str):
+        """
+        :param key: The key in the API
+        :return: The value, decoded now if it hasn't been decoded yet
+        """
+        value = self._values.get(key)
+        if type(value) in _RAW_TYPES:
+            value = self._values[key] = decode_raw(value)
+        return value
+
+    @property
+    def decoded(self) -> list:
+        """
+        :return: The keys that have been decoded
+        """
+        return [key for key, value in self._values.items() if type(value) not in _RAW_TYPES]
+
+    def to_dict(self) -> dict:
+        return {key: self.get(key) for key in self._model._fields}
+
+    def to_model(self):
+        """
+        :return: The full model, with everything decoded
+        """
+        return self._model.from_dict(self.to_dict())
+
+class BTD6UserProfileView(_ModelView):
+    """
+    A BTD6UserProfile that only decodes gameplay, bloonsPopped, heroesPlaced and the medals when they're first used.
+    Get them with get_user_profile(user_id, view=True)
+    """
+    __slots__ = ()
+    _model = BTD6UserProfile
+    _lazy = ("bloonsPopped", "gameplay", "heroesPlaced", "_medalsSinglePlayer", "_medalsMultiplayer", "_medalsBoss",
+             "_medalsBossElite", "_medalsCTLocal", "_medalsCTGlobal", "_medalsRace")
+
+class BTD6ChallengeDocumentView(_ModelView):
+    """
+    A BTD6ChallengeDocument that only decodes the towers, powers, bloon modifiers and round sets when they're first
+    used. Get them with get_challenge_metadata(challenge_id, view=True)
+    """
+    __slots__ = ()
+    _model = BTD6ChallengeDocument
+    _lazy = ("roundSets", "_powers", "_bloonModifiers", "_towers")
+    _renamed = {"id_": "id", "map_": "map", "powers": "_powers", "bloonModifiers": "_bloonModifiers",
+                "towers": "_towers"}
+
+"""
+COLUMNAR LEADERBOARDS
+"""
+class BTD6ColumnarLeaderboard:
+    """
+    A leaderboard kept as NumPy arrays, one per column, instead of a list of objects. Questions about the whole
+    leaderboard (ranks, cutoffs, when scores were submitted) are answered without going through it in Python.
+    The entries are in leaderboard order, so the rank of an entry is its index + 1.
+    Display names and profiles are interned, they're stored as codes into one list of strings.
+    Needs the library *numpy*
+
+    :param scores: Array with the score of every entry
+    :param submission_times: Array with the epoch time in milliseconds every entry was submitted (-1 when not available)
+    :param score_parts: 2D array with one column for every name in part_names
+    :param part_names: The names of the score parts, for example ['Game Time']
+    :param names: Array of codes into strings, for the display names
+    :param profiles: Array of codes into strings, for the profile links
+    :param strings: The interned strings
+    :param lower_is_better: If a lower score is a better one, like the time in a race
+    """
+
+    def __init__(self, scores, submission_times, score_parts, part_names: list, names, profiles, strings: list,
+                 lower_is_better=True):
+        if np is None:
+            raise ImportError("BTD6ColumnarLeaderboard needs the library numpy, install it with `pip install numpy`")
+        self.scores = np.asarray(scores, dtype=np.int64)
+        self.submission_times = np.asarray(submission_times, dtype=np.int64)
+        self.score_parts = np.asarray(score_parts, dtype=np.int64).reshape(len(self.scores), len(part_names))
+        self.part_names = list(part_names)
+        self.names = np.asarray(names, dtype=np.int32)
+        self.profiles = np.asarray(profiles, dtype=np.int32)
+        self.strings = strings
+        self.lower_is_better = lower_is_better
+        self._codes = {string: code for code, string in enumerate(strings)}
+
+        logging.debug(f"Created Columnar Leaderboard with {len(self.scores)} entries")
+
+    @classmethod
+    def from_entries(cls, entries, lower_is_better=True):
+        """
+        Makes a columnar leaderboard from submission entries, for example from iter_race_leaderboard
+        :param entries: Iterable of BTD6SubmissionEntry (or dicts from the API body), in leaderboard order
+        :param lower_is_better: If a lower score is a better one, like the time in a race
+        :return: A BTD6ColumnarLeaderboard
+        """
+        scores, times, parts, names, profiles = [], [], [], [], []
+        part_names = []
+        codes = {}
+        strings = []
+
+        def intern(string):
+            code = codes.get(string)
+            if code is None:
+                code = codes[string] = len(strings)
+                strings.append(string)
+            return code
+
+        for entry in entries:
+            if isinstance(entry, dict):
+                entry = BTD6SubmissionEntry.from_dict(entry)
+            scores.append(entry.score)
+            times.append(entry.submissionTime)
+            names.append(intern(entry.displayName))
+            profiles.append(intern(entry.profile))
+
+            row = {}
+            for i, part in enumerate(entry.scoreParts or []):
+                name = part.get("name", f"part{i}") if isinstance(part, dict) else f"part{i}"
+                row[name] = part.get("score", 0) if isinstance(part, dict) else part
+                if name not in part_names:
+                    part_names.append(name)
+            parts.append(row)
+
+        score_parts = [[row.get(name, 0) for name in part_names] for row in parts]
+        return cls(scores, times, score_parts, part_names, names, profiles, strings, lower_is_better)
+
+    @classmethod
+    def from_body(cls, body: list, lower_is_better=True):
+        """
+        :param body: The body of the API response JSON object. Example: response['body']
+        :param lower_is_better: If a lower score is a better one, like the time in a race
+        :return: A BTD6ColumnarLeaderboard
+        """
+        return cls.from_entries(body, lower_is_better)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def get_entry(self, rank: int) -> BTD6SubmissionEntry:
+        """
+        :param rank: The rank of the entry, starting at 1
+        :return: The entry as a BTD6SubmissionEntry
+        """
+        i = rank - 1
+        score_parts = [{"name": name, "score": int(self.score_parts[i, j])} for j, name in enumerate(self.part_names)]
+        return BTD6SubmissionEntry(self.strings[self.names[i]], int(self.scores[i]), score_parts,
+                                   int(self.submission_times[i]), self.strings[self.profiles[i]])
+
+    def get_score_part(self, name: str):
+        """
+        :param name: The name of the score part, for example 'Game Time'
+        :return: Array with that score part of every entry
+        """
+        return self.score_parts[:, self.part_names.index(name)]
+
+    def rank_of(self, profile: str) -> int | None:
+        """
+        :param profile: The link to the profile of the player, like BTD6SubmissionEntry.profile
+        :return: The best rank of the player, or None if they aren't on the leaderboard
+        """
+        code = self._codes.get(profile)
+        if code is None:
+            return None
+        found = np.flatnonzero(self.profiles == code)
+        return int(found[0]) + 1 if len(found) else None
+
+    def ranks_of(self, profiles) -> list:
+        """
+        :param profiles: Links to the profiles of the players
+        :return: List with the best rank of every player, None for players that aren't on the leaderboard
+        """
+        count = len(self.scores)
+        first = np.full(len(self.strings), count, dtype=np.int64) # the first index of every string
+        np.minimum.at(first, self.profiles, np.arange(count))
+
+        ranks = []
+        for profile in profiles:
+            code = self._codes.get(profile)
+            ranks.append(int(first[code]) + 1 if code is not None and first[code] < count else None)
+        return ranks
+
+    def rank_for_score(self, score: int) -> int:
+        """
+        :param score: A score
+        :return: The rank that score would get on this leaderboard, after the entries with the same score
+        """
+        if self.lower_is_better:
+            return int(np.searchsorted(self.scores, score, side="right")) + 1
+        return int(np.searchsorted(-self.scores, -score, side="right")) + 1
+
+    def percentile_cutoff(self, percent: float) -> int | None:
+        """
+        :param percent: The top percentage, for example 1 for the top 1%
+        :return: The worst score that's still in the top percentage, or None if the leaderboard is empty
+        """
+        if not len(self.scores):
+            return None
+        index = max(0, int(np.ceil(len(self.scores) * percent / 100)) - 1)
+        return int(self.scores[min(index, len(self.scores) - 1)])
+
+    def count_submitted_between(self, start: int, end: int) -> int:
+        """
+        :param start: Epoch time in milliseconds
+        :param end: Epoch time in milliseconds, not included
+        :return: How many entries were submitted between start and end
+        """
+        return int(np.count_nonzero((self.submission_times >= start) & (self.submission_times < end)))
+
+    def submission_histogram(self, bucket: int = 3600000, start: int = None, end: int = None) -> tuple:
+        """
+        Counts the submissions in buckets of time, entries without a submission time are left out
+        :param bucket: The size of a bucket in milliseconds, an hour by default
+        :param start: Epoch time in milliseconds of the first bucket, the first submission if None
+        :param end: Epoch time in milliseconds where the last bucket ends, the last submission if None
+        :return: Tuple with an array of the bucket start times, and an array with the count of every bucket
+        """
+        times = self.submission_times[self.submission_times >= 0]
+        if start is None:
+            start = int(times.min()) if len(times) else 0
+        if end is None:
+            end = int(times.max()) + 1 if len(times) else start
+        times = times[(times >= start) & (times < end)]
+        buckets = max(0, -(-(end - start) // bucket))
+        counts = np.bincount((times - start) // bucket, minlength=buckets)[:buckets]
+        return start + np.arange(buckets, dtype=np.int64) * bucket, counts
+
+    def merge(self, *others, sort=False):
+        """
+        Puts pages of a leaderboard together, in the order they're given
+        :param others: The other BTD6ColumnarLeaderboard pages
+        :param sort: Sort all entries by score afterwards, for pages that aren't in order
+        :return: A new BTD6ColumnarLeaderboard
+        """
+        pages = (self,) + others
+        part_names = list(self.part_names)
+        for page in others:
+            part_names += [name for name in page.part_names if name not in part_names]
+
+        strings = list(self.strings)
+        codes = dict(self._codes)
+        names, profiles, score_parts = [], [], []
+        for page in pages:
+            remap = np.empty(len(page.strings), dtype=np.int32)
+            for code, string in enumerate(page.strings):
+                new = codes.get(string)
+                if new is None:
+                    new = codes[string] = len(strings)
+                    strings.append(string)
+                remap[code] = new
+            names.append(remap[page.names])
+            profiles.append(remap[page.profiles])
+
+            parts = np.zeros((len(page), len(part_names)), dtype=np.int64)
+            for j, name in enumerate(page.part_names):
+                parts[:, part_names.index(name)] = page.score_parts[:, j]
+            score_parts.append(parts)
+
+        merged = BTD6ColumnarLeaderboard(
+            np.concatenate([page.scores for page in pages]),
+            np.concatenate([page.submission_times for page in pages]),
+            np.concatenate(score_parts), part_names,
+            np.concatenate(names), np.concatenate(profiles), strings, self.lower_is_better,
+        )
+        if sort:
+            order = np.argsort(merged.scores if self.lower_is_better else -merged.scores, kind="stable")
+            merged.scores = merged.scores[order]
+            merged.submission_times = merged.submission_times[order]
+            merged.score_parts = merged.score_parts[order]
+            merged.names = merged.names[order]
+            merged.profiles = merged.profiles[order]
+        return merged
+
+"""
+LEADERBOARD WATCHING
+"""
+class LeaderboardChange:
+    """
+    Something that changed on a leaderboard between two polls of a LeaderboardWatcher
+
+    :param kind: NEW, IMPROVED (the score changed), MOVED (same score, other rank) or DROPPED (not on it anymore)
+    :param entry: The BTD6SubmissionEntry, the last known one for DROPPED
+    :param old_rank: The rank before, None for NEW
+    :param new_rank: The rank now, None for DROPPED
+    :param old_score: The score before, None for NEW
+    :param new_score: The score now, None for DROPPED
+    """
+    NEW = "new"
+    IMPROVED = "improved"
+    MOVED = "moved"
+    DROPPED = "dropped"
+
+    __slots__ = ("kind", "entry", "old_rank", "new_rank", "old_score", "new_score")
+
+    def __init__(self, kind: str, entry, old_rank=None, new_rank=None, old_score=None, new_score=None):
+        self.kind = kind
+        self.entry = entry
+        self.old_rank = old_rank
+        self.new_rank = new_rank
+        self.old_score = old_score
+        self.new_score = new_score
+
+    def __repr__(self):
+        return (f"LeaderboardChange({self.kind!r}, {self.entry.displayName!r}, rank {self.old_rank} -> {self.new_rank}, "
+                f"score {self.old_score} -> {self.new_score})")
+
+class LeaderboardWatcher:
+    """
+    Keeps the last snapshot of a leaderboard and only gives you what changed since the last poll.
+    The part of the leaderboard that didn't change is skipped, and entries are only turned into objects when they
+    changed, so the work follows the number of changes and not the size of the leaderboard
+
+    :param api: A BTD6API, or an AsyncBTD6API for apoll() and awatch()
+    :param link: The link to the leaderboard, for example f"/btd6/races/{race_id}/leaderboard"
+    :param raw: If you input the whole link, or just the suffix
+    :param pages: How many pages of the leaderboard to watch
+    """
+
+    def __init__(self, api, link: str, raw=False, pages: int = 1):
+        self.api = api
+        self.link = link
+        self.raw = raw
+        self.pages = pages
+
+        self.keys = [] # (profile, score) of every entry, in leaderboard order
+        self.entries = [] # the raw entries of the last poll
+        self.ranks = {} # profile -> index in keys
+
+    @classmethod
+    def for_race(cls, api, race_id, pages: int = 1):
+        """
+        :return: A LeaderboardWatcher for the leaderboard of a race event
+        """
+        return cls(api, f"/btd6/races/{race_id}/leaderboard", pages=pages)
+
+    @classmethod
+    def for_boss(cls, api, boss_id, type_, teamSize, pages: int = 1):
+        """
+        :return: A LeaderboardWatcher for a leaderboard of a boss event
+        """
+        return cls(api, f"/btd6/bosses/{boss_id}/leaderboard/{type_}/{teamSize}", pages=pages)
+
+    def _common_prefix(self, keys: list) -> int:
+        # Binary search with slice comparisons, those run in C so this is a lot faster than a loop
+        low, high = 0, min(len(self.keys), len(keys))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.keys[low:middle] == keys[low:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def diff(self, entries: list) -> list:
+        """
+        Compares the entries with the last snapshot, and makes them the new snapshot
+        :param entries: The raw entries of the leaderboard, in order. Example: response['body']
+        :return: List of LeaderboardChange objects
+        """
+        keys = [(entry['profile'], entry['score']) for entry in entries]
+        if keys == self.keys:
+            self.entries = entries
+            return []
+
+        start = self._common_prefix(keys)
+        changes = []
+        new_profiles = set()
+
+        for i in range(start, len(keys)):
+            profile, score = keys[i]
+            new_profiles.add(profile)
+            old = self.ranks.get(profile)
+            if old is None:
+                changes.append(LeaderboardChange(LeaderboardChange.NEW, BTD6SubmissionEntry.from_dict(entries[i]),
+                                                 new_rank=i + 1, new_score=score))
+                continue
+
+            old_score = self.keys[old][1]
+            if old_score != score:
+                kind = LeaderboardChange.IMPROVED
+            elif old != i:
+                kind = LeaderboardChange.MOVED
+            else:
+                continue
+            changes.append(LeaderboardChange(kind, BTD6SubmissionEntry.from_dict(entries[i]),
+                                             old + 1, i + 1, old_score, score))
+
+        for i in range(start, len(self.keys)):
+            profile, score = self.keys[i]
+            if profile not in new_profiles:
+                changes.append(LeaderboardChange(LeaderboardChange.DROPPED,
+                                                 BTD6SubmissionEntry.from_dict(self.entries[i]),
+                                                 old_rank=i + 1, old_score=score))
+
+        # Only the part after the common prefix has to be updated
+        for i in range(start, len(self.keys)):
+            if self.ranks.get(self.keys[i][0]) == i:
+                del self.ranks[self.keys[i][0]]
+        for i in range(start, len(keys)):
+            self.ranks.setdefault(keys[i][0], i)
+
+        self.keys = keys
+        self.entries = entries
+        logging.debug(f"Leaderboard diff: {len(changes)} changes, first {start} entries unchanged")
+        return changes
+
+    def poll(self) -> list:
+        """
+        Fetches the leaderboard and compares it with the last poll. The first poll gives every entry as NEW
+        :return: List of LeaderboardChange objects
+        """
+        entries = []
+        link, raw = self.link, self.raw
+        for _ in range(self.pages):
+            response = self.api.get_response(link, raw=raw)
+            entries += response['body']
+            link, raw = response.get('next'), True
+            if not link:
+                break
+        return self.diff(entries)
+
+    def watch(self, interval: float = 5.0, stop: threading.Event = None):
+        """
+        Polls the leaderboard forever (or until stop is set), and gives every change as it's found
+        :param interval: Seconds between polls
+        :param stop: A threading.Event that stops watching when it's set
+        :return: Generator of LeaderboardChange objects
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            yield from self.poll()
+            stop.wait(interval)
+
+    async def apoll(self) -> list:
+        """
+        The same as poll, for an AsyncBTD6API
+        :return: List of LeaderboardChange objects
+        """
+        entries = []
+        link, raw = self.link, self.raw
+        for _ in range(self.pages):
+            response = await self.api.get_response(link, raw=raw)
+            entries += response['body']
+            link, raw = response.get('next'), True
+            if not link:
+                break
+        return self.diff(entries)
+
+    async def awatch(self, interval: float = 5.0):
+        """
+        The same as watch, for an AsyncBTD6API. Stop it with break or by cancelling the task
+        :param interval: Seconds between polls
+        :return: Async generator of LeaderboardChange objects
+        """
+        while True:
+            for change in await self.apoll():
+                yield change
+            await asyncio.sleep(interval)
+
+"""
+EVENT POLLING
+"""
+class EventPoller:
+    """
+    Polls live leaderboards only while events are on. It keeps a timeline of the known races and bosses and polls the
+    leaderboards of ongoing events every live_interval seconds. Between events it sleeps until the next start or end,
+    and only refreshes the list of events every refresh_interval seconds.
+    Every leaderboard has a LeaderboardWatcher, so the callback gets the changes since the last poll.
+    When the API can't be reached (or the callback raises), the error is logged and the refresh or the event is
+    tried again later, waiting twice as long after every failure in a row, up to max_backoff seconds
+
+    :param api: A BTD6API
+    :param callback: Function called as callback(event, watcher, changes) every time a leaderboard is polled,
+                     watcher.entries has the whole leaderboard
+    :param live_interval: Seconds between polls of the leaderboards of ongoing events
+    :param refresh_interval: Seconds between refreshes of the list of events
+    :param races: Follow race events
+    :param bosses: Follow boss events
+    :param boss_difficulties: The difficulties of the boss leaderboards to poll
+    :param max_backoff: The most seconds to wait before trying a failed refresh or event again
+    """
+
+    def __init__(self, api, callback, live_interval: float = 30.0, refresh_interval: float = 3600.0, races=True,
+                 bosses=True, boss_difficulties=("standard", "elite"), max_backoff: float = 600.0):
+        self.api = api
+        self.callback = callback
+        self.live_interval = live_interval
+        self.refresh_interval = refresh_interval
+        self.races = races
+        self.bosses = bosses
+        self.boss_difficulties = boss_difficulties
+        self.max_backoff = max_backoff
+
+        self.events = []
+        self.failures = {} # event id (None for the refresh) -> failures in a row
+        self.retry_at = {} # event id -> epoch time in seconds when it's polled again after failing
+        self.watchers = {} # link -> LeaderboardWatcher
+        self.next_refresh = 0.0
+        self.next_poll = 0.0
+        self.last_step = None
+
+    @staticmethod
+    def event_is_ongoing(event: Event, now: float = None) -> bool:
+        """
+        :param event: A race or boss event
+        :param now: Epoch time in seconds, the current time if None
+        :return: If the event has started and hasn't ended yet
+        """
+        now = time.time() if now is None else now
+        return event.start / 1000 <= now < event.end / 1000
+
+    def refresh_events(self, now: float = None) -> None:
+        """
+        Fetches the lists of race and boss events
+        :param now: Epoch time in seconds, the current time if None
+        """
+        now = time.time() if now is None else now
+        events = []
+        if self.races:
+            events += self.api.get_available_race_events()
+        if self.bosses:
+            events += self.api.get_available_boss_events()
+        self.events = events
+        self.next_refresh = now + self.refresh_interval
+        logging.debug(f"Event poller: {len(events)} events known, {len(self.ongoing(now))} ongoing")
+
+    def ongoing(self, now: float = None) -> list:
+        """
+        :param now: Epoch time in seconds, the current time if None
+        :return: List of the known events that are ongoing
+        """
+        return [event for event in self.events if self.event_is_ongoing(event, now)]
+
+    def next_boundary(self, now: float = None) -> float | None:
+        """
+        :param now: Epoch time in seconds, the current time if None
+        :return: Epoch time in seconds of the next start or end of a known event, None if there isn't one
+        """
+        now = time.time() if now is None else now
+        boundaries = [t / 1000 for event in self.events for t in (event.start, event.end) if t / 1000 > now]
+        return min(boundaries, default=None)
+
+    def next_wakeup(self, now: float = None) -> float:
+        """
+        :param now: Epoch time in seconds, the current time if None
+        :return: Epoch time in seconds when something has to be done next
+        """
+        now = time.time() if now is None else now
+        wakeups = [self.next_refresh]
+        boundary = self.next_boundary(now)
+        if boundary is not None:
+            wakeups.append(boundary)
+        if self.ongoing(now):
+            wakeups.append(self.next_poll)
+        return max(now, min(wakeups))
+
+    def _leaderboard_links(self, event) -> list:
+        if isinstance(event, (BTD6RaceEvent, BTD6CompactRaceEvent)):
+            return [f"/btd6/races/{event.id}/leaderboard"]
+        return [f"/btd6/bosses/{event.id}/leaderboard/{difficulty}/1" for difficulty in self.boss_difficulties]
+
+    def poll(self, event) -> None:
+        """
+        Polls the leaderboards of an event right away, and calls the callback with the changes
+        :param event: A race or boss event
+        """
+        for link in self._leaderboard_links(event):
+            watcher = self.watchers.get(link)
+            if watcher is None:
+                watcher = self.watchers[link] = LeaderboardWatcher(self.api, link)
+            try:
+                with self.api.priority(PRIORITY_LIVE):
+                    changes = watcher.poll()
+            except NoScoresAvailable:
+                continue
+            self.callback(event, watcher, changes)
+
+    def step(self, now: float = None) -> float:
+        """
+        Does everything that is due: refreshing the events when an event started or ended, and polling the
+        leaderboards of ongoing events
+        :param now: Epoch time in seconds, the current time if None
+        :return: Epoch time in seconds of the next wakeup
+        """
+        now = time.time() if now is None else now
+        crossed = self.last_step is not None and any(
+            self.last_step < t / 1000 <= now for event in self.events for t in (event.start, event.end))
+        if crossed:
+            # An event started or ended, the list can have a new event, but it can take a bit to show up
+            self.next_poll = now
+            self.next_refresh = min(self.next_refresh, now)
+        if now >= self.next_refresh:
+            try:
+                self.refresh_events(now)
+            except RequestFailed as err:
+                self.next_refresh = now + self._failed(None, err)
+            else:
+                self.failures.pop(None, None)
+                if crossed:
+                    self.next_refresh = min(self.next_refresh, now + min(120.0, self.refresh_interval))
+
+        live = self.ongoing(now)
+        live_links = {link for event in live for link in self._leaderboard_links(event)}
+        for link in list(self.watchers):
+            if link not in live_links:
+                del self.watchers[link]
+        live_ids = {event.id for event in live}
+        for event_id in [event_id for event_id in self.retry_at if event_id not in live_ids]:
+            del self.retry_at[event_id]
+            self.failures.pop(event_id, None)
+
+        if live and now >= self.next_poll:
+            for event in live:
+                if now < self.retry_at.get(event.id, 0.0):
+                    continue
+                try:
+                    self.poll(event)
+                except Exception as err: # the API or the callback, the other events are still polled
+                    self.retry_at[event.id] = now + self._failed(event.id, err)
+                else:
+                    self.retry_at.pop(event.id, None)
+                    self.failures.pop(event.id, None)
+            self.next_poll = now + self.live_interval
+
+        self.last_step = now
+        return self.next_wakeup(now)
+
+    def _failed(self, event_id, err: Exception) -> float:
+        """
+        Remembers a failure of a refresh (event_id None) or an event
+        :return: Seconds to wait before trying again
+        """
+        failures = self.failures[event_id] = self.failures.get(event_id, 0) + 1
+        interval = self.live_interval if event_id is not None else min(self.live_interval, self.refresh_interval)
+        backoff = min(self.max_backoff, interval * 2 ** (failures - 1))
+        what = "refreshing the events" if event_id is None else f"polling '{event_id}'"
+        logging.warning(f"Event poller: {what} failed {failures} times in a row ({type(err).__name__}: {err}), "
+                        f"trying again in {backoff:.0f} seconds")
+        return backoff
+
+    def run(self, stop: threading.Event = None) -> None:
+        """
+        Polls until stop is set, sleeping until exactly the next thing that has to be done
+        :param stop: A threading.Event that stops the poller when it's set
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            wakeup = self.step()
+            stop.wait(max(0.0, wakeup - time.time()))
+
+"""
+ARCHIVE
+"""
+class LeaderboardArchive:
+    """
+    Keeps every snapshot of race and boss leaderboards on disk, to see how scores change over time.
+    Every event has its own append-only file of fixed-width records, one per entry per snapshot, and all events
+    share one table of names and profile links, so every string is only stored once.
+    Files are read with mmap, so going through years of snapshots doesn't load them into memory.
+    Reads are a lot faster with the library *numpy*, but it isn't needed
+
+    Only one process should write to an archive at a time, reading from other processes is fine
+
+    :param directory: The folder of the archive, it's created if it doesn't exist
+    """
+    RECORD = struct.Struct("<qqqiII") # snapshotTime, score, submissionTime, rank, displayName, profile
+    STRINGS_FILE = "strings.bin"
+    EXTENSION = ".lb"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._strings = []
+        self._string_ids = {}
+        self._strings_read = 0 # bytes of the strings file already loaded
+        self._load_strings()
+
+    @property
+    def dtype(self):
+        """
+        :return: The numpy dtype of a record
+        """
+        return np.dtype([("snapshotTime", "<i8"), ("score", "<i8"), ("submissionTime", "<i8"), ("rank", "<i4"),
+                         ("displayName", "<u4"), ("profile", "<u4")])
+
+    def _path(self, event_id: str) -> str:
+        return os.path.join(self.directory, quote(str(event_id), safe="") + self.EXTENSION)
+
+    def _load_strings(self) -> None:
+        # Every string is stored as its length (2 bytes) and its UTF-8 bytes, in the order they got their id
+        path = os.path.join(self.directory, self.STRINGS_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as file:
+            file.seek(self._strings_read)
+            data = file.read()
+        position = 0
+        while position + 2 <= len(data):
+            length = int.from_bytes(data[position:position + 2], "little")
+            if position + 2 + length > len(data):
+                break # only half written
+            string = data[position + 2:position + 2 + length].decode()
+            self._string_ids[string] = len(self._strings)
+            self._strings.append(string)
+            position += 2 + length
+        self._strings_read += position
+
+    @staticmethod
+    def _fit(string: str) -> str:
+        # The length is stored in 2 bytes. A character is up to 4 bytes, so only long strings can be too long,
+        # and they're cut between two characters
+        if len(string) > 0x3FFF:
+            string = string.encode()[:0xFFFF].decode(errors="ignore")
+        return string
+
+    def _string_id(self, string: str, staged: dict) -> int:
+        string = self._fit(string or "")
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = staged.get(string)
+            if string_id is None:
+                string_id = staged[string] = len(self._strings) + len(staged)
+        return string_id
+
+    def string(self, string_id: int) -> str:
+        """
+        :param string_id: The id of a string in the string table
+        :return: The string
+        """
+        if string_id >= len(self._strings):
+            self._load_strings() # written by another process
+        return self._strings[string_id]
+
+    def string_id(self, string: str) -> int | None:
+        """
+        :param string: A name or a profile link
+        :return: Its id in the string table, or None if it isn't in the archive
+        """
+        string = self._fit(string)
+        if string not in self._string_ids:
+            self._load_strings()
+        return self._string_ids.get(string)
+
+    def append(self, event_id: str, entries, snapshot_time: int = None) -> int:
+        """
+        Adds a snapshot of a leaderboard to the archive
+        :param event_id: The id of the event, for example BTD6RaceEvent.id. Use something like f"{boss.id}:elite"
+                         to keep the leaderboards of one boss event apart
+        :param entries: The entries of the leaderboard in order, any submission entries (or a BTD6EventLeaderboard)
+        :param snapshot_time: When the snapshot was taken in milliseconds (like the API), now if None
+        :return: How many entries were added
+        """
+        if isinstance(entries, BTD6EventLeaderboard):
+            entries = entries.get_leaderboard()
+        snapshot_time = int(time.time() * 1000) if snapshot_time is None else int(snapshot_time)
+
+        with self._lock:
+            self._load_strings() # so _strings_read is the end of the last whole string
+            staged = {} # new strings and their ids, they're only added to the table once they're on disk
+            pack = self.RECORD.pack
+            records = bytearray()
+            for rank, entry in enumerate(entries, 1):
+                records += pack(snapshot_time, int(entry.score), int(entry.submissionTime or 0), rank,
+                                self._string_id(entry.displayName, staged), self._string_id(entry.profile, staged))
+
+            # Strings first, so a record never points to a string that isn't on disk
+            if staged:
+                data = b"".join(len(encoded).to_bytes(2, "little") + encoded for encoded in map(str.encode, staged))
+                with open(os.path.join(self.directory, self.STRINGS_FILE), "ab") as file:
+                    if file.tell() > self._strings_read: # a string was only half written, remove it
+                        file.truncate(self._strings_read)
+                        file.seek(0, os.SEEK_END)
+                    file.write(data)
+                self._strings_read += len(data)
+                for string in staged:
+                    self._string_ids[string] = len(self._strings)
+                    self._strings.append(string)
+
+            path = self._path(event_id)
+            with open(path, "ab") as file:
+                extra = file.tell() % self.RECORD.size
+                if extra: # a record was only half written, remove it
+                    file.truncate(file.tell() - extra)
+                    file.seek(0, os.SEEK_END)
+                file.write(records)
+        count = len(records) // self.RECORD.size
+        logging.debug(f"Archived {count} entries of {event_id}")
+        return count
+
+    def record(self, api, event, type_: str = "standard") -> int:
+        """
+        Downloads the whole leaderboard of an event and adds it to the archive
+        :param api: A BTD6API
+        :param event: A BTD6RaceEvent or BTD6BossEvent
+        :param type_: For bosses, 'standard' or 'elite'. It's archived as f"{event.id}:{type_}"
+        :return: How many entries were added
+        """
+        if isinstance(event, (BTD6BossEvent, BTD6CompactBossEvent)):
+            entries = api.iter_boss_leaderboard(event.id, type_, 1, entry_class=BTD6CompactSubmissionEntry)
+            return self.append(f"{event.id}:{type_}", entries)
+        return self.append(event.id, api.iter_race_leaderboard(event.id, entry_class=BTD6CompactSubmissionEntry))
+
+    def _map(self, event_id: str):
+        # A read only view of the file, None if it's empty or doesn't exist
+        try:
+            with open(self._path(event_id), "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                size -= size % self.RECORD.size
+                if size == 0:
+                    return None
+                return memoryview(mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
+
+    def records(self, event_id: str):
+        """
+        Every record of an event. The records are read straight from the file when you use them
+        :param event_id: The id of the event
+        :return: A numpy structured array (see dtype) if numpy is installed, or else an iterator of tuples
+                 (snapshotTime, score, submissionTime, rank, displayName, profile). displayName and profile are ids
+                 in the string table, see string()
+        """
+        view = self._map(event_id)
+        if np is not None:
+            return np.frombuffer(view, dtype=self.dtype) if view is not None else np.empty(0, dtype=self.dtype)
+        return self.RECORD.iter_unpack(view) if view is not None else iter(())
+
+    def events(self) -> list:
+        """
+        :return: The ids of the archived events, from the oldest first snapshot to the newest
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.EXTENSION):
+                continue
+            with open(os.path.join(self.directory, name), "rb") as file:
+                first = file.read(8)
+            if len(first) == 8:
+                found.append((int.from_bytes(first, "little", signed=True), unquote(name[:-len(self.EXTENSION)])))
+        return [event_id for _, event_id in sorted(found)]
+
+    def snapshots(self, event_id: str) -> list:
+        """
+        :param event_id: The id of the event
+        :return: When every snapshot of the event was taken, in milliseconds
+        """
+        records = self.records(event_id)
+        if np is not None:
+            return np.unique(records["snapshotTime"]).tolist()
+        return sorted({record[0] for record in records})
+
+    def snapshot(self, event_id: str, snapshot_time: int = None, entry_class=BTD6SubmissionEntry) -> list:
+        """
+        Gives you a leaderboard like it was when a snapshot was taken. The score parts aren't archived, so they're None
+        :param event_id: The id of the event
+        :param snapshot_time: When the snapshot was taken, the latest one if None
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry
+        :return: A list of entries in order
+        """
+        if snapshot_time is None:
+            snapshots = self.snapshots(event_id)
+            if not snapshots:
+                return []
+            snapshot_time = snapshots[-1]
+        records = self.records(event_id)
+        if np is not None:
+            records = records[records["snapshotTime"] == snapshot_time].tolist()
+        else:
+            records = [record for record in records if record[0] == snapshot_time]
+        return [entry_class(self.string(name), score, None, submission_time, self.string(profile))
+                for _, score, submission_time, _, name, profile in records]
+
+    def player_history(self, profile: str, events: list = None, last: int = None) -> list:
+        """
+        The scores of one player over time, for example across the last 200 races
+        :param profile: The link to the profile of the player, like BTD6SubmissionEntry.profile
+        :param events: The ids of the events to look through, every archived event if None
+        :param last: Only look through this many of the newest events
+        :return: A list of (event_id, snapshotTime, score, rank, submissionTime), oldest first
+        """
+        events = self.events() if events is None else list(events)
+        if last is not None:
+            events = events[-last:] if last > 0 else []
+        profile_id = self.string_id(profile)
+        if profile_id is None:
+            return []
+
+        history = []
+        for event_id in events:
+            records = self.records(event_id)
+            if np is not None:
+                found = records[records["profile"] == profile_id]
+                rows = zip(found["snapshotTime"].tolist(), found["score"].tolist(), found["rank"].tolist(),
+                           found["submissionTime"].tolist())
+            else:
+                rows = ((r[0], r[1], r[3], r[2]) for r in records if r[5] == profile_id)
+            history.extend((event_id, *row) for row in rows)
+        return history
+
+"""
+PLAYER INDEX
+"""
+class PlayerSubmission:
+    """
+    One result of a player in one event, from a PlayerIndex
+
+    :param event_id: The id of the event, like BTD6RaceEvent.id, or f"{boss.id}:{difficulty}" for bosses
+    :param kind: 'race' or 'boss'
+    :param score: The score of the player
+    :param rank: The rank of the player when the leaderboard was added
+    :param submissionTime: When the score was submitted, in milliseconds
+    :param displayName: The name of the player at that time
+    """
+    __slots__ = ("event_id", "kind", "score", "rank", "submissionTime", "displayName")
+
+    def __init__(self, event_id: str, kind: str, score, rank: int, submissionTime, displayName: str):
+        self.event_id = event_id
+        self.kind = kind
+        self.score = score
+        self.rank = rank
+        self.submissionTime = submissionTime
+        self.displayName = displayName
+
+    def __repr__(self):
+        return f"PlayerSubmission({self.event_id!r}, {self.kind!r}, score {self.score}, rank {self.rank})"
+
+    def to_list(self) -> list:
+        return [self.event_id, self.kind, self.score, self.rank, self.submissionTime, self.displayName]
+
+
+class PlayerIndex:
+    """
+    Remembers the results of every player in every race and boss leaderboard you add to it, so all results of a
+    player are one dictionary lookup away. Adding a leaderboard again replaces the results of that event, players
+    that aren't on it anymore are removed. Players are found by the id in their profile link, so name changes
+    don't matter. Save it with save() and load it again with PlayerIndex.load()
+    """
+    RACE = "race"
+    BOSS = "boss"
+
+    def __init__(self):
+        self.players = {} # user id -> {event id -> PlayerSubmission}
+        self.events = {} # event id -> {"kind", "added", "players"}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.players)
+
+    def __contains__(self, player):
+        return BTD6API.get_user_id(player) in self.players
+
+    def add(self, event_id: str, entries, kind: str = RACE) -> int:
+        """
+        Adds (or replaces) the leaderboard of an event
+        :param event_id: The id of the event, like BTD6RaceEvent.id. Use f"{boss.id}:{difficulty}" for bosses
+        :param entries: The entries of the leaderboard in order, or a BTD6EventLeaderboard
+        :param kind: RACE or BOSS
+        :return: How many players are on the leaderboard
+        """
+        if isinstance(entries, BTD6EventLeaderboard):
+            entries = entries.get_leaderboard()
+        get_user_id = BTD6API.get_user_id
+
+        # Everything is read before the index is touched, so when a page of the leaderboard fails halfway,
+        # the index still has the old results, and nobody has to wait for the downloads
+        submissions = {}
+        for rank, entry in enumerate(list(entries), 1):
+            submissions[get_user_id(entry.profile)] = PlayerSubmission(event_id, kind, entry.score, rank,
+                                                                       entry.submissionTime, entry.displayName)
+        new_players = list(submissions)
+
+        with self._lock:
+            event = self.events.get(event_id)
+            for user_id in event["players"] if event is not None else ():
+                if user_id not in submissions: # dropped off the leaderboard
+                    self._remove(user_id, event_id)
+            for user_id, submission in submissions.items():
+                results = self.players.get(user_id)
+                if results is None:
+                    results = self.players[user_id] = {}
+                results[event_id] = submission
+            self.events[event_id] = {"kind": kind, "added": int(time.time() * 1000), "players": new_players}
+        logging.debug(f"Player index: added {len(new_players)} players of '{event_id}'")
+        return len(new_players)
+
+    def add_race(self, api, race) -> int:
+        """
+        Downloads the whole leaderboard of a race and adds it
+        :param api: A BTD6API
+        :param race: A BTD6RaceEvent, or the id of one
+        :return: How many players are on the leaderboard
+        """
+        race_id = getattr(race, "id", race)
+        return self.add(race_id, api.iter_race_leaderboard(race_id, entry_class=BTD6CompactSubmissionEntry),
+                        self.RACE)
+
+    def add_boss(self, api, boss, difficulty: str = "standard") -> int:
+        """
+        Downloads the whole (solo) leaderboard of a boss and adds it as f"{boss.id}:{difficulty}"
+        :param api: A BTD6API
+        :param boss: A BTD6BossEvent, or the id of one
+        :param difficulty: standard or elite
+        :return: How many players are on the leaderboard
+        """
+        boss_id = getattr(boss, "id", boss)
+        entries = api.iter_boss_leaderboard(boss_id, difficulty, 1, entry_class=BTD6CompactSubmissionEntry)
+        return self.add(f"{boss_id}:{difficulty}", entries, self.BOSS)
+
+    def _remove(self, user_id: str, event_id: str) -> None:
+        results = self.players.get(user_id)
+        if results is not None:
+            results.pop(event_id, None)
+            if not results:
+                del self.players[user_id]
+
+    def remove_event(self, event_id: str) -> None:
+        """
+        Removes every result of an event
+        """
+        with self._lock:
+            event = self.events.pop(event_id, None)
+            for user_id in event["players"] if event is not None else ():
+                self._remove(user_id, event_id)
+
+    def lookup(self, player, kind: str = None) -> list:
+        """
+        Gives you every result of a player
+        :param player: The id of the player, or the link to their profile, like BTD6SubmissionEntry.profile
+        :param kind: Only results of RACE or BOSS events, all of them if None
+        :return: A list of PlayerSubmission objects, the oldest submission first
+        """
+        results = self.players.get(BTD6API.get_user_id(player))
+        if not results:
+            return []
+        found = [result for result in list(results.values()) if kind is None or result.kind == kind]
+        found.sort(key=lambda result: result.submissionTime or 0)
+        return found
+
+    def best(self, player, n: int = 10, kind: str = None) -> list:
+        """
+        :param player: The id of the player, or the link to their profile
+        :param n: How many results
+        :param kind: Only results of RACE or BOSS events, all of them if None
+        :return: The n results of the player with the best rank
+        """
+        return heapq.nsmallest(n, self.lookup(player, kind), key=lambda result: result.rank)
+
+    def top_players(self, n: int = 10, by: str = "average_rank", kind: str = None, min_events: int = 1) -> list:
+        """
+        The best players across all events
+        :param n: How many players
+        :param by: 'average_rank', 'best_rank' or 'events' (the most events played)
+        :param kind: Only look at RACE or BOSS events, all of them if None
+        :param min_events: Players need results in at least this many events
+        :return: A list of (user id, value) tuples, the best first
+        """
+        if by not in ("average_rank", "best_rank", "events"):
+            raise ValueError("by can either be 'average_rank', 'best_rank' or 'events'")
+        with self._lock:
+            rows = []
+            for user_id, results in self.players.items():
+                ranks = [result.rank for result in results.values() if kind is None or result.kind == kind]
+                if len(ranks) < max(min_events, 1):
+                    continue
+                if by == "average_rank":
+                    rows.append((user_id, sum(ranks) / len(ranks)))
+                elif by == "best_rank":
+                    rows.append((user_id, min(ranks)))
+                else:
+                    rows.append((user_id, len(ranks)))
+        if by == "events":
+            return heapq.nlargest(n, rows, key=lambda row: row[1])
+        return heapq.nsmallest(n, rows, key=lambda row: row[1])
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index to a gzipped JSON file
+        :param path: Where to save it, for example 'players.json.gz'
+        """
+        with self._lock:
+            data = {
+                "version": 1,
+                "events": {event_id: {"kind": event["kind"], "added": event["added"],
+                                      "results": [self.players[user_id][event_id].to_list()[2:] + [user_id]
+                                                  for user_id in event["players"]]}
+                           for event_id, event in self.events.items()},
+            }
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(path + ".tmp", path) # so a crash while saving doesn't break the old file
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Loads an index saved with save()
+        :param path: The file
+        :return: A PlayerIndex
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        index = cls()
+        for event_id, event in data["events"].items():
+            kind = event["kind"]
+            players = []
+            for score, rank, submission_time, display_name, user_id in event["results"]:
+                results = index.players.get(user_id)
+                if results is None:
+                    results = index.players[user_id] = {}
+                results[event_id] = PlayerSubmission(event_id, kind, score, rank, submission_time, display_name)
+                players.append(user_id)
+            index.events[event_id] = {"kind": kind, "added": event["added"], "players": players}
+        return index
+
+"""
+CHALLENGE CATALOG
+"""
+class CatalogPage:
+    """
+    One page of the results of ChallengeCatalog.query
+
+    :param documents: The challenge documents on this page
+    :param total: How many challenges match the query
+    :param offset: Where this page starts
+    """
+    __slots__ = ("documents", "total", "offset")
+
+    def __init__(self, documents: list, total: int, offset: int):
+        self.documents = documents
+        self.total = total
+        self.offset = offset
+
+    @property
+    def next_offset(self) -> int | None:
+        """
+        :return: The offset of the next page, or None if this is the last one
+        """
+        end = self.offset + len(self.documents)
+        return end if end < self.total else None
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    def __len__(self):
+        return len(self.documents)
+
+
+class ChallengeCatalog:
+    """
+    Keeps challenge documents in memory with indexes on them, so queries like "hard challenges on Logs that end
+    before round 60 without Monkey Knowledge" don't have to look at every document.
+    Categories (map, mode, difficulty, disabled features and allowed towers) have an inverted index, numbers have
+    a sorted index. A query looks up every condition in its index and intersects the results, the smallest first.
+    Adding a document that's already in the catalog updates it
+    """
+    CATEGORIES = {"map": "map_", "mode": "mode", "difficulty": "difficulty"} # query name -> attribute
+    FEATURES = ("disableDoubleCash", "disableInstas", "disableMK", "disablePowers", "disableSelling", "noContinues")
+    NUMBERS = ("startRound", "endRound", "startingCash", "lives", "maxTowers", "maxParagons", "plays", "wins",
+               "upvotes", "winRate")
+
+    def __init__(self):
+        self.documents = {} # id -> document
+        self.categories = {name: {} for name in self.CATEGORIES} # name -> value -> set of ids
+        self.disabled = {feature: set() for feature in self.FEATURES} # feature -> set of ids
+        self.towers = {} # tower -> set of ids where it's allowed
+        self.numbers = {name: [] for name in self.NUMBERS} # name -> sorted list of (value, id)
+        self._indexed = {} # id -> (categories, features, towers, numbers) like they were indexed
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, challenge_id):
+        return challenge_id in self.documents
+
+    @staticmethod
+    def win_rate(document) -> float:
+        """
+        :return: The fraction of plays of a challenge that were won
+        """
+        return document.wins / document.plays if document.plays else 0.0
+
+    @staticmethod
+    def allowed_towers(document) -> set:
+        """
+        :return: The towers (and heroes) that can be placed in a challenge
+        """
+        return {tower["tower"] for tower in document.towers or () if tower.get("max", -1) != 0}
+
+    def _number(self, document, name):
+        return self.win_rate(document) if name == "winRate" else getattr(document, name)
+
+    def add(self, document) -> None:
+        """
+        Adds a challenge document, or updates it if it's already in the catalog
+        :param document: A BTD6ChallengeDocument or BTD6CompactChallengeDocument
+        """
+        with self._lock:
+            self.remove(document.id_)
+            self._add(document, insort)
+
+    def _add(self, document, insert) -> None:
+        challenge_id = document.id_
+        self.documents[challenge_id] = document
+        categories = tuple(getattr(document, attribute) for attribute in self.CATEGORIES.values())
+        features = tuple(feature for feature in self.FEATURES if getattr(document, feature))
+        towers = tuple(self.allowed_towers(document))
+        numbers = tuple(self._number(document, name) for name in self.NUMBERS)
+        self._indexed[challenge_id] = (categories, features, towers, numbers)
+
+        for name, value in zip(self.CATEGORIES, categories):
+            self.categories[name].setdefault(value, set()).add(challenge_id)
+        for feature in features:
+            self.disabled[feature].add(challenge_id)
+        for tower in towers:
+            self.towers.setdefault(tower, set()).add(challenge_id)
+        for name, value in zip(self.NUMBERS, numbers):
+            insert(self.numbers[name], (value, challenge_id))
+
+    def add_many(self, documents) -> int:
+        """
+        Adds a lot of challenge documents, faster than calling add for every one
+        :return: How many were added
+        """
+        documents = list(documents)
+        with self._lock:
+            for document in documents:
+                self.remove(document.id_)
+            for document in documents:
+                self._add(document, list.append)
+            for index in self.numbers.values():
+                index.sort()
+        return len(documents)
+
+    def add_from_api(self, api, filter_: str = "newest", max_workers: int = 8, refresh: bool = False) -> int:
+        """
+        Downloads the documents of the challenges in a list of challenges and adds them
+        :param api: A BTD6API
+        :param filter_: Either newest, trending or daily, see BTD6API.get_challenges_with_filter
+        :param max_workers: How many documents are downloaded at the same time
+        :param refresh: Download documents that are already in the catalog again, to update the plays and wins
+        :return: How many documents were added
+        """
+        challenge_ids = [challenge.id_ for challenge in api.get_challenges_with_filter(filter_)
+                         if refresh or challenge.id_ not in self.documents]
+        count = 0
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="btd6-catalog") as executor:
+            futures = [executor.submit(api.get_challenge_metadata, challenge_id) for challenge_id in challenge_ids]
+            for future in as_completed(futures):
+                try:
+                    self.add(future.result())
+                    count += 1
+                except Exception as err:
+                    logging.warning(f"Couldn't add a challenge to the catalog: {err!r}")
+        return count
+
+    def remove(self, challenge_id: str) -> None:
+        """
+        Removes a challenge from the catalog
+        """
+        with self._lock:
+            if self.documents.pop(challenge_id, None) is None:
+                return
+            # Use the values like they were indexed, the document could have been changed since
+            categories, features, towers, numbers = self._indexed.pop(challenge_id)
+            for name, value in zip(self.CATEGORIES, categories):
+                self.categories[name][value].discard(challenge_id)
+            for feature in features:
+                self.disabled[feature].discard(challenge_id)
+            for tower in towers:
+                self.towers[tower].discard(challenge_id)
+            for name, value in zip(self.NUMBERS, numbers):
+                index = self.numbers[name]
+                position = bisect_left(index, (value, challenge_id))
+                if position < len(index) and index[position][1] == challenge_id:
+                    del index[position]
+
+    def _range(self, name: str, bounds) -> tuple:
+        # The part of a sorted index between two values, both included, None for no limit
+        low, high = bounds
+        index = self.numbers[name]
+        start = 0 if low is None else bisect_left(index, low, key=itemgetter(0))
+        end = len(index) if high is None else bisect_right(index, high, key=itemgetter(0))
+        return index, start, end
+
+    def query(self, offset: int = 0, limit: int = 50, order_by: str = "createdAt", descending: bool = True,
+              **conditions) -> CatalogPage:
+        """
+        Finds the challenges that match every condition, for example
+        catalog.query(map="Logs", difficulty=["Hard", "Impoppable"], endRound=(None, 60), disabled=["disableMK"],
+        towers=["DartMonkey"], order_by="plays")
+        :param offset: How many results to skip, for pages
+        :param limit: How many results to give
+        :param order_by: 'createdAt' or one of NUMBERS to sort the results by
+        :param descending: Highest first
+        :param conditions: map, mode or difficulty: one value or a list of allowed values.
+                           disabled: features that have to be disabled, like 'disableMK'.
+                           towers: towers that have to be allowed.
+                           Any of NUMBERS: (minimum, maximum), both included, None for no limit
+        :return: A CatalogPage
+        """
+        with self._lock:
+            candidates = [] # (size, kind, condition) so the smallest is used first
+            for name, value in conditions.items():
+                if name in self.CATEGORIES:
+                    values = [value] if isinstance(value, str) or not hasattr(value, "__iter__") else value
+                    ids = set().union(*(self.categories[name].get(v, ()) for v in values))
+                    candidates.append((len(ids), "set", ids))
+                elif name == "disabled":
+                    for feature in value:
+                        if feature not in self.disabled:
+                            raise ValueError(f"'{feature}' isn't a feature, use one of {self.FEATURES}")
+                        candidates.append((len(self.disabled[feature]), "set", self.disabled[feature]))
+                elif name == "towers":
+                    for tower in value:
+                        ids = self.towers.get(tower, set())
+                        candidates.append((len(ids), "set", ids))
+                elif name in self.numbers:
+                    index, start, end = self._range(name, value)
+                    candidates.append((end - start, "range", (name, value, index, start, end)))
+                else:
+                    raise ValueError(f"Can't query on '{name}'")
+            candidates.sort(key=lambda candidate: candidate[0])
+
+            if not candidates:
+                matches = set(self.documents)
+            else:
+                size, kind, condition = candidates[0]
+                matches = set(condition) if kind == "set" else {i for _, i in condition[2][condition[3]:condition[4]]}
+                for size, kind, condition in candidates[1:]:
+                    if not matches:
+                        break
+                    if kind == "set":
+                        matches &= condition
+                    elif size <= len(matches):
+                        matches &= {i for _, i in condition[2][condition[3]:condition[4]]}
+                    else: # cheaper to check the few documents left than to build a set from the index
+                        name, (low, high) = condition[0], condition[1]
+                        matches = {i for i in matches
+                                   if (low is None or self._number(self.documents[i], name) >= low)
+                                   and (high is None or self._number(self.documents[i], name) <= high)}
+
+            total = len(matches)
+            if order_by in self.numbers and total > len(self.documents) // 8:
+                # Lots of results, go through the sorted index and stop when the page is full
+                ordered = reversed(self.numbers[order_by]) if descending else iter(self.numbers[order_by])
+                page_ids = list(itertools.islice((i for _, i in ordered if i in matches), offset, offset + limit))
+            else:
+                if order_by not in self.numbers and order_by != "createdAt":
+                    raise ValueError(f"Can't order by '{order_by}'")
+                key = (lambda i: self._number(self.documents[i], order_by)) if order_by in self.numbers \
+                    else (lambda i: self.documents[i].createdAt)
+                pick = heapq.nlargest if descending else heapq.nsmallest
+                page_ids = pick(offset + limit, matches, key=key)[offset:]
+            return CatalogPage([self.documents[i] for i in page_ids], total, offset)
+
+"""
+CACHE
+"""
+class CacheEntry:
+    """
+    A cached API response
+
+    :param content: The raw bytes of the response
+    :param expires: When the entry goes stale, in time.monotonic() seconds (None if it never does)
+    :param etag: The ETag header of the response, if there was one
+    :param last_modified: The Last-Modified header of the response, if there was one
+    """
+    __slots__ = ("content", "expires", "etag", "last_modified")
+
+    def __init__(self, content: bytes, expires, etag=None, last_modified=None):
+        self.content = content
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self) -> bool:
+        return self.expires is None or time.monotonic() < self.expires
+
+    def validators(self) -> dict:
+        """
+        :return: The headers to ask the API if the response has changed since it was cached
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    An in-memory LRU cache for API responses, with a time to live per endpoint.
+    Stale responses are kept so they can be revalidated with ETag/Last-Modified when the API supports it
+
+    :param ttls: List of (pattern, seconds) tuples, the first pattern that matches the path of a link decides how long
+                 it's cached. Patterns use * wildcards, seconds can be None to never expire or 0 to never cache
+    :param default_ttl: Seconds to cache links that don't match any pattern
+    :param max_entries: The most responses kept at the same time
+    :param max_bytes: The most bytes of responses kept at the same time
+    """
+    DEFAULT_TTLS = [
+        ("/btd6/races/*/metadata", None),
+        ("/btd6/bosses/*/metadata/*", None),
+        ("/btd6/challenges/challenge/*", None),
+        ("/btd6/races/*/leaderboard*", 15),
+        ("/btd6/bosses/*/leaderboard/*", 15),
+        ("/btd6/races", 60),
+        ("/btd6/bosses", 60),
+        ("/btd6/challenges/filter/*", 60),
+        ("/btd6/users/*", 300),
+    ]
+
+    def __init__(self, ttls: list = None, default_ttl: float = 30, max_entries: int = 1024,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.ttls = list(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get_ttl(self, link: str):
+        """
+        :param link: The link to the API
+        :return: Seconds the response of the link should be cached for, None if it never expires
+        """
+        parts = urlsplit(link)
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        for pattern, ttl in self.ttls:
+            if fnmatch.fnmatchcase(path, pattern):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, link: str) -> CacheEntry | None:
+        """
+        Looks for a cached response, a fresh one counts as a hit, a stale or missing one as a miss
+        :param link: The link to the API
+        :return: The CacheEntry, fresh or stale, or None if there isn't one
+        """
+        with self._lock:
+            entry = self.entries.get(link)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(link)
+            if entry.is_fresh():
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def store(self, link: str, content: bytes, headers) -> None:
+        """
+        Caches a successful response
+        :param link: The link to the API
+        :param content: The raw bytes of the response
+        :param headers: The headers of the response
+        """
+        ttl = self.get_ttl(link)
+        if ttl == 0 or len(content) > self.max_bytes:
+            return
+        entry = CacheEntry(content, None if ttl is None else time.monotonic() + ttl,
+                           headers.get("ETag"), headers.get("Last-Modified"))
+        with self._lock:
+            old = self.entries.pop(link, None)
+            if old is not None:
+                self.size -= len(old.content)
+            self.entries[link] = entry
+            self.size += len(content)
+            self._evict()
+
+    def revalidate(self, link: str, entry: CacheEntry, headers) -> bytes:
+        """
+        Marks a stale response as fresh again after the API said it hasn't changed (304 Not Modified)
+        :param link: The link to the API
+        :param entry: The stale CacheEntry that was revalidated
+        :param headers: The headers of the 304 response
+        :return: The cached bytes
+        """
+        ttl = self.get_ttl(link)
+        with self._lock:
+            self.revalidations += 1
+            entry.expires = None if ttl is None else time.monotonic() + ttl
+            entry.etag = headers.get("ETag", entry.etag)
+            entry.last_modified = headers.get("Last-Modified", entry.last_modified)
+            if self.entries.get(link) is not entry:
+                old = self.entries.pop(link, None)
+                if old is not None:
+                    self.size -= len(old.content)
+                self.entries[link] = entry
+                self.size += len(entry.content)
+                self._evict()
+        return entry.content
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            _, entry = self.entries.popitem(last=False)
+            self.size -= len(entry.content)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes every cached response, the counters are kept
+        """
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """
+        :return: Dictionary with the number of hits, misses, revalidations, evictions, entries and bytes in the cache
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+            }
+
+class DocumentStore:
+    """
+    A single SQLite file that keeps documents that never change, like challenge documents and race/boss metadata,
+    so they don't have to be downloaded again after a restart. The documents are stored as compressed JSON.
+    Several threads and processes on the same machine can use the same file at the same time
+
+    :param path: Path to the SQLite file, it's created if it doesn't exist
+    :param max_bytes: The most compressed bytes kept, the least recently used documents are removed first
+    :param timeout: Seconds to wait when another process is writing to the file
+    """
+    TOUCH_INTERVAL = 60 # Only update when a document was last used once a minute, so reading doesn't always write
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, timeout: float = 30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS documents_accessed ON documents (accessed)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads, so every thread gets its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> bytes | None:
+        """
+        :param key: The key of the document, for example 'challenge:ZFMOOKU'
+        :return: The JSON of the document, or None if it isn't stored
+        """
+        connection = self._connection()
+        row = connection.execute("SELECT data, accessed FROM documents WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if now - row[1] > self.TOUCH_INTERVAL:
+            connection.execute("UPDATE documents SET accessed = ? WHERE key = ?", (now, key))
+        return zlib.decompress(row[0])
+
+    def put(self, key: str, content: bytes) -> None:
+        """
+        Stores a document, and removes the least recently used ones if the file gets too big
+        :param key: The key of the document, for example 'challenge:ZFMOOKU'
+        :param content: The JSON of the document
+        """
+        data = zlib.compress(content)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE") # Lock the file for writing, so other processes wait for us
+        try:
+            connection.execute("INSERT OR REPLACE INTO documents (key, data, size, accessed) VALUES (?, ?, ?, ?)",
+                               (key, data, len(data), time.time()))
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+            if total > self.max_bytes:
+                evict = []
+                for old_key, size in connection.execute("SELECT key, size FROM documents ORDER BY accessed").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((old_key,))
+                    total -= size
+                connection.executemany("DELETE FROM documents WHERE key = ?", evict)
+                logging.debug(f"Evicted {len(evict)} documents from the document store")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM documents WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM documents")
+
+    def size(self) -> int:
+        """
+        :return: The compressed bytes of every stored document
+        """
+        return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Closes the connection of the current thread
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def __contains__(self, key):
+        return self._connection().execute("SELECT 1 FROM documents WHERE key = ?", (key,)).fetchone() is not None
+
+"""
+RATE LIMITING
+"""
+PRIORITY_LIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (429, 503)
+
+class RequestScheduler:
+    """
+    Decides when requests can be sent to the API with a token bucket. When the API says it's getting too many requests
+    (429/503 or Retry-After) the rate is halved, and it slowly climbs back to the highest rate while requests succeed.
+    Requests with a lower priority number are sent first, so PRIORITY_LIVE goes ahead of PRIORITY_BACKGROUND
+
+    :param rate: The most requests per second
+    :param burst: How many requests can be sent right away after being idle
+    :param min_rate: The rate never goes lower than this when the API is throttling
+    :param max_retries: How many times one request is retried
+    :param retry_budget: The most seconds one request can spend retrying
+    :param backoff_base: Seconds to wait before the first retry, doubled for every retry (with random jitter)
+    :param backoff_max: The most seconds to wait between two retries
+    """
+
+    def __init__(self, rate: float = 20.0, burst: int = 20, min_rate: float = 0.5, max_retries: int = 4,
+                 retry_budget: float = 30.0, backoff_base: float = 0.5, backoff_max: float = 10.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.throttles = 0
+        self.retries = 0
+
+        self._condition = threading.Condition()
+        self._waiting = [] # heap of (priority, ticket)
+        self._tickets = itertools.count()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """
+        Waits until a request can be sent
+        :param priority: PRIORITY_LIVE, PRIORITY_NORMAL or PRIORITY_BACKGROUND
+        """
+        with self._condition:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    first = self._waiting[0] == ticket
+                    shared_wait = 0
+                    if first and now >= self.paused_until and self.tokens >= 1:
+                        shared_wait = self._take_shared()
+                        if shared_wait <= 0:
+                            self.tokens -= 1
+                            heapq.heappop(self._waiting)
+                            self._condition.notify_all()
+                            return
+
+                    if not first:
+                        wait = None # wake up when the ones in front of us are done
+                    elif now < self.paused_until:
+                        wait = self.paused_until - now
+                    elif shared_wait > 0: # still first in line, so the shared token goes to the highest priority
+                        wait = shared_wait
+                    else:
+                        wait = (1 - self.tokens) / self.rate
+                    self._condition.wait(wait)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                raise
+
+    def reserve(self) -> float:
+        """
+        Takes a token without waiting, used by AsyncBTD6API. Doesn't look at priorities
+        :return: 0 if a request can be sent now, or else the seconds to wait before trying again
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.tokens >= 1:
+                shared_wait = self._take_shared()
+                if shared_wait > 0:
+                    return shared_wait
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def _take_shared(self) -> float:
+        """
+        Takes a token from a limit shared with other schedulers, see SharedRequestScheduler. Only called when a request
+        could be sent otherwise
+        :return: 0 if the token was taken, or else the seconds to wait before trying again
+        """
+        return 0
+
+    def on_success(self) -> None:
+        """
+        Tells the scheduler a request went through, so the rate can climb back up
+        """
+        if self.rate < self.max_rate:
+            with self._condition:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_throttle(self, retry_after: float = None) -> None:
+        """
+        Tells the scheduler the API is getting too many requests, so it slows down
+        :param retry_after: Seconds the API asked us to wait, if it did
+        """
+        with self._condition:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            logging.warning(f"API is throttling, slowing down to {self.rate:.2f} requests per second")
+
+    def backoff(self, attempt: int) -> float:
+        """
+        :param attempt: Which retry this is, starting at 1
+        :return: Seconds to wait before the retry, random between 0 and the exponential backoff
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def parse_retry_after(value: str | None) -> float | None:
+        """
+        :param value: The Retry-After header, either seconds or a date
+        :return: Seconds to wait, or None if there wasn't a valid header
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+class SharedRateBudget:
+    """
+    A token bucket that several processes share, so together they stay under one rate. It works like
+    RequestScheduler: when the API throttles one process, all of them slow down.
+    Make it in the parent process and give it to the processes when they're started (see SharedRequestScheduler)
+
+    :param rate: The most requests per second, for all processes together
+    :param burst: How many requests can be sent right away after being idle
+    :param min_rate: The rate never goes lower than this when the API is throttling
+    :param context: The multiprocessing context the processes are started with, the default one if None
+    """
+    TOKENS, UPDATED, RATE, PAUSED_UNTIL = range(4)
+
+    def __init__(self, rate: float = 20.0, burst: int = 20, min_rate: float = 0.5, context=None):
+        self.max_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        # time.monotonic() is the same clock in every process on the machine
+        self._state = (context or multiprocessing).Array("d", [float(burst), time.monotonic(), rate, 0.0])
+
+    def take(self) -> float:
+        """
+        Takes a token without waiting
+        :return: 0 if a request can be sent now, or else the seconds to wait before trying again
+        """
+        with self._state.get_lock():
+            state = self._state
+            now = time.monotonic()
+            state[self.TOKENS] = min(self.burst, state[self.TOKENS] + (now - state[self.UPDATED]) * state[self.RATE])
+            state[self.UPDATED] = now
+            if now < state[self.PAUSED_UNTIL]:
+                return state[self.PAUSED_UNTIL] - now
+            if state[self.TOKENS] >= 1:
+                state[self.TOKENS] -= 1
+                return 0
+            return (1 - state[self.TOKENS]) / state[self.RATE]
+
+    def on_success(self) -> None:
+        if self._state[self.RATE] < self.max_rate:
+            with self._state.get_lock():
+                self._state[self.RATE] = min(self.max_rate, self._state[self.RATE] + self.max_rate / 20)
+
+    def on_throttle(self, retry_after: float = None) -> None:
+        with self._state.get_lock():
+            state = self._state
+            state[self.RATE] = max(self.min_rate, state[self.RATE] / 2)
+            state[self.TOKENS] = min(state[self.TOKENS], 0)
+            if retry_after:
+                state[self.PAUSED_UNTIL] = max(state[self.PAUSED_UNTIL], time.monotonic() + retry_after)
+
+    @property
+    def rate(self) -> float:
+        """
+        :return: The current rate for all processes together
+        """
+        return self._state[self.RATE]
+
+
+class SharedRequestScheduler(RequestScheduler):
+    """
+    A RequestScheduler that also takes a token from a SharedRateBudget for every request, so clients in different
+    processes stay under one rate together. The priorities and retries work like they do in RequestScheduler,
+    only the request that's first in line takes a shared token, so a PRIORITY_LIVE request still goes first
+
+    :param budget: The SharedRateBudget of all the processes
+    :param kwargs: Passed to RequestScheduler, the rate and burst are the ones of the budget
+    """
+
+    def __init__(self, budget: SharedRateBudget, **kwargs):
+        super().__init__(rate=budget.max_rate, burst=budget.burst, min_rate=budget.min_rate, **kwargs)
+        self.budget = budget
+
+    def _take_shared(self) -> float:
+        return self.budget.take()
+
+    def on_success(self) -> None:
+        super().on_success()
+        self.budget.on_success()
+
+    def on_throttle(self, retry_after: float = None) -> None:
+        super().on_throttle(retry_after)
+        self.budget.on_throttle(retry_after)
+
+"""
+INSTRUMENTATION
+"""
+ENDPOINT_TEMPLATES = [ # the endpoints of the API, so links with different ids are counted together
+    (re.compile(r"/btd6/races"), "/btd6/races"),
+    (re.compile(r"/btd6/races/[^/]+/leaderboard"), "/btd6/races/{id}/leaderboard"),
+    (re.compile(r"/btd6/races/[^/]+/metadata"), "/btd6/races/{id}/metadata"),
+    (re.compile(r"/btd6/bosses"), "/btd6/bosses"),
+    (re.compile(r"/btd6/bosses/[^/]+/leaderboard/[^/]+/[^/]+"), "/btd6/bosses/{id}/leaderboard/{type}/{teamSize}"),
+    (re.compile(r"/btd6/bosses/[^/]+/metadata/[^/]+"), "/btd6/bosses/{id}/metadata/{difficulty}"),
+    (re.compile(r"/btd6/users/[^/]+"), "/btd6/users/{id}"),
+    (re.compile(r"/btd6/challenges/filter/[^/]+"), "/btd6/challenges/filter/{filter}"),
+    (re.compile(r"/btd6/challenges/challenge/[^/]+"), "/btd6/challenges/challenge/{id}"),
+    (re.compile(r"/btd6/ct"), "/btd6/ct"),
+    (re.compile(r"/btd6/ct/[^/]+/tiles"), "/btd6/ct/{id}/tiles"),
+    (re.compile(r"/btd6/ct/[^/]+/tiles/[^/]+"), "/btd6/ct/{id}/tiles/{tile}"), # unconfirmed, see BTD6CTTile
+    (re.compile(r"/btd6/ct/[^/]+/leaderboard/[^/]+"), "/btd6/ct/{id}/leaderboard/{type}"),
+    (re.compile(r"/btd6/guild/[^/]+"), "/btd6/guild/{id}"),
+]
+
+@lru_cache(maxsize=4096)
+def _path_template(path: str) -> str:
+    for pattern, template in ENDPOINT_TEMPLATES:
+        if pattern.fullmatch(path):
+            return template
+    return "other"
+
+def endpoint_template(link: str) -> str:
+    """
+    :param link: A link to the API, whole or just the suffix
+    :return: The endpoint of the link, for example '/btd6/races/{id}/leaderboard', or 'other' if it isn't known
+    """
+    return _path_template(urlsplit(link).path.rstrip("/") or "/")
+
+
+class Instrumentation:
+    """
+    Gets told about everything the client does. This one does nothing, so it costs next to nothing.
+    Make a subclass to send it wherever you want (tracing, logs, ...), or use Metrics.
+    The functions are called from the threads that do the requests, so they have to be thread-safe
+    """
+
+    def on_request(self, link: str, status: int, seconds: float, size: int) -> None:
+        """
+        A request was sent, retries are sent again so they're counted too
+        :param link: The whole link
+        :param status: The HTTP status of the response, 0 if the connection failed
+        :param seconds: How long it took
+        :param size: How many bytes were received
+        """
+
+    def on_decode(self, link: str, seconds: float) -> None:
+        """
+        A response was decoded from JSON
+        """
+
+    def on_build(self, link: str, seconds: float) -> None:
+        """
+        Objects were made from a response
+        """
+
+    def on_cache_hit(self, link: str, kind: str) -> None:
+        """
+        A response didn't have to be downloaded
+        :param kind: 'fresh' for the response cache, 'revalidated' if the API said it didn't change,
+                     or 'document' for the document store
+        """
+
+    def on_retry(self, link: str, error: Exception) -> None:
+        """
+        A request failed and will be sent again
+        """
+
+    def on_error(self, link: str, error: Exception) -> None:
+        """
+        A request failed, like InvalidRaceID, NoScoresAvailable or RequestFailed
+        """
+
+    def build(self, link: str):
+        """
+        :return: A context manager that times making objects from a response, see on_build
+        """
+        return _NO_TIMER
+
+
+class _BuildTimer:
+    __slots__ = ("instrumentation", "link", "started")
+
+    def __init__(self, instrumentation: Instrumentation, link: str):
+        self.instrumentation = instrumentation
+        self.link = link
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.instrumentation.on_build(self.link, time.perf_counter() - self.started)
+
+
+_NO_TIMER = nullcontext()
+
+
+class Metrics(Instrumentation):
+    """
+    Counts what the client does per endpoint, and exports it in the text format of Prometheus.
+    Use summary() to see which endpoints take up the most time
+
+    :param buckets: The upper bounds in seconds of the latency histogram
+    :param namespace: The prefix of the names of the metrics
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: tuple = BUCKETS, namespace: str = "btd6api"):
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Sets everything back to 0
+        """
+        with self._lock:
+            self.requests = {} # (endpoint, status) -> count
+            self.latency = {} # endpoint -> [count per bucket, sum, count]
+            self.bytes = {} # endpoint -> bytes
+            self.decode = {} # endpoint -> [seconds, count]
+            self.building = {} # endpoint -> [seconds, count]
+            self.cache_hits = {} # (endpoint, kind) -> count
+            self.retries = {} # endpoint -> count
+            self.errors = {} # (endpoint, error) -> count
+
+    def build(self, link: str):
+        return _BuildTimer(self, link)
+
+    def on_request(self, link: str, status: int, seconds: float, size: int) -> None:
+        endpoint = endpoint_template(link)
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.requests[endpoint, status] = self.requests.get((endpoint, status), 0) + 1
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+
+    def _add_time(self, table: dict, link: str, seconds: float) -> None:
+        endpoint = endpoint_template(link)
+        with self._lock:
+            total = table.get(endpoint)
+            if total is None:
+                total = table[endpoint] = [0.0, 0]
+            total[0] += seconds
+            total[1] += 1
+
+    def on_decode(self, link: str, seconds: float) -> None:
+        self._add_time(self.decode, link, seconds)
+
+    def on_build(self, link: str, seconds: float) -> None:
+        self._add_time(self.building, link, seconds)
+
+    def _count(self, table: dict, key) -> None:
+        with self._lock:
+            table[key] = table.get(key, 0) + 1
+
+    def on_cache_hit(self, link: str, kind: str) -> None:
+        self._count(self.cache_hits, (endpoint_template(link), kind))
+
+    def on_retry(self, link: str, error: Exception) -> None:
+        self._count(self.retries, endpoint_template(link))
+
+    def on_error(self, link: str, error: Exception) -> None:
+        self._count(self.errors, (endpoint_template(link), type(error).__name__))
+
+    def summary(self) -> list:
+        """
+        :return: A dict for every endpoint with what was counted, the endpoints that took the most time first
+        """
+        with self._lock:
+            endpoints = set(self.latency) | set(self.decode) | set(self.building) | set(self.retries)
+            endpoints |= {endpoint for endpoint, _ in self.cache_hits} | {endpoint for endpoint, _ in self.errors}
+            rows = []
+            for endpoint in endpoints:
+                _, seconds, count = self.latency.get(endpoint, (None, 0.0, 0))
+                rows.append({
+                    "endpoint": endpoint,
+                    "requests": count,
+                    "seconds": seconds,
+                    "bytes": self.bytes.get(endpoint, 0),
+                    "decode_seconds": self.decode.get(endpoint, (0.0, 0))[0],
+                    "build_seconds": self.building.get(endpoint, (0.0, 0))[0],
+                    "cache_hits": sum(n for (e, _), n in self.cache_hits.items() if e == endpoint),
+                    "retries": self.retries.get(endpoint, 0),
+                    "errors": sum(n for (e, _), n in self.errors.items() if e == endpoint),
+                })
+        rows.sort(key=lambda row: row["seconds"] + row["decode_seconds"] + row["build_seconds"], reverse=True)
+        return rows
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+                   for value in labels.values())
+        return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+    def export(self) -> str:
+        """
+        :return: Everything that was counted, in the text format of Prometheus
+        """
+        name = self.namespace
+        lines = []
+
+        def header(metric, kind, description):
+            lines.append(f"# HELP {name}_{metric} {description}")
+            lines.append(f"# TYPE {name}_{metric} {kind}")
+
+        with self._lock:
+            header("requests_total", "counter", "Requests sent to the API, retries included")
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f"{name}_requests_total{self._labels(endpoint=endpoint, status=status)} {count}")
+
+            header("request_duration_seconds", "histogram", "How long requests to the API took")
+            for endpoint, (counts, seconds, count) in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_request_duration_seconds_bucket{self._labels(endpoint=endpoint, le=le)} "
+                                 f"{cumulative}")
+                lines.append(f"{name}_request_duration_seconds_sum{self._labels(endpoint=endpoint)} {seconds}")
+                lines.append(f"{name}_request_duration_seconds_count{self._labels(endpoint=endpoint)} {count}")
+
+            header("response_bytes_total", "counter", "Bytes received from the API")
+            for endpoint, size in sorted(self.bytes.items()):
+                lines.append(f"{name}_response_bytes_total{self._labels(endpoint=endpoint)} {size}")
+
+            for metric, table, description in (("decode_seconds", self.decode, "Time spent decoding JSON"),
+                                               ("build_seconds", self.building, "Time spent making objects")):
+                header(metric, "summary", description)
+                for endpoint, (seconds, count) in sorted(table.items()):
+                    lines.append(f"{name}_{metric}_sum{self._labels(endpoint=endpoint)} {seconds}")
+                    lines.append(f"{name}_{metric}_count{self._labels(endpoint=endpoint)} {count}")
+
+            header("cache_hits_total", "counter", "Responses that didn't have to be downloaded")
+            for (endpoint, kind), count in sorted(self.cache_hits.items()):
+                lines.append(f"{name}_cache_hits_total{self._labels(endpoint=endpoint, kind=kind)} {count}")
+
+            header("retries_total", "counter", "Requests that were sent again")
+            for endpoint, count in sorted(self.retries.items()):
+                lines.append(f"{name}_retries_total{self._labels(endpoint=endpoint)} {count}")
+
+            header("errors_total", "counter", "Failed calls by exception")
+            for (endpoint, error), count in sorted(self.errors.items()):
+                lines.append(f"{name}_errors_total{self._labels(endpoint=endpoint, error=error)} {count}")
+        return "\n".join(lines) + "\n"
+
+"""
+HEDGING AND CIRCUIT BREAKING
+"""
+class HedgePolicy:
+    """
+    Decides when a request is slow enough to send it a second time (a hedge). Whichever response comes back first is
+    used, so one stuck request doesn't hold up the caller. The delay is a percentile of the recent latency of the
+    endpoint, so only the slowest requests get a hedge. A hedge is only sent when the rate limit has room for it.
+    Every request to the API is a GET, so sending one twice doesn't hurt
+
+    :param percentile: Send the hedge when a request takes longer than this percentile of the recent ones
+    :param min_delay: The shortest wait in seconds before a hedge is sent
+    :param max_delay: The longest wait in seconds before a hedge is sent, also used when there are too few latencies
+    :param window: How many recent latencies are kept per endpoint
+    :param min_samples: How many latencies are needed before the percentile is used
+    """
+
+    def __init__(self, percentile: float = 95.0, min_delay: float = 0.05, max_delay: float = 2.0, window: int = 200,
+                 min_samples: int = 20):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.hedges = 0 # how many hedges were sent
+        self.wins = 0 # how many hedges came back before the first request
+        self._latencies = {} # endpoint -> deque of seconds
+        self._lock = threading.Lock()
+
+    def record(self, link: str, seconds: float) -> None:
+        """
+        :param link: The link of a request that went through
+        :param seconds: How long it took
+        """
+        endpoint = endpoint_template(link)
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def delay(self, link: str) -> float:
+        """
+        :param link: The link of the request
+        :return: Seconds to wait for the response before sending a hedge
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint_template(link))
+            if latencies is None or len(latencies) < self.min_samples:
+                return self.max_delay
+            ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return min(self.max_delay, max(self.min_delay, ordered[index]))
+
+    def on_hedge(self, won: bool) -> None:
+        """
+        Counts a hedge
+        :param won: If the hedge came back before the first request
+        """
+        with self._lock:
+            self.hedges += 1
+            self.wins += won
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened")
+
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened = 0.0
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an endpoint that keeps failing, so callers don't all wait for retries and timeouts
+    while the API is down. After failure_threshold failed requests in a row the circuit opens: requests to the endpoint
+    fail right away with CircuitOpen, or get the last cached response if there is one. After reset_timeout seconds one
+    request is let through to test the API, if it works the circuit closes again.
+    Only failed requests (RequestFailed) count, errors from the API like InvalidRaceID mean the API is working
+
+    :param failure_threshold: How many requests in a row have to fail to open the circuit
+    :param reset_timeout: Seconds before a request is let through to test the API again
+    :param serve_stale: Give the last cached response, even if it's expired, instead of failing
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, serve_stale: bool = True):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.serve_stale = serve_stale
+        self.trips = 0 # how many times a circuit opened
+        self._circuits = {} # endpoint -> _Circuit
+        self._lock = threading.Lock()
+
+    def state(self, link: str) -> str:
+        """
+        :param link: A link to the API, or an endpoint like '/btd6/races/{id}/leaderboard'
+        :return: CLOSED, OPEN or HALF_OPEN
+        """
+        circuit = self._circuits.get(endpoint_template(link))
+        return circuit.state if circuit is not None else self.CLOSED
+
+    def allow(self, link: str) -> bool:
+        """
+        :param link: The link of a request
+        :return: If the request can be sent
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint_template(link))
+            if circuit is None or circuit.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - circuit.opened < self.reset_timeout:
+                return False
+            # Let one request through to test the API, another one after reset_timeout if it doesn't come back
+            circuit.state = self.HALF_OPEN
+            circuit.opened = now
+            return True
+
+    def on_success(self, link: str) -> None:
+        """
+        Tells the breaker a request to the link went through
+        """
+        endpoint = endpoint_template(link)
+        circuit = self._circuits.get(endpoint)
+        if circuit is not None and (circuit.failures or circuit.state != self.CLOSED):
+            with self._lock:
+                if circuit.state != self.CLOSED:
+                    logging.warning(f"Circuit for '{endpoint}' closed, the API is back")
+                circuit.state = self.CLOSED
+                circuit.failures = 0
+
+    def on_failure(self, link: str) -> None:
+        """
+        Tells the breaker a request to the link failed
+        """
+        endpoint = endpoint_template(link)
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                circuit = self._circuits[endpoint] = _Circuit()
+            circuit.failures += 1
+            if circuit.state == self.HALF_OPEN or (circuit.state == self.CLOSED
+                                                   and circuit.failures >= self.failure_threshold):
+                circuit.state = self.OPEN
+                circuit.opened = time.monotonic()
+                self.trips += 1
+                logging.warning(f"Circuit for '{endpoint}' opened after {circuit.failures} failed requests")
+
+"""
+REQUEST COALESCING
+"""
+def copy_json(value):
+    """
+    :param value: Decoded JSON
+    :return: A deep copy of it, only dicts and lists are copied, everything else can't be changed
+    """
+    if type(value) is dict:
+        return {key: copy_json(item) for key, item in value.items()}
+    if type(value) is list:
+        return [copy_json(item) for item in value]
+    return value
+
+
+class SingleFlight:
+    """
+    Makes calls with the same key that happen at the same time share one call: the first thread does the work,
+    the others wait for it and get the same result (or the same exception).
+    When the result was shared, every caller gets its own copy of it, so one can't change what the others get
+
+    :param copy: Makes a copy of a result, copy_json by default
+    """
+
+    def __init__(self, copy=copy_json):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.copy = copy
+        self.shared = 0 # How many calls got the result of another call
+
+    def do(self, key, function, *args):
+        """
+        Calls the function, unless another thread is already calling it with the same key
+        :param key: What identifies the call, for example the link
+        :param function: The function to call
+        :param args: The arguments for the function
+        :return: What the function returned
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [Future(), 0] # the result, and how many others wait for it
+            else:
+                call[1] += 1
+                self.shared += 1
+        if not leader:
+            return self.copy(call[0].result())
+
+        try:
+            result = function(*args)
+        except BaseException as err:
+            with self._lock:
+                del self._calls[key]
+            call[0].set_exception(err)
+            raise
+        with self._lock:
+            del self._calls[key] # nobody can join after this, so call[1] doesn't change anymore
+        call[0].set_result(result)
+        return self.copy(result) if call[1] else result
+
+    def in_flight(self) -> int:
+        """
+        :return: How many calls are running right now
+        """
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    The asyncio version of SingleFlight. The call runs as a task, so if one of the callers is cancelled
+    the others still get the result
+
+    :param copy: Makes a copy of a result, copy_json by default
+    """
+
+    def __init__(self, copy=copy_json):
+        self._tasks = {}
+        self.copy = copy
+        self.shared = 0
+
+    async def do(self, key, function, *args):
+        """
+        Awaits the coroutine function, unless another coroutine is already awaiting it with the same key
+        :param key: What identifies the call, for example the link
+        :param function: The coroutine function to call
+        :param args: The arguments for the function
+        :return: What the function returned
+        """
+        call = self._tasks.get(key)
+        if call is None:
+            async def run():
+                try:
+                    return await function(*args)
+                finally:
+                    del self._tasks[key] # nobody can join after this, so call[1] doesn't change anymore
+
+            call = self._tasks[key] = [None, 0] # the task, and how many others wait for it
+            call[0] = asyncio.ensure_future(run())
+        else:
+            call[1] += 1
+            self.shared += 1
+        result = await asyncio.shield(call[0])
+        return self.copy(result) if call[1] else result
+
+    def in_flight(self) -> int:
+        """
+        :return: How many calls are running right now
+        """
+        return len(self._tasks)
+
+"""
+API
+"""
+DEFAULT_BASE_URL = "https://data.ninjakiwi.com"
+HEDGE_MAX_THREADS = 1024 # the most requests and hedges a hedging BTD6API has in flight
+
+class SingletonMeta(type):
+    _instances = {}
+    _lock = threading.RLock()
+    def __call__(cls, *args, **kwargs):
+        instance = SingletonMeta._instances.get(cls)
+        if instance is None:
+            with SingletonMeta._lock: # so two threads creating the client at the same time get the same one
+                instance = SingletonMeta._instances.get(cls)
+                if instance is None:
+                    instance = SingletonMeta._instances[cls] = super().__call__(*args, **kwargs)
+        return instance
+
+class BTD6API(metaclass=SingletonMeta):
+    """
+    The client for the BTD6 API. Every request goes through one pooled session, so connections to the API are kept
+    alive and reused instead of doing a new TLS handshake for every call.
+    Keep in mind that the client is a singleton, so the options only apply the first time it's created
+
+    :param api_token: Your API token
+    :param pool_size: How many connections are kept alive to the API at the same time
+    :param connect_timeout: Seconds to wait for a connection to the API
+    :param read_timeout: Seconds to wait for the API to send a response
+    :param cache: A ResponseCache to use, True for one with the default settings or False to not cache responses
+    :param document_store: A DocumentStore, or the path to one, to keep challenge and event metadata on disk
+    :param scheduler: A RequestScheduler for rate limiting and retries, True for one with the default settings
+                      or False to send requests right away and never retry
+    :param coalesce: If threads asking for the same link at the same time should share one request
+    :param base_url: Where the API is, change it to use a stand-in like benchmarks/replay_server.py.
+                     Links to anywhere else are refused
+    :param session: A requests.Session (or anything with the same get function) to send the requests with,
+                    instead of the pooled session of create_session
+    :param instrumentation: An Instrumentation that gets told about every request, for example Metrics
+    :param hedge: A HedgePolicy to send slow requests a second time, True for one with the default settings
+    :param breaker: A CircuitBreaker to stop sending requests to endpoints that keep failing, True for one with the
+                    default settings
+    """
+
+    def __init__(self, api_token: str = None, pool_size: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, cache: ResponseCache | bool = True,
+                 document_store: DocumentStore | str = None, scheduler: RequestScheduler | bool = True,
+                 coalesce: bool = True, base_url: str = DEFAULT_BASE_URL, session=None,
+                 instrumentation: Instrumentation = None, hedge: HedgePolicy | bool = False,
+                 breaker: CircuitBreaker | bool = False):
+        self.url_prefix = base_url.rstrip("/")
+        self.api_token = api_token
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = session if session is not None else self.create_session(pool_size)
+        self.cache = ResponseCache() if cache is True else (cache or None)
+        self.document_store = DocumentStore(document_store) if isinstance(document_store, str) else document_store
+        self.scheduler = RequestScheduler() if scheduler is True else (scheduler or None)
+        self.in_flight = SingleFlight() if coalesce else None
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.hedge = HedgePolicy() if hedge is True else (hedge or None)
+        self.breaker = CircuitBreaker() if breaker is True else (breaker or None)
+        # Threads are only started when none are free, so there are as many as requests in flight, and a request
+        # never waits in the queue of the executor
+        self._hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_THREADS, thread_name_prefix="btd6-hedge") \
+            if self.hedge is not None else None
+        self._priority = threading.local()
+
+    @staticmethod
+    def create_session(pool_size: int = 10) -> requests.Session:
+        """
+        Creates a session that keeps connections alive and asks for compressed responses
+        :param pool_size: How many connections are kept alive per host
+        :return: A requests.Session ready to use with the API
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def close(self):
+        """
+        Closes all the connections kept alive by the client
+        """
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+    @contextmanager
+    def priority(self, priority: int):
+        """
+        Sends every request made inside the with block (in this thread) with a priority
+        :param priority: PRIORITY_LIVE, PRIORITY_NORMAL or PRIORITY_BACKGROUND
+        """
+        previous = self.get_priority()
+        self._priority.value = priority
+        try:
+            yield
+        finally:
+            self._priority.value = previous
+
+    def get_priority(self) -> int:
+        """
+        :return: The priority requests from this thread are sent with
+        """
+        return getattr(self._priority, "value", PRIORITY_NORMAL)
+
+    def _send(self, link: str, headers: dict = None, priority: int = None) -> requests.Response:
+        """
+        Sends a request when the scheduler allows it, and retries it when the API is busy or the connection fails
+        :param link: The whole link to the API
+        :param headers: Extra headers for the request
+        :param priority: The priority of the request, the priority of the thread if None
+        :return: The response, it can still be an error response from the API
+        """
+        scheduler = self.scheduler
+        priority = self.get_priority() if priority is None else priority
+        deadline = time.monotonic() + (scheduler.retry_budget if scheduler else 0)
+        attempt = 0
+
+        while True:
+            if scheduler is not None:
+                scheduler.acquire(priority)
+
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = self._get(link, headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                self.instrumentation.on_request(link, 0, time.perf_counter() - started, 0)
+                error = err
+            else:
+                self.instrumentation.on_request(link, response.status_code, time.perf_counter() - started,
+                                                len(response.content))
+                if response.status_code not in RETRY_STATUSES:
+                    if scheduler is not None:
+                        scheduler.on_success()
+                    return response
+
+                error = RequestFailed(f"The API responded with HTTP {response.status_code}")
+                if response.status_code in THROTTLE_STATUSES:
+                    retry_after = RequestScheduler.parse_retry_after(response.headers.get("Retry-After"))
+                    if scheduler is not None:
+                        scheduler.on_throttle(retry_after)
+
+            if scheduler is None or attempt >= scheduler.max_retries:
+                raise RequestFailed(f"Request to '{link}' failed: {error}") from error
+            attempt += 1
+            delay = max(retry_after or 0, scheduler.backoff(attempt))
+            if time.monotonic() + delay > deadline:
+                raise RequestFailed(f"Request to '{link}' failed, no retry budget left: {error}") from error
+
+            scheduler.retries += 1
+            self.instrumentation.on_retry(link, error)
+            logging.warning(f"Request to '{link}' failed ({error}), retry {attempt} in {delay:.2f} seconds")
+            time.sleep(delay)
+
+    def _get(self, link: str, headers: dict = None) -> requests.Response:
+        """
+        Sends one request, and a hedge if the hedge policy says it's taking too long
+        :param link: The whole link to the API
+        :param headers: Extra headers for the request
+        :return: The first response that came back
+        """
+        hedge = self.hedge
+        if hedge is None:
+            return self.session.get(link, headers=headers, timeout=self.timeout)
+
+        sent = threading.Event()
+        started = []
+
+        def send():
+            started.append(time.perf_counter())
+            sent.set()
+            return self.session.get(link, headers=headers, timeout=self.timeout)
+
+        first = self._hedge_executor.submit(send)
+        sent.wait() # the hedge delay counts from when the request is really sent
+        done, _ = wait((first,), timeout=hedge.delay(link))
+        if done or (self.scheduler is not None and self.scheduler.reserve() > 0): # no room for a hedge
+            response = first.result()
+        else:
+            second = self._hedge_executor.submit(self.session.get, link, headers=headers, timeout=self.timeout)
+            winner = None
+            for future in as_completed((first, second)):
+                if future.exception() is None and future.result().status_code not in RETRY_STATUSES:
+                    winner = future # if one fails, the other one can still work
+                    break
+            if winner is None: # both failed, a response is better than an exception for the retries
+                winner = second if first.exception() is not None and second.exception() is None else first
+            hedge.on_hedge(winner is second)
+            response = winner.result() # the other request finishes in the background and is thrown away
+        if response.status_code not in RETRY_STATUSES: # errors would make the hedge delay wrong
+            hedge.record(link, time.perf_counter() - started[0])
+        return response
+
+    def get_response(self, link: str, raw=False, priority: int = None, lazy=False) -> dict | None:
+        """
+        Tries to access the API
+        :param link: The link to the API
+        :param raw: If you input the whole link, or just the suffix
+        :param priority: PRIORITY_LIVE, PRIORITY_NORMAL or PRIORITY_BACKGROUND, the priority of the thread if None
+        :param lazy: Leave the body as raw JSON, for the views (see decode_envelope)
+        :return: A JSON object of the debugrmation
+        """
+        logging.debug("Get response from API")
+        l: str = link if raw else f"{self.url_prefix}{link}"
+        if not f"{l}/".startswith(f"{self.url_prefix}/"): # so https://data.ninjakiwi.com.example.com doesn't pass
+            raise InvalidLinkError("You're trying to access another website/api!")
+
+        entry = self.cache.lookup(l) if self.cache is not None else None
+        if entry is not None and entry.is_fresh():
+            self.instrumentation.on_cache_hit(l, "fresh")
+            return self._decode(l, entry.content, lazy)
+
+        try:
+            if self.in_flight is not None:
+                # Only calls with the same priority are shared, so a live call never waits behind a background one
+                priority = self.get_priority() if priority is None else priority
+                return self.in_flight.do((l, lazy, priority), self._fetch, l, entry, priority, lazy)
+            return self._fetch(l, entry, priority, lazy)
+        except Exception as err:
+            self.instrumentation.on_error(l, err)
+            raise
+
+    def _decode(self, link: str, content: bytes, lazy=False):
+        started = time.perf_counter()
+        decoded = decode_envelope(content) if lazy else decode_json(content)
+        self.instrumentation.on_decode(link, time.perf_counter() - started)
+        return decoded
+
+    def _fetch(self, link: str, entry: CacheEntry = None, priority: int = None, lazy=False) -> dict | None:
+        """
+        Gets a response from the API and caches it
+        :param link: The whole link to the API
+        :param entry: The cached response for the link, to revalidate it
+        :param priority: The priority of the request
+        :param lazy: Leave the body as raw JSON
+        :return: A JSON object of the information
+        """
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow(link):
+            return self._stale(link, entry, CircuitOpen(f"Too many requests to '{endpoint_template(link)}' failed, "
+                                                        f"not sending any for {breaker.reset_timeout} seconds"), lazy)
+        try:
+            response = self._send(link, entry.validators() if entry else None, priority)
+        except RequestFailed as err:
+            if breaker is None:
+                raise
+            breaker.on_failure(link)
+            return self._stale(link, entry, err, lazy)
+        if breaker is not None:
+            breaker.on_success(link)
+
+        if response.status_code == 304 and entry is not None: # cached response hasn't changed
+            self.instrumentation.on_cache_hit(link, "revalidated")
+            return self._decode(link, self.cache.revalidate(link, entry, response.headers), lazy)
+
+        try:
+            response_json = self._decode(link, response.content, lazy)
+        except ValueError as err:
+            raise RequestFailed(f"The API didn't respond with JSON (HTTP {response.status_code})") from err
+
+        if not response_json['success']: # if the request wasn't successfull, error in request
+            self.get_error(response_json['error']) # always raises
+
+        if self.cache is not None:
+            self.cache.store(link, response.content, response.headers)
+        return response_json
+
+    def _stale(self, link: str, entry: CacheEntry, error: RequestFailed, lazy=False) -> dict:
+        """
+        Gives the cached response of a link when the API can't be reached, if the circuit breaker allows it
+        :raise error: If there's no cached response
+        """
+        if entry is None or not self.breaker.serve_stale:
+            raise error
+        logging.warning(f"Using the expired cached response of '{link}': {error}")
+        self.instrumentation.on_cache_hit(link, "stale")
+        return self._decode(link, entry.content, lazy)
+
+    def get_document(self, key: str, link: str, raw=False, lazy=False) -> dict:
+        """
+        Gets a document that never changes, from the document store if it's there, or else from the API
+        :param key: The key of the document in the document store, for example 'challenge:ZFMOOKU'
+        :param link: The link to the API
+        :param raw: If you input the whole link, or just the suffix
+        :param lazy: Give the raw JSON of the body instead of decoding it, for the views
+        :return: The body of the response
+        """
+        if self.document_store is not None:
+            content = self.document_store.get(key)
+            if content is not None:
+                logging.debug(f"Get: '{key}' from document store")
+                l = link if raw else f"{self.url_prefix}{link}"
+                self.instrumentation.on_cache_hit(l, "document")
+                return content if lazy else self._decode(l, content)
+
+        body = self.get_response(link, raw=raw, lazy=lazy)['body']
+        if self.document_store is not None:
+            if lazy and type(body) in _RAW_TYPES:
+                self.document_store.put(key, bytes(body))
+            else: # without msgspec, a lazy body can be decoded already (see _split_object)
+                self.document_store.put(key, json.dumps(body, separators=(",", ":")).encode())
+        return body
+
+    @staticmethod
+    def get_error(err: str):
+        match (err or "").lower():
+            case "no race with that id exists":
+                raise InvalidRaceID(err)
+            case "no boss with that id exists":
+                raise InvalidBossID(err)
+            case "invalid boss type":
+                raise InvalidBossType(err)
+            case "invalid team size":
+                raise InvalidTeamSize(err)
+            case "invalid boss difficulty":
+                raise InvalidBossType(err)
+            case "invalid user id / player does not play this game":
+                raise InvalidUserID(err)
+            case "invalid filter type":
+                raise InvalidFilterType(err)
+            case "no challenge with that id exists":
+                raise InvalidChallengeID(err)
+            case "no ct with that id exists":
+                raise InvalidCTID(err)
+            case "no scores available":
+                raise NoScoresAvailable(err)
+            case "invalid guild id":
+                raise InvalidGuildID(err)
+            case _:
+                raise RequestFailed(f"The API gave an unknown error: {err}")
+
+
+    def get_available_race_events(self) -> list:
+        """
+        Gives you a list of recent race events
+        :return: List of BTD6RaceEvent objects
+        """
+        endpoint = "/btd6/races"
+
+        responses = self.get_response(endpoint)['body']
+        races = []
+
+        with self.instrumentation.build(endpoint):
+            for elem in responses:
+                race = BTD6RaceEvent.from_dict(elem)
+                race.api_instance = self
+                races.append(race)
+
+        logging.debug(f"Get: Available races, latest is '{races[0].name}'")
+        return races
+
+    def get_latest_race(self) -> BTD6RaceEvent:
+        """
+        Gives you the latest Race Event
+        :return: A BTD6RaceEvent
+        """
+        races = self.get_available_race_events()
+        latest_race = max(races, key=lambda r: r.start)
+        latest_race.api_instance = self
+        logging.debug(f"Get: Latest race: '{latest_race.name}'")
+        return latest_race
+
+    def get_race_leaderboard(self, race_id) -> BTD6EventLeaderboard:
+        """
+        Gives you the leaderboard of a specific race event
+        :param race_id: The id of the race event
+        :return: A BTD6EventLeaderboard of the race event provided
+        """
+        endpoint = f"/btd6/races/{race_id}/leaderboard"
+
+        response = self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            leaderboard = BTD6EventLeaderboard(response['body'])
+        logging.debug(f"Get: Race Leaderboard")
+        return leaderboard
+
+    def iter_leaderboard(self, link: str, raw=False, prefetch=True, entry_class=BTD6SubmissionEntry):
+        """
+        Goes through a whole leaderboard, one entry at a time, following the pages of the API.
+        The next page is downloaded in the background while you go through the current one, and only those two pages
+        are kept in memory. Stop whenever you want, for example with break
+        :param link: The link to the first page of the leaderboard
+        :param raw: If you input the whole link, or just the suffix
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
+        :return: Generator of BTD6SubmissionEntry objects, in leaderboard order
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="btd6-prefetch") if prefetch else None
+        priority = self.get_priority()
+        try:
+            response = self.get_response(link, raw=raw)
+            page = 1
+            while response is not None:
+                next_link = response.get('next')
+                pending = executor.submit(self.get_response, next_link, True, priority) if next_link and executor else None
+
+                logging.debug(f"Get: Leaderboard page {page}")
+                with self.instrumentation.build(link):
+                    entries = [entry_class.from_dict(elem) for elem in response['body']]
+                yield from entries
+
+                if not next_link:
+                    break
+                response = pending.result() if pending else self.get_response(next_link, raw=True)
+                page += 1
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_race_leaderboard(self, race_id, prefetch=True, entry_class=BTD6SubmissionEntry):
+        """
+        Goes through the whole leaderboard of a race event, see iter_leaderboard
+        :param race_id: The id of the race event
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
+        :return: Generator of BTD6SubmissionEntry objects
+        """
+        return self.iter_leaderboard(f"/btd6/races/{race_id}/leaderboard", prefetch=prefetch, entry_class=entry_class)
+
+    def get_race_metadata(self, race_id) -> BTD6ChallengeDocument:
+        """
+        Gives you the metadata (map debugrmation) of a race event
+        :param race_id: The id of the race event
+        :return: A BTD6ChallengeDocument of the race event provided
+        """
+        endpoint = f"/btd6/races/{race_id}/metadata"
+
+        response = self.get_document(f"race:{race_id}", endpoint)
+        with self.instrumentation.build(endpoint):
+            metadata = BTD6ChallengeDocument.from_dict(response)
+        logging.debug(f"Get: Race ({metadata.name}) Metadata")
+        return metadata
+
+    @staticmethod
+    def race_event_is_ongoing(race: BTD6RaceEvent) -> bool:
+        """
+        Tells you if a race event is ongoing
+        :param race: The race event you want to test for
+        :return: Bool that says if the provided race event is ongoing respectively
+        """
+        logging.debug(f"Get: Race event ({race}) is ongoing")
+        return True if time.time() * 1000 - race.end < 0 else False # end is in milliseconds
+
+    def get_available_boss_events(self) -> list:
+        """
+        Gives you a list of recent boss events
+        :return: List of recent boss events
+        """
+        endpoint = "/btd6/bosses"
+
+        responses = self.get_response(endpoint)['body']
+        bosses = []
+
+        with self.instrumentation.build(endpoint):
+            for elem in responses:
+                boss = BTD6BossEvent.from_dict(elem)
+                boss.api_instance = self
+                bosses.append(boss)
+
+        logging.debug(f"Get: Available bosses, latest is '{bosses[0].name}'")
+        return bosses
+
+    def get_boss_leaderboard(self, boss_id, type_, teamSize) -> BTD6EventLeaderboard:
+        """
+        Gives you a boss leaderboard
+        :param boss_id: The id of the boss event
+        :param type_: Difficulty, either standard or elite
+        :param teamSize: The size of the team, 1 to 4
+        :return: A BTD6EventLeaderboard for the boss event provided
+        """
+        endpoint = f"/btd6/bosses/{boss_id}/leaderboard/{type_}/{teamSize}"
+        check_team_size(teamSize)
+
+        response = self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            leaderboard = BTD6EventLeaderboard(response['body'])
+        logging.debug(f"Get: Boss Leaderboard")
+        return leaderboard
+
+    def iter_boss_leaderboard(self, boss_id, type_, teamSize, prefetch=True, entry_class=BTD6SubmissionEntry):
+        """
+        Goes through the whole leaderboard of a boss event, see iter_leaderboard
+        :param boss_id: The id of the boss event
+        :param type_: Difficulty, either standard or elite
+        :param teamSize: The size of the team, 1 to 4
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
+        :return: Generator of BTD6SubmissionEntry objects
+        """
+        check_team_size(teamSize)
+
+        return self.iter_leaderboard(f"/btd6/bosses/{boss_id}/leaderboard/{type_}/{teamSize}", prefetch=prefetch,
+                                     entry_class=entry_class)
+
+    def get_boss_metadata(self, boss_id, difficulty) -> BTD6ChallengeDocument:
+        """
+        Gives you the metadata (map debugrmation) of a boss event
+        :param boss_id: The id of the boss event
+        :param difficulty: Difficulty, standard or elite
+        :return: A BTD6EventLeaderboard for the boss event provided
+        """
+        endpoint = f"/btd6/bosses/{boss_id}/metadata/{difficulty}"
+
+        response = self.get_document(f"boss:{boss_id}:{difficulty}", endpoint)
+        with self.instrumentation.build(endpoint):
+            metadata = BTD6ChallengeDocument.from_dict(response)
+        logging.debug(f"Get: Boss ({metadata.name}) Metadata")
+        return metadata
+
+    def get_latest_boss(self) -> BTD6BossEvent:
+        """
+        Gives you the latest Boss Event
+        :return: A BTD6BossEvent
+        """
+        latest_boss = max(self.get_available_boss_events(), key=lambda b: b.start)
+        logging.debug(f"Get: Latest boss: '{latest_boss.name}'")
+        return latest_boss
+
+    def _get_boss_bracket(self, boss_id, difficulty, teamSize, priority: int = PRIORITY_NORMAL):
+        with self.priority(priority):
+            try:
+                return self.get_boss_leaderboard(boss_id, difficulty, teamSize)
+            except NoScoresAvailable:
+                return None
+
+    def _get_boss_metadata(self, boss_id, difficulty, priority: int = PRIORITY_NORMAL):
+        with self.priority(priority):
+            return self.get_boss_metadata(boss_id, difficulty)
+
+    def get_boss_bundle(self, boss=None, difficulties=BOSS_DIFFICULTIES, team_sizes=BOSS_TEAM_SIZES,
+                        max_workers: int = 10) -> BTD6BossBundle:
+        """
+        Gets the first page of every leaderboard of a boss event, every difficulty and team size, and the metadata of
+        every difficulty, all at the same time
+        :param boss: A BTD6BossEvent or the id of one, the latest boss if None
+        :param difficulties: The difficulties, standard and elite
+        :param team_sizes: The team sizes, 1 to 4
+        :param max_workers: How many requests are sent at the same time, keep it at most the pool_size of the client
+        :return: A BTD6BossBundle, brackets without any scores are None
+        """
+        if boss is None:
+            boss = self.get_latest_boss()
+        boss_id = getattr(boss, "id", boss)
+        for teamSize in team_sizes:
+            check_team_size(teamSize)
+        logging.debug(f"Get: Boss bundle of '{boss_id}'")
+
+        priority = self.get_priority()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="btd6-boss") as executor:
+            leaderboards = {(difficulty, teamSize): executor.submit(self._get_boss_bracket, boss_id, difficulty,
+                                                                    teamSize, priority)
+                            for difficulty in difficulties for teamSize in team_sizes}
+            metadata = {difficulty: executor.submit(self._get_boss_metadata, boss_id, difficulty, priority)
+                        for difficulty in difficulties}
+            try:
+                return BTD6BossBundle(boss_id, {key: future.result() for key, future in leaderboards.items()},
+                                      {key: future.result() for key, future in metadata.items()})
+            except BaseException:
+                for future in (*leaderboards.values(), *metadata.values()):
+                    future.cancel()
+                raise
+
+    def get_user_profile(self, user_id, view=False) -> BTD6UserProfile:
+        """
+        Gives you debugrmation about a user
+        :param user_id: The id of the user
+        :param view: Give a BTD6UserProfileView, that only decodes the big nested fields when they're used
+        :return: A BTD6UserProfile of the id provided
+        """
+        endpoint = f"/btd6/users/{user_id}"
+
+        response = self.get_response(endpoint, lazy=view)
+        with self.instrumentation.build(endpoint):
+            if view:
+                user = BTD6UserProfileView.from_bytes(response['body'])
+            else:
+                user = BTD6UserProfile.from_dict(response['body'])
+        logging.debug(f"Get: User Profile Information, Display Name: {user.displayName}")
+        return user
+
+    @staticmethod
+    def get_user_id(user) -> str:
+        """
+        Gives you the id of a user
+        :param user: The id of the user, or the link to their profile, like BTD6SubmissionEntry.profile
+        :return: The id of the user
+        """
+        if "/btd6/users/" in user: # plain string splitting, urlsplit is slow when indexing big leaderboards
+            user = user.split("/btd6/users/", 1)[1].split("?", 1)[0].split("#", 1)[0]
+        return user.strip("/")
+
+    def _get_profile_result(self, user_id, priority: int = PRIORITY_NORMAL, view=False) -> ProfileResult:
+        try:
+            with self.priority(priority):
+                return ProfileResult(user_id, self.get_user_profile(user_id, view))
+        except Exception as err:
+            logging.warning(f"Couldn't get the profile of user '{user_id}': {err!r}")
+            return ProfileResult(user_id, error=err)
+
+    def get_user_profiles(self, users, max_workers: int = 8, ordered=False, view=False):
+        """
+        Gets a lot of user profiles at the same time. Users that appear more than once are only fetched once,
+        and a user that fails doesn't stop the others
+        :param users: The ids of the users, or links to their profiles, like BTD6SubmissionEntry.profile
+        :param max_workers: How many profiles are fetched at the same time, keep it at most the pool_size of the client
+        :param ordered: Give the results in the same order as the users, instead of as soon as they're done
+        :param view: Give BTD6UserProfileView objects, see get_user_profile
+        :return: Generator of ProfileResult objects
+        """
+        user_ids = list(dict.fromkeys(self.get_user_id(user) for user in users))
+        logging.debug(f"Get: {len(user_ids)} user profiles")
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="btd6-profiles")
+        try:
+            priority = self.get_priority()
+            futures = [executor.submit(self._get_profile_result, user_id, priority, view) for user_id in user_ids]
+            for future in (futures if ordered else as_completed(futures)):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_challenges_with_filter(self, filter_) -> list:
+        """
+        Gives you a list of recent challenges with the filter provided
+        :param filter_: Either newest, trending or daily
+        :return: List with BTD6Challenge objects
+        """
+        endpoint = f"/btd6/challenges/filter/{filter_}"
+        if filter_ not in ['newest', 'trending', 'daily']:
+            logging.error(f"'{filter_}' isn't a valid filter for challenges!")
+            raise InvalidFilterType("Filter can either be 'newest', 'trending' or 'daily'")
+
+        responses = self.get_response(endpoint)['body']
+        challenges = []
+
+        with self.instrumentation.build(endpoint):
+            for elem in responses:
+                challenge = BTD6Challenge.from_dict(elem)
+                challenge.api_instance = self
+                challenges.append(challenge)
+
+        logging.debug(f"Get: Challenges with filter '{filter_}', first is '{challenges[0].name}'")
+        return challenges
+
+    def get_challenge_metadata(self, challenge_id, view=False) -> BTD6ChallengeDocument:
+        """
+        Gives you the metadata (map debugrmation) of a challenge
+        :param challenge_id: The id of the challenge
+        :param view: Give a BTD6ChallengeDocumentView, that only decodes the towers, powers, ... when they're used
+        :return: A BTD6ChallengeDocument of the id provided
+        """
+        endpoint = f"/btd6/challenges/challenge/{challenge_id}"
+
+        response = self.get_document(f"challenge:{challenge_id}", endpoint, lazy=view)
+        with self.instrumentation.build(endpoint):
+            if view:
+                challenge = BTD6ChallengeDocumentView.from_bytes(response)
+            else:
+                challenge = BTD6ChallengeDocument.from_dict(response)
+
+        return challenge
+
+    def get_ct_events(self) -> list:
+        """
+        Gives you a list of recent Contested Territory events
+        :return: List of BTD6CTEvent objects
+        """
+        endpoint = "/btd6/ct"
+
+        responses = self.get_response(endpoint)['body']
+        events = []
+
+        with self.instrumentation.build(endpoint):
+            for elem in responses:
+                event = BTD6CTEvent.from_dict(elem)
+                event.api_instance = self
+                events.append(event)
+
+        logging.debug(f"Get: Available CT events, {len(events)} events")
+        return events
+
+    def get_latest_ct(self) -> BTD6CTEvent:
+        """
+        Gives you the latest Contested Territory event
+        :return: A BTD6CTEvent
+        """
+        latest_ct = max(self.get_ct_events(), key=lambda e: e.start or 0)
+        logging.debug(f"Get: Latest CT: '{latest_ct.id}'")
+        return latest_ct
+
+    def get_ct_tiles(self, ct_id) -> list:
+        """
+        Gives you the tiles of a Contested Territory event. The tiles of an event never change, so they're kept in
+        the document store
+        :param ct_id: The id of the CT event
+        :return: List of BTD6CTTile objects
+        """
+        endpoint = f"/btd6/ct/{ct_id}/tiles"
+
+        response = self.get_document(f"ct:{ct_id}:tiles", endpoint)
+        with self.instrumentation.build(endpoint):
+            tiles = ct_tile_list(response)
+        logging.debug(f"Get: CT ({ct_id}) tiles, {len(tiles)} tiles")
+        return tiles
+
+    def get_ct_tile(self, ct_id, tile: BTD6CTTile) -> BTD6CTTile:
+        """
+        Gives you the full document of a tile, when the tiles of the event only link to it. Kept in the document store
+        :param ct_id: The id of the CT event
+        :param tile: The BTD6CTTile from get_ct_tiles
+        :return: A BTD6CTTile, the same one if there's nothing to follow
+        """
+        link = tile.link
+        if link is None:
+            return tile
+
+        response = self.get_document(f"ct:{ct_id}:tile:{tile.id}", link, raw=True)
+        with self.instrumentation.build(link):
+            document = BTD6CTTile.from_dict(response)
+        if document.id is None:
+            document.id = tile.id
+        return document
+
+    def _get_ct_tile_result(self, ct_id, tile, priority: int = PRIORITY_NORMAL) -> CTTileResult:
+        try:
+            with self.priority(priority):
+                return CTTileResult(tile.id, self.get_ct_tile(ct_id, tile))
+        except Exception as err:
+            logging.warning(f"Couldn't get tile '{tile.id}' of CT '{ct_id}': {err!r}")
+            return CTTileResult(tile.id, error=err)
+
+    def crawl_ct_tiles(self, ct, max_workers: int = 10, ordered=False):
+        """
+        Gets every tile of a Contested Territory event. The tiles endpoint usually gives the whole tiles, then they're
+        given as they are without any more requests. Tiles that only have a link to their document (BTD6CTTile.link,
+        an endpoint that isn't confirmed) are fetched at the same time and kept in the document store, so crawling
+        the same event again doesn't send any requests, and a tile that fails doesn't stop the others
+        :param ct: A BTD6CTEvent or the id of one
+        :param max_workers: How many tiles are fetched at the same time, keep it at most the pool_size of the client
+        :param ordered: Give the results in the same order as the tiles, instead of as soon as they're done
+        :return: Generator of CTTileResult objects
+        """
+        ct_id = getattr(ct, "id", ct)
+        tiles = self.get_ct_tiles(ct_id)
+        linked = sum(tile.link is not None for tile in tiles)
+        if not linked: # the tiles are complete already, there's nothing to fetch
+            for tile in tiles:
+                yield CTTileResult(tile.id, tile)
+            return
+        logging.debug(f"Get: Crawling {linked} of the {len(tiles)} tiles of CT '{ct_id}'")
+
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, linked), thread_name_prefix="btd6-ct")
+        try:
+            priority = self.get_priority()
+            results = [CTTileResult(tile.id, tile) if tile.link is None else
+                       executor.submit(self._get_ct_tile_result, ct_id, tile, priority) for tile in tiles]
+            if ordered:
+                for result in results:
+                    yield result.result() if isinstance(result, Future) else result
+            else:
+                yield from (result for result in results if not isinstance(result, Future))
+                for future in as_completed([result for result in results if isinstance(result, Future)]):
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_ct_leaderboard(self, ct_id, type_) -> BTD6EventLeaderboard:
+        """
+        Gives you a Contested Territory leaderboard
+        :param ct_id: The id of the CT event
+        :param type_: Either player or team
+        :return: A BTD6EventLeaderboard with BTD6CTSubmissionEntry objects
+        """
+        endpoint = f"/btd6/ct/{ct_id}/leaderboard/{type_}"
+        if type_ not in ("player", "team"):
+            logging.error(f"Leaderboard type '{type_}' isn't valid!")
+            raise ValueError("Invalid Leaderboard Type!")
+
+        response = self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            leaderboard = BTD6EventLeaderboard(response['body'], entry_class=BTD6CTSubmissionEntry)
+        logging.debug(f"Get: CT Leaderboard")
+        return leaderboard
+
+    def iter_ct_leaderboard(self, ct_id, type_, prefetch=True, entry_class=BTD6CTSubmissionEntry):
+        """
+        Goes through the whole leaderboard of a Contested Territory event, see iter_leaderboard
+        :param ct_id: The id of the CT event
+        :param type_: Either player or team
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries
+        :return: Generator of BTD6CTSubmissionEntry objects
+        """
+        if type_ not in ("player", "team"):
+            raise ValueError("Invalid Leaderboard Type!")
+
+        return self.iter_leaderboard(f"/btd6/ct/{ct_id}/leaderboard/{type_}", prefetch=prefetch, entry_class=entry_class)
+
+    def _get_ct_leaderboard_entries(self, ct_id, type_, priority: int = PRIORITY_NORMAL) -> list:
+        with self.priority(priority):
+            try:
+                return self.get_ct_leaderboard(ct_id, type_).get_leaderboard()
+            except NoScoresAvailable:
+                return []
+
+    def get_ct_snapshot(self, ct=None, max_workers: int = 10) -> BTD6CTSnapshot:
+        """
+        Gets every tile and the first page of both leaderboards of a Contested Territory event at the same time
+        :param ct: A BTD6CTEvent or the id of one, the latest CT event if None
+        :param max_workers: How many requests are sent at the same time, keep it at most the pool_size of the client
+        :return: A BTD6CTSnapshot
+        """
+        if ct is None:
+            ct = self.get_latest_ct()
+        elif not isinstance(ct, BTD6CTEvent):
+            ct = next((event for event in self.get_ct_events() if event.id == ct), None)
+            if ct is None:
+                raise InvalidCTID("No CT with that id exists")
+
+        priority = self.get_priority()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="btd6-ct") as executor:
+            player = executor.submit(self._get_ct_leaderboard_entries, ct.id, "player", priority)
+            team = executor.submit(self._get_ct_leaderboard_entries, ct.id, "team", priority)
+            tiles = list(self.crawl_ct_tiles(ct, max_workers=max_workers, ordered=True))
+            return BTD6CTSnapshot(ct, tiles, player.result(), team.result())
+
+    @staticmethod
+    def get_guild_id(guild) -> str:
+        """
+        :param guild: The id of a guild, or a link to it
+        :return: The id of the guild
+        """
+        if "/btd6/guild/" in guild:
+            guild = guild.split("/btd6/guild/", 1)[1].split("?", 1)[0].split("#", 1)[0]
+        return guild.strip("/")
+
+    def get_guild(self, guild) -> BTD6Guild:
+        """
+        Gives you information about a guild
+        :param guild: The id of the guild, or a link to it
+        :return: A BTD6Guild of the id provided
+        """
+        guild_id = self.get_guild_id(guild)
+        endpoint = f"/btd6/guild/{guild_id}"
+
+        response = self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            guild = BTD6Guild.from_dict(response['body'])
+        if guild.id is None:
+            guild.id = guild_id
+        logging.debug(f"Get: Guild Information, Name: {guild.name}")
+        return guild
+
+
+"""
+ASYNC API
+"""
+class AsyncBTD6API:
+    """
+    The asyncio version of BTD6API. It has the same functions, but they are coroutines, and it returns the same
+    objects. Use it with `async with AsyncBTD6API() as api:` so the connections are closed when you're done.
+    Objects returned by this client don't fetch anything by themselves, use the hydrate functions for that.
+    Needs the library *aiohttp*
+
+    :param api_token: Your API token
+    :param max_concurrency: How many requests can be sent to the API at the same time
+    :param connect_timeout: Seconds to wait for a connection to the API
+    :param read_timeout: Seconds to wait for the API to send a response
+    :param session: An aiohttp.ClientSession to use instead of creating one, it won't be closed by the client
+    :param cache: A ResponseCache to use, True for one with the default settings or False to not cache responses
+    :param scheduler: A RequestScheduler for rate limiting and retries, True for one with the default settings
+                      or False to send requests right away and never retry. Priorities aren't used by the async client
+    :param coalesce: If coroutines asking for the same link at the same time should share one request
+    :param base_url: Where the API is, change it to use a stand-in like benchmarks/replay_server.py.
+                     Links to anywhere else are refused
+    :param instrumentation: An Instrumentation that gets told about every request, for example Metrics
+    :param hedge: A HedgePolicy to send slow requests a second time, True for one with the default settings
+    :param breaker: A CircuitBreaker to stop sending requests to endpoints that keep failing, True for one with the
+                    default settings
+    """
+
+    def __init__(self, api_token: str = None, max_concurrency: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 10.0, session=None, cache: ResponseCache | bool = True,
+                 scheduler: RequestScheduler | bool = True, coalesce: bool = True,
+                 base_url: str = DEFAULT_BASE_URL, instrumentation: Instrumentation = None,
+                 hedge: HedgePolicy | bool = False, breaker: CircuitBreaker | bool = False):
+        if aiohttp is None:
+            raise ImportError("AsyncBTD6API needs the library aiohttp, install it with `pip install aiohttp`")
+        self.url_prefix = base_url.rstrip("/")
+        self.api_token = api_token
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+
+        self.session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = ResponseCache() if cache is True else (cache or None)
+        self.scheduler = RequestScheduler() if scheduler is True else (scheduler or None)
+        self.in_flight = AsyncSingleFlight() if coalesce else None
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.hedge = HedgePolicy() if hedge is True else (hedge or None)
+        self.breaker = CircuitBreaker() if breaker is True else (breaker or None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes all the connections kept alive by the client
+        """
+        if self.session is not None and self._owns_session:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers={
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+            })
+        return self.session
+
+    async def get_response(self, link: str, raw=False, lazy=False) -> dict | None:
+        """
+        Tries to access the API
+        :param link: The link to the API
+        :param raw: If you input the whole link, or just the suffix
+        :param lazy: Leave the body as raw JSON, for the views (see decode_envelope)
+        :return: A JSON object of the information
+        """
+        logging.debug("Get response from API (async)")
+        l: str = link if raw else f"{self.url_prefix}{link}"
+        if not f"{l}/".startswith(f"{self.url_prefix}/"): # so https://data.ninjakiwi.com.example.com doesn't pass
+            raise InvalidLinkError("You're trying to access another website/api!")
+
+        entry = self.cache.lookup(l) if self.cache is not None else None
+        if entry is not None and entry.is_fresh():
+            self.instrumentation.on_cache_hit(l, "fresh")
+            return self._decode(l, entry.content, lazy)
+
+        try:
+            if self.in_flight is not None:
+                return await self.in_flight.do((l, lazy), self._fetch, l, entry, lazy)
+            return await self._fetch(l, entry, lazy)
+        except Exception as err:
+            self.instrumentation.on_error(l, err)
+            raise
+
+    _decode = BTD6API._decode
+    _stale = BTD6API._stale
+
+    async def _fetch(self, link: str, entry: CacheEntry = None, lazy=False) -> dict | None:
+        """
+        Gets a response from the API and caches it
+        :param link: The whole link to the API
+        :param entry: The cached response for the link, to revalidate it
+        :param lazy: Leave the body as raw JSON
+        :return: A JSON object of the information
+        """
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow(link):
+            return self._stale(link, entry, CircuitOpen(f"Too many requests to '{endpoint_template(link)}' failed, "
+                                                        f"not sending any for {breaker.reset_timeout} seconds"), lazy)
+        try:
+            status, headers, content = await self._send(link, entry.validators() if entry else None)
+        except RequestFailed as err:
+            if breaker is None:
+                raise
+            breaker.on_failure(link)
+            return self._stale(link, entry, err, lazy)
+        if breaker is not None:
+            breaker.on_success(link)
+
+        if status == 304 and entry is not None: # cached response hasn't changed
+            self.instrumentation.on_cache_hit(link, "revalidated")
+            return self._decode(link, self.cache.revalidate(link, entry, headers), lazy)
+
+        try:
+            response_json = self._decode(link, content, lazy)
+        except ValueError as err:
+            raise RequestFailed(f"The API didn't respond with JSON (HTTP {status})") from err
+
+        if not response_json['success']: # if the request wasn't successfull, error in request
+            BTD6API.get_error(response_json['error']) # always raises
+
+        if self.cache is not None:
+            self.cache.store(link, content, headers)
+        return response_json
+
+    async def _send(self, link: str, headers: dict = None) -> tuple:
+        """
+        Sends a request when the scheduler allows it, and retries it when the API is busy or the connection fails
+        :param link: The whole link to the API
+        :param headers: Extra headers for the request
+        :return: Tuple with the status, headers and content of the response
+        """
+        scheduler = self.scheduler
+        deadline = time.monotonic() + (scheduler.retry_budget if scheduler else 0)
+        attempt = 0
+
+        while True:
+            if scheduler is not None:
+                while (wait := scheduler.reserve()) > 0:
+                    await asyncio.sleep(wait)
+
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                status, response_headers, content = await self._get(link, headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                self.instrumentation.on_request(link, 0, time.perf_counter() - started, 0)
+                error = err
+            else:
+                self.instrumentation.on_request(link, status, time.perf_counter() - started, len(content))
+                if status not in RETRY_STATUSES:
+                    if scheduler is not None:
+                        scheduler.on_success()
+                    return status, response_headers, content
+
+                error = RequestFailed(f"The API responded with HTTP {status}")
+                if status in THROTTLE_STATUSES:
+                    retry_after = RequestScheduler.parse_retry_after(response_headers.get("Retry-After"))
+                    if scheduler is not None:
+                        scheduler.on_throttle(retry_after)
+
+            if scheduler is None or attempt >= scheduler.max_retries:
+                raise RequestFailed(f"Request to '{link}' failed: {error}") from error
+            attempt += 1
+            delay = max(retry_after or 0, scheduler.backoff(attempt))
+            if time.monotonic() + delay > deadline:
+                raise RequestFailed(f"Request to '{link}' failed, no retry budget left: {error}") from error
+
+            scheduler.retries += 1
+            self.instrumentation.on_retry(link, error)
+            logging.warning(f"Request to '{link}' failed ({error}), retry {attempt} in {delay:.2f} seconds")
+            await asyncio.sleep(delay)
+
+    async def _get_once(self, link: str, headers: dict = None) -> tuple:
+        async with self._semaphore:
+            async with self._get_session().get(link, headers=headers) as response:
+                return response.status, response.headers, await response.read()
+
+    async def _get(self, link: str, headers: dict = None) -> tuple:
+        """
+        Sends one request, and a hedge if the hedge policy says it's taking too long. The slower one is cancelled
+        :param link: The whole link to the API
+        :param headers: Extra headers for the request
+        :return: Tuple with the status, headers and content of the first response that came back
+        """
+        hedge = self.hedge
+        if hedge is None:
+            return await self._get_once(link, headers)
 
-        for elem in responses:
-            challenge = BTD6Challenge.from_dict(elem)
-            challenge.api_instance = self
-            challenges.append(challenge)
+        started = time.perf_counter()
+        first = asyncio.ensure_future(self._get_once(link, headers))
+        second = None
+        try:
+            done, _ = await asyncio.wait((first,), timeout=hedge.delay(link))
+            if done or (self.scheduler is not None and self.scheduler.reserve() > 0): # no room for a hedge
+                result = await first
+            else:
+                second = asyncio.ensure_future(self._get_once(link, headers))
+                winner, pending = None, {first, second}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    succeeded = [task for task in done
+                                 if task.exception() is None and task.result()[0] not in RETRY_STATUSES]
+                    if succeeded: # if one fails, the other one can still work
+                        winner = succeeded[0]
+                        break
+                if winner is None: # both failed, a response is better than an exception for the retries
+                    winner = second if first.exception() is not None and second.exception() is None else first
+                hedge.on_hedge(winner is second)
+                result = winner.result()
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+        if result[0] not in RETRY_STATUSES: # errors would make the hedge delay wrong
+            hedge.record(link, time.perf_counter() - started)
+        return result
+
+    @staticmethod
+    async def gather(*coroutines, return_exceptions=False) -> list:
+        """
+        Runs a bunch of requests at the same time, the client makes sure no more than max_concurrency are sent at once
+        :param coroutines: The coroutines to run, for example api.get_race_leaderboard(race_id)
+        :param return_exceptions: Return exceptions in the list instead of raising the first one
+        :return: List of the results, in the same order as the coroutines
+        """
+        return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
+
+    async def get_available_race_events(self) -> list:
+        """
+        Gives you a list of recent race events
+        :return: List of BTD6RaceEvent objects
+        """
+        endpoint = "/btd6/races"
+
+        responses = (await self.get_response(endpoint))['body']
+        with self.instrumentation.build(endpoint):
+            races = [BTD6RaceEvent.from_dict(elem) for elem in responses]
+
+        logging.debug(f"Get: Available races, latest is '{races[0].name}'")
+        return races
+
+    async def get_latest_race(self) -> BTD6RaceEvent:
+        """
+        Gives you the latest Race Event
+        :return: A BTD6RaceEvent
+        """
+        races = await self.get_available_race_events()
+        latest_race = max(races, key=lambda r: r.start)
+        logging.debug(f"Get: Latest race: '{latest_race.name}'")
+        return latest_race
+
+    async def get_race_leaderboard(self, race_id) -> BTD6EventLeaderboard:
+        """
+        Gives you the leaderboard of a specific race event
+        :param race_id: The id of the race event
+        :return: A BTD6EventLeaderboard of the race event provided
+        """
+        endpoint = f"/btd6/races/{race_id}/leaderboard"
+
+        response = await self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            leaderboard = BTD6EventLeaderboard(response['body'])
+        logging.debug(f"Get: Race Leaderboard")
+        return leaderboard
+
+    async def iter_leaderboard(self, link: str, raw=False, prefetch=True, entry_class=BTD6SubmissionEntry):
+        """
+        Goes through a whole leaderboard, one entry at a time, following the pages of the API.
+        The next page is downloaded in the background while you go through the current one
+        :param link: The link to the first page of the leaderboard
+        :param raw: If you input the whole link, or just the suffix
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
+        :return: Async generator of BTD6SubmissionEntry objects, in leaderboard order
+        """
+        pending = None
+        try:
+            response = await self.get_response(link, raw=raw)
+            while response is not None:
+                next_link = response.get('next')
+                if next_link and prefetch:
+                    pending = asyncio.ensure_future(self.get_response(next_link, raw=True))
+
+                with self.instrumentation.build(link):
+                    entries = [entry_class.from_dict(elem) for elem in response['body']]
+                for entry in entries:
+                    yield entry
+
+                if not next_link:
+                    break
+                response = await pending if pending else await self.get_response(next_link, raw=True)
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def iter_race_leaderboard(self, race_id, prefetch=True, entry_class=BTD6SubmissionEntry):
+        """
+        Goes through the whole leaderboard of a race event, see iter_leaderboard
+        :param race_id: The id of the race event
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
+        :return: Async generator of BTD6SubmissionEntry objects
+        """
+        return self.iter_leaderboard(f"/btd6/races/{race_id}/leaderboard", prefetch=prefetch, entry_class=entry_class)
+
+    async def get_race_metadata(self, race_id) -> BTD6ChallengeDocument:
+        """
+        Gives you the metadata (map information) of a race event
+        :param race_id: The id of the race event
+        :return: A BTD6ChallengeDocument of the race event provided
+        """
+        endpoint = f"/btd6/races/{race_id}/metadata"
+
+        response = await self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            metadata = BTD6ChallengeDocument.from_dict(response['body'])
+        logging.debug(f"Get: Race ({metadata.name}) Metadata")
+        return metadata
+
+    race_event_is_ongoing = staticmethod(BTD6API.race_event_is_ongoing)
+
+    async def get_available_boss_events(self) -> list:
+        """
+        Gives you a list of recent boss events
+        :return: List of recent boss events
+        """
+        endpoint = "/btd6/bosses"
+
+        responses = (await self.get_response(endpoint))['body']
+        with self.instrumentation.build(endpoint):
+            bosses = [BTD6BossEvent.from_dict(elem) for elem in responses]
+
+        logging.debug(f"Get: Available bosses, latest is '{bosses[0].name}'")
+        return bosses
+
+    async def get_boss_leaderboard(self, boss_id, type_, teamSize) -> BTD6EventLeaderboard:
+        """
+        Gives you a boss leaderboard
+        :param boss_id: The id of the boss event
+        :param type_: Difficulty, either standard or elite
+        :param teamSize: The size of the team, 1 to 4
+        :return: A BTD6EventLeaderboard for the boss event provided
+        """
+        endpoint = f"/btd6/bosses/{boss_id}/leaderboard/{type_}/{teamSize}"
+        check_team_size(teamSize)
+
+        response = await self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            leaderboard = BTD6EventLeaderboard(response['body'])
+        logging.debug(f"Get: Boss Leaderboard")
+        return leaderboard
+
+    def iter_boss_leaderboard(self, boss_id, type_, teamSize, prefetch=True, entry_class=BTD6SubmissionEntry):
+        """
+        Goes through the whole leaderboard of a boss event, see iter_leaderboard
+        :param boss_id: The id of the boss event
+        :param type_: Difficulty, either standard or elite
+        :param teamSize: The size of the team, 1 to 4
+        :param prefetch: Download the next page in the background
+        :param entry_class: The class of the entries, for example BTD6CompactSubmissionEntry to save memory
+        :return: Async generator of BTD6SubmissionEntry objects
+        """
+        check_team_size(teamSize)
+
+        return self.iter_leaderboard(f"/btd6/bosses/{boss_id}/leaderboard/{type_}/{teamSize}", prefetch=prefetch,
+                                     entry_class=entry_class)
+
+    async def get_boss_metadata(self, boss_id, difficulty) -> BTD6ChallengeDocument:
+        """
+        Gives you the metadata (map information) of a boss event
+        :param boss_id: The id of the boss event
+        :param difficulty: Difficulty, standard or elite
+        :return: A BTD6ChallengeDocument for the boss event provided
+        """
+        endpoint = f"/btd6/bosses/{boss_id}/metadata/{difficulty}"
+
+        response = await self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            metadata = BTD6ChallengeDocument.from_dict(response['body'])
+        logging.debug(f"Get: Boss ({metadata.name}) Metadata")
+        return metadata
+
+    async def get_latest_boss(self) -> BTD6BossEvent:
+        """
+        Gives you the latest Boss Event
+        :return: A BTD6BossEvent
+        """
+        latest_boss = max(await self.get_available_boss_events(), key=lambda b: b.start)
+        logging.debug(f"Get: Latest boss: '{latest_boss.name}'")
+        return latest_boss
+
+    async def _get_boss_bracket(self, boss_id, difficulty, teamSize):
+        try:
+            return await self.get_boss_leaderboard(boss_id, difficulty, teamSize)
+        except NoScoresAvailable:
+            return None
+
+    async def get_boss_bundle(self, boss=None, difficulties=BOSS_DIFFICULTIES,
+                              team_sizes=BOSS_TEAM_SIZES) -> BTD6BossBundle:
+        """
+        Gets the first page of every leaderboard of a boss event, every difficulty and team size, and the metadata of
+        every difficulty, all at the same time (at most max_concurrency at once)
+        :param boss: A BTD6BossEvent or the id of one, the latest boss if None
+        :param difficulties: The difficulties, standard and elite
+        :param team_sizes: The team sizes, 1 to 4
+        :return: A BTD6BossBundle, brackets without any scores are None
+        """
+        if boss is None:
+            boss = await self.get_latest_boss()
+        boss_id = getattr(boss, "id", boss)
+        for teamSize in team_sizes:
+            check_team_size(teamSize)
+        logging.debug(f"Get: Boss bundle of '{boss_id}'")
+
+        brackets = [(difficulty, teamSize) for difficulty in difficulties for teamSize in team_sizes]
+        results = await self.gather(*(self._get_boss_bracket(boss_id, *bracket) for bracket in brackets),
+                                    *(self.get_boss_metadata(boss_id, difficulty) for difficulty in difficulties))
+        return BTD6BossBundle(boss_id, dict(zip(brackets, results)), dict(zip(difficulties, results[len(brackets):])))
+
+    async def get_user_profile(self, user_id, view=False) -> BTD6UserProfile:
+        """
+        Gives you information about a user
+        :param user_id: The id of the user
+        :param view: Give a BTD6UserProfileView, that only decodes the big nested fields when they're used
+        :return: A BTD6UserProfile of the id provided
+        """
+        endpoint = f"/btd6/users/{user_id}"
+
+        response = await self.get_response(endpoint, lazy=view)
+        with self.instrumentation.build(endpoint):
+            if view:
+                user = BTD6UserProfileView.from_bytes(response['body'])
+            else:
+                user = BTD6UserProfile.from_dict(response['body'])
+        logging.debug(f"Get: User Profile Information, Display Name: {user.displayName}")
+        return user
+
+    get_user_id = staticmethod(BTD6API.get_user_id)
+
+    async def _get_profile_result(self, user_id, view=False) -> ProfileResult:
+        try:
+            return ProfileResult(user_id, await self.get_user_profile(user_id, view))
+        except Exception as err:
+            logging.warning(f"Couldn't get the profile of user '{user_id}': {err!r}")
+            return ProfileResult(user_id, error=err)
+
+    async def get_user_profiles(self, users, ordered=False, view=False):
+        """
+        Gets a lot of user profiles at the same time, at most max_concurrency at once. Users that appear more than
+        once are only fetched once, and a user that fails doesn't stop the others
+        :param users: The ids of the users, or links to their profiles, like BTD6SubmissionEntry.profile
+        :param ordered: Give the results in the same order as the users, instead of as soon as they're done
+        :param view: Give BTD6UserProfileView objects, see get_user_profile
+        :return: Async generator of ProfileResult objects
+        """
+        user_ids = list(dict.fromkeys(self.get_user_id(user) for user in users))
+        logging.debug(f"Get: {len(user_ids)} user profiles")
+
+        tasks = [asyncio.ensure_future(self._get_profile_result(user_id, view)) for user_id in user_ids]
+        try:
+            for task in (tasks if ordered else asyncio.as_completed(tasks)):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_challenges_with_filter(self, filter_) -> list:
+        """
+        Gives you a list of recent challenges with the filter provided
+        :param filter_: Either newest, trending or daily
+        :return: List with BTD6Challenge objects
+        """
+        endpoint = f"/btd6/challenges/filter/{filter_}"
+        if filter_ not in ['newest', 'trending', 'daily']:
+            logging.error(f"'{filter_}' isn't a valid filter for challenges!")
+            raise InvalidFilterType("Filter can either be 'newest', 'trending' or 'daily'")
+
+        responses = (await self.get_response(endpoint))['body']
+        with self.instrumentation.build(endpoint):
+            challenges = [BTD6Challenge.from_dict(elem) for elem in responses]
 
         logging.debug(f"Get: Challenges with filter '{filter_}', first is '{challenges[0].name}'")
         return challenges
 
-    def get_challenge_metadata(self, challenge_id) -> BTD6ChallengeDocument:
+    async def get_challenge_metadata(self, challenge_id, view=False) -> BTD6ChallengeDocument:
         """
-        Gives you the metadata (map debugrmation) of a challenge
+        Gives you the metadata (map information) of a challenge
         :param challenge_id: The id of the challenge
+        :param view: Give a BTD6ChallengeDocumentView, that only decodes the towers, powers, ... when they're used
         :return: A BTD6ChallengeDocument of the id provided
         """
         endpoint = f"/btd6/challenges/challenge/{challenge_id}"
 
-        response = self.get_response(endpoint)['body']
-        challenge = BTD6ChallengeDocument.from_dict(response)
+        response = (await self.get_response(endpoint, lazy=view))['body']
+        with self.instrumentation.build(endpoint):
+            if view:
+                challenge = BTD6ChallengeDocumentView.from_bytes(response)
+            else:
+                challenge = BTD6ChallengeDocument.from_dict(response)
+
+        return challenge
+
+    async def _get_leaderboard_from_url(self, url) -> list:
+        response = await self.get_response(url, raw=True)
+        return BTD6EventLeaderboard(response['body']).get_leaderboard()
+
+    async def _get_document_from_url(self, url) -> BTD6ChallengeDocument:
+        response = await self.get_response(url, raw=True)
+        return BTD6ChallengeDocument.from_dict(response['body'])
+
+    async def _get_profile_from_url(self, url) -> BTD6UserProfile:
+        response = await self.get_response(url, raw=True)
+        return BTD6UserProfile.from_dict(response['body'])
+
+    async def hydrate_race(self, race: BTD6RaceEvent) -> BTD6RaceEvent:
+        """
+        Fetches the leaderboard and metadata of a race event at the same time and puts them on the object
+        :param race: The race event to fill in
+        :return: The same BTD6RaceEvent
+        """
+        race.leaderboard, race.metadata = await asyncio.gather(
+            self._get_leaderboard_from_url(race.leaderboardURL),
+            self._get_document_from_url(race.metadataURL),
+        )
+        return race
+
+    async def hydrate_boss(self, boss: BTD6BossEvent) -> BTD6BossEvent:
+        """
+        Fetches both leaderboards and both metadata documents of a boss event at the same time and puts them on the object
+        :param boss: The boss event to fill in
+        :return: The same BTD6BossEvent
+        """
+        (boss.leaderboard_standard_players_1, boss.leaderboard_elite_players_1,
+         boss.metadataStandard, boss.metadataElite) = await asyncio.gather(
+            self._get_leaderboard_from_url(boss.leaderboard_standard_players_1_URL),
+            self._get_leaderboard_from_url(boss.leaderboard_elite_players_1_URL),
+            self._get_document_from_url(boss.metadataStandardURL),
+            self._get_document_from_url(boss.metadataEliteURL),
+        )
+        return boss
 
+    async def hydrate_challenge(self, challenge: BTD6Challenge) -> BTD6Challenge:
+        """
+        Fetches the creator profile and metadata of a challenge at the same time and puts them on the object
+        :param challenge: The challenge to fill in
+        :return: The same BTD6Challenge
+        """
+        challenge.creator, challenge.metadata = await asyncio.gather(
+            self._get_profile_from_url(challenge.creatorURL),
+            self._get_document_from_url(challenge.metadataURL),
+        )
         return challenge
+
+    async def get_ct_events(self) -> list:
+        """
+        Gives you a list of recent Contested Territory events
+        :return: List of BTD6CTEvent objects
+        """
+        endpoint = "/btd6/ct"
+
+        responses = (await self.get_response(endpoint))['body']
+        with self.instrumentation.build(endpoint):
+            events = [BTD6CTEvent.from_dict(elem) for elem in responses]
+
+        logging.debug(f"Get: Available CT events, {len(events)} events")
+        return events
+
+    async def get_latest_ct(self) -> BTD6CTEvent:
+        """
+        Gives you the latest Contested Territory event
+        :return: A BTD6CTEvent
+        """
+        latest_ct = max(await self.get_ct_events(), key=lambda e: e.start or 0)
+        logging.debug(f"Get: Latest CT: '{latest_ct.id}'")
+        return latest_ct
+
+    async def get_ct_tiles(self, ct_id) -> list:
+        """
+        Gives you the tiles of a Contested Territory event
+        :param ct_id: The id of the CT event
+        :return: List of BTD6CTTile objects
+        """
+        endpoint = f"/btd6/ct/{ct_id}/tiles"
+
+        response = (await self.get_response(endpoint))['body']
+        with self.instrumentation.build(endpoint):
+            tiles = ct_tile_list(response)
+        logging.debug(f"Get: CT ({ct_id}) tiles, {len(tiles)} tiles")
+        return tiles
+
+    async def get_ct_tile(self, ct_id, tile: BTD6CTTile) -> BTD6CTTile:
+        """
+        Gives you the full document of a tile, when the tiles of the event only link to it
+        :param ct_id: The id of the CT event
+        :param tile: The BTD6CTTile from get_ct_tiles
+        :return: A BTD6CTTile, the same one if there's nothing to follow
+        """
+        link = tile.link
+        if link is None:
+            return tile
+
+        response = (await self.get_response(link, raw=True))['body']
+        with self.instrumentation.build(link):
+            document = BTD6CTTile.from_dict(response)
+        if document.id is None:
+            document.id = tile.id
+        return document
+
+    async def _get_ct_tile_result(self, ct_id, tile) -> CTTileResult:
+        try:
+            return CTTileResult(tile.id, await self.get_ct_tile(ct_id, tile))
+        except Exception as err:
+            logging.warning(f"Couldn't get tile '{tile.id}' of CT '{ct_id}': {err!r}")
+            return CTTileResult(tile.id, error=err)
+
+    async def crawl_ct_tiles(self, ct, ordered=False):
+        """
+        Gets every tile of a Contested Territory event. Tiles that only have a link to their document (BTD6CTTile.link,
+        an endpoint that isn't confirmed) are fetched at the same time, at most max_concurrency at once.
+        A tile that fails doesn't stop the others
+        :param ct: A BTD6CTEvent or the id of one
+        :param ordered: Give the results in the same order as the tiles, instead of as soon as they're done
+        :return: Async generator of CTTileResult objects
+        """
+        ct_id = getattr(ct, "id", ct)
+        tiles = await self.get_ct_tiles(ct_id)
+        if all(tile.link is None for tile in tiles): # the tiles are complete already, there's nothing to fetch
+            for tile in tiles:
+                yield CTTileResult(tile.id, tile)
+            return
+        logging.debug(f"Get: Crawling {len(tiles)} tiles of CT '{ct_id}'")
+
+        tasks = [asyncio.ensure_future(self._get_ct_tile_result(ct_id, tile)) for tile in tiles]
+        try:
+            for task in (tasks if ordered else asyncio.as_completed(tasks)):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_ct_leaderboard(self, ct_id, type_) -> BTD6EventLeaderboard:
+        """
+        Gives you a Contested Territory leaderboard
+        :param ct_id: The id of the CT event
+        :param type_: Either player or team
+        :return: A BTD6EventLeaderboard with BTD6CTSubmissionEntry objects
+        """
+        endpoint = f"/btd6/ct/{ct_id}/leaderboard/{type_}"
+        if type_ not in ("player", "team"):
+            logging.error(f"Leaderboard type '{type_}' isn't valid!")
+            raise ValueError("Invalid Leaderboard Type!")
+
+        response = await self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            leaderboard = BTD6EventLeaderboard(response['body'], entry_class=BTD6CTSubmissionEntry)
+        logging.debug(f"Get: CT Leaderboard")
+        return leaderboard
+
+    async def _get_ct_leaderboard_entries(self, ct_id, type_) -> list:
+        try:
+            return (await self.get_ct_leaderboard(ct_id, type_)).get_leaderboard()
+        except NoScoresAvailable:
+            return []
+
+    async def get_ct_snapshot(self, ct=None) -> BTD6CTSnapshot:
+        """
+        Gets every tile and the first page of both leaderboards of a Contested Territory event at the same time
+        :param ct: A BTD6CTEvent or the id of one, the latest CT event if None
+        :return: A BTD6CTSnapshot
+        """
+        if ct is None:
+            ct = await self.get_latest_ct()
+        elif not isinstance(ct, BTD6CTEvent):
+            ct = next((event for event in await self.get_ct_events() if event.id == ct), None)
+            if ct is None:
+                raise InvalidCTID("No CT with that id exists")
+
+        async def tiles():
+            return [result async for result in self.crawl_ct_tiles(ct, ordered=True)]
+
+        tile_results, player, team = await self.gather(tiles(), self._get_ct_leaderboard_entries(ct.id, "player"),
+                                                       self._get_ct_leaderboard_entries(ct.id, "team"))
+        return BTD6CTSnapshot(ct, tile_results, player, team)
+
+    get_guild_id = staticmethod(BTD6API.get_guild_id)
+
+    async def get_guild(self, guild) -> BTD6Guild:
+        """
+        Gives you information about a guild
+        :param guild: The id of the guild, or a link to it
+        :return: A BTD6Guild of the id provided
+        """
+        guild_id = self.get_guild_id(guild)
+        endpoint = f"/btd6/guild/{guild_id}"
+
+        response = await self.get_response(endpoint)
+        with self.instrumentation.build(endpoint):
+            guild = BTD6Guild.from_dict(response['body'])
+        if guild.id is None:
+            guild.id = guild_id
+        logging.debug(f"Get: Guild Information, Name: {guild.name}")
+        return guild
+
+"""
+CRAWLING
+"""
+DEFAULT_CRAWL_SEEDS = ( # where CrawlPipeline starts if you don't give it links
+    "/btd6/races",
+    "/btd6/bosses",
+    "/btd6/ct",
+    "/btd6/challenges/filter/newest",
+    "/btd6/challenges/filter/trending",
+    "/btd6/challenges/filter/daily",
+)
+
+def find_links(data, prefix: str = DEFAULT_BASE_URL) -> list:
+    """
+    Finds every link to the API in a response, like the profiles on a leaderboard or the creator and metadata of
+    challenges
+    :param data: The decoded body of a response
+    :param prefix: The base url of the API, links to other websites (like the images on static-api.nkstatic.com) are
+    skipped
+    :return: The links, in the order they are in the response
+    """
+    prefix = f"{prefix.rstrip('/')}/"
+    links = []
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+        elif isinstance(value, str) and value.startswith(prefix):
+            links.append(value)
+    return links
+
+
+class CrawlFrontier:
+    """
+    The links of a crawl in a SQLite file: the ones that still have to be fetched, the ones that were, and the
+    documents that came back. Every link is only in it once, so a link that's found again isn't fetched again.
+    It's also the checkpoint of the crawl, when the crawl is stopped or crashes it goes on from here (see resume).
+    Only use it from one thread, CrawlPipeline does that for you
+
+    :param path: Path to the SQLite file, it's created if it doesn't exist
+    :param timeout: Seconds to wait when another process is writing to the file
+    """
+    PENDING, IN_PROGRESS, DONE, FAILED = range(4)
+    STATES = ("pending", "in_progress", "done", "failed")
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS links ("
+            "link TEXT PRIMARY KEY, kind TEXT NOT NULL, depth INTEGER NOT NULL, state INTEGER NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS links_state ON links (state)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents (link TEXT PRIMARY KEY, kind TEXT NOT NULL, data BLOB NOT NULL)"
+        )
+
+    @contextmanager
+    def transaction(self):
+        """
+        Everything changed in it is written at once, or not at all if there's an error
+        """
+        if self._connection.in_transaction:
+            yield
+            return
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def add(self, links, depth: int = 0) -> int:
+        """
+        Adds links that have to be fetched, the ones that are already in the frontier are skipped
+        :param links: Whole links to the API
+        :param depth: How many links away from the seeds they are
+        :return: How many links were new
+        """
+        before = self._connection.total_changes
+        now = time.time()
+        with self.transaction():
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO links (link, kind, depth, state, updated) VALUES (?, ?, ?, ?, ?)",
+                ((link, endpoint_template(link), depth, self.PENDING, now) for link in links)
+            )
+        return self._connection.total_changes - before
+
+    def claim(self, count: int) -> list:
+        """
+        Takes links that have to be fetched, the oldest first
+        :param count: The most links to take
+        :return: A list of (link, depth)
+        """
+        with self.transaction():
+            rows = self._connection.execute("SELECT link, depth FROM links WHERE state = ? ORDER BY rowid LIMIT ?",
+                                            (self.PENDING, count)).fetchall()
+            now = time.time()
+            self._connection.executemany("UPDATE links SET state = ?, updated = ? WHERE link = ?",
+                                         ((self.IN_PROGRESS, now, link) for link, _ in rows))
+        return rows
+
+    def done(self, link: str, data: bytes = None) -> None:
+        """
+        :param link: A link that was fetched
+        :param data: The compressed JSON of the body, to keep it
+        """
+        with self.transaction():
+            self._connection.execute("UPDATE links SET state = ?, error = NULL, updated = ? WHERE link = ?",
+                                     (self.DONE, time.time(), link))
+            if data is not None:
+                self._connection.execute("INSERT OR REPLACE INTO documents (link, kind, data) VALUES (?, ?, ?)",
+                                         (link, endpoint_template(link), data))
+
+    def fail(self, link: str, error: str, retry: bool = True, max_attempts: int = 3) -> bool:
+        """
+        :param link: A link that couldn't be fetched
+        :param error: Why it couldn't be fetched
+        :param retry: If it can be tried again, when the API couldn't be reached
+        :param max_attempts: The most times a link is tried
+        :return: If the link will be tried again
+        """
+        with self.transaction():
+            self._connection.execute(
+                "UPDATE links SET attempts = attempts + 1, error = ?, updated = ?, "
+                "state = CASE WHEN ? AND attempts + 1 < ? THEN ? ELSE ? END WHERE link = ?",
+                (error, time.time(), retry, max_attempts, self.PENDING, self.FAILED, link)
+            )
+            row = self._connection.execute("SELECT state FROM links WHERE link = ?", (link,)).fetchone()
+        return row is not None and row[0] == self.PENDING
+
+    def resume(self) -> int:
+        """
+        Puts the links that were being fetched when the crawl stopped back, so they are fetched again
+        :return: How many links were put back
+        """
+        with self.transaction():
+            return self._connection.execute("UPDATE links SET state = ? WHERE state = ?",
+                                            (self.PENDING, self.IN_PROGRESS)).rowcount
+
+    def retry_failed(self) -> int:
+        """
+        Puts the links that failed back, so they are tried again
+        :return: How many links were put back
+        """
+        with self.transaction():
+            return self._connection.execute("UPDATE links SET state = ?, attempts = 0 WHERE state = ?",
+                                            (self.PENDING, self.FAILED)).rowcount
+
+    def counts(self) -> dict:
+        """
+        :return: How many links are pending, in_progress, done and failed
+        """
+        counts = dict.fromkeys(self.STATES, 0)
+        for state, count in self._connection.execute("SELECT state, COUNT(*) FROM links GROUP BY state"):
+            counts[self.STATES[state]] = count
+        return counts
+
+    def failures(self) -> list:
+        """
+        :return: A list of (link, error) of the links that failed
+        """
+        return self._connection.execute("SELECT link, error FROM links WHERE state = ? ORDER BY rowid",
+                                        (self.FAILED,)).fetchall()
+
+    def documents(self, kind: str = None):
+        """
+        Goes through the documents that were fetched
+        :param kind: Only the documents of this endpoint, for example '/btd6/users/{id}' (see endpoint_template)
+        :return: A generator of (link, body)
+        """
+        if kind is None:
+            rows = self._connection.execute("SELECT link, data FROM documents ORDER BY rowid")
+        else:
+            rows = self._connection.execute("SELECT link, data FROM documents WHERE kind = ? ORDER BY rowid", (kind,))
+        for link, data in rows:
+            yield link, decode_json(zlib.decompress(data))
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    def __contains__(self, link):
+        return self._connection.execute("SELECT 1 FROM links WHERE link = ?", (link,)).fetchone() is not None
+
+
+_crawl_worker = None # (client, threads) of a crawl worker process, made by _init_crawl_worker
+
+def _init_crawl_worker(base_url: str, budget: SharedRateBudget, threads: int) -> None:
+    global _crawl_worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C is handled by the process that runs the crawl
+    # A forked process has a copy of the client of the parent, with its connections, so it makes its own
+    SingletonMeta._instances.pop(BTD6API, None)
+    client = BTD6API(base_url=base_url, pool_size=threads, cache=False, scheduler=SharedRequestScheduler(budget))
+    _crawl_worker = client, ThreadPoolExecutor(max_workers=threads, thread_name_prefix="btd6-crawl")
+
+def _crawl_link(client: BTD6API, link: str) -> tuple:
+    # Errors are sent back as strings, so they don't have to be pickled
+    try:
+        response = client.get_response(link, raw=True, priority=PRIORITY_BACKGROUND)
+    except NoScoresAvailable:
+        return link, None, None, [], None # a leaderboard without scores, there's nothing to keep
+    except RequestFailed as err:
+        return link, (True, f"{type(err).__name__}: {err}"), None, [], None
+    except Exception as err: # the API says the link is wrong, trying again won't help
+        return link, (False, f"{type(err).__name__}: {err}"), None, [], None
+
+    body = response['body']
+    data = zlib.compress(json.dumps(body, separators=(",", ":")).encode())
+    return link, None, data, find_links(body, client.url_prefix), response.get('next')
+
+def _crawl_batch(links: list) -> list:
+    client, threads = _crawl_worker
+    return list(threads.map(_crawl_link, itertools.repeat(client), links))
+
+
+class CrawlPipeline:
+    """
+    Crawls the API with several processes. Starting from some links, every response is searched for more links to the
+    API (like the profiles on leaderboards, the creator and metadata of challenges and the next pages) that are added
+    to the frontier, until every link was fetched.
+    Every worker process has its own client with its own connection pool, and fetches a batch of links with threads.
+    The requests of all the workers together stay under one rate with a SharedRateBudget.
+    The frontier is a SQLite file that's written after every batch, so when the crawl is stopped or crashes, run()
+    goes on where it stopped. Links that were being fetched then are fetched again
+
+    :param path: Path to the SQLite file of the frontier
+    :param base_url: The API to crawl, for example a ReplayServer
+    :param processes: How many worker processes fetch links
+    :param threads: How many links every worker process fetches at the same time
+    :param rate: The most requests per second, for all the workers together
+    :param burst: How many requests can be sent right away after being idle
+    :param follow: Only follow links to these endpoints, for example {'/btd6/users/{id}'} (see endpoint_template),
+    every endpoint if None. The next pages of a response are always followed
+    :param max_depth: How many links away from the seeds the crawl goes, no limit if None. Next pages are at the
+    same depth as the first page
+    :param max_attempts: How many times a link is tried when the API can't be reached
+    :param batch_size: How many links a worker process gets at once
+    :param store_documents: Keep the bodies of the responses in the frontier, see CrawlFrontier.documents
+    :param context: The multiprocessing context for the worker processes, the default one if None
+    """
+
+    def __init__(self, path: str, base_url: str = DEFAULT_BASE_URL, processes: int = 4, threads: int = 8,
+                 rate: float = 20.0, burst: int = 20, follow=None, max_depth: int = None, max_attempts: int = 3,
+                 batch_size: int = 50, store_documents: bool = True, context=None):
+        self.frontier = CrawlFrontier(path)
+        self.url_prefix = base_url.rstrip("/")
+        self.processes = processes
+        self.threads = threads
+        self.rate = rate
+        self.burst = burst
+        self.follow = None if follow is None else set(follow)
+        self.max_depth = max_depth
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.store_documents = store_documents
+        self.context = context or multiprocessing.get_context()
+
+    def seed(self, links=DEFAULT_CRAWL_SEEDS) -> int:
+        """
+        Adds the links the crawl starts from
+        :param links: Whole links to the API or just the suffix, like '/btd6/races'
+        :return: How many links were new
+        """
+        return self.frontier.add(link if link.startswith(("http://", "https://")) else f"{self.url_prefix}{link}"
+                                 for link in links)
+
+    def _wanted(self, link: str, depth: int) -> bool:
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return self.follow is None or endpoint_template(link) in self.follow
+
+    def _checkpoint(self, results: list, depths: dict, stats: dict) -> None:
+        with self.frontier.transaction():
+            for link, error, data, links, next_link in results:
+                depth = depths[link]
+                if error is not None:
+                    retry, message = error
+                    if self.frontier.fail(link, message, retry, self.max_attempts):
+                        stats["retried"] += 1
+                    else:
+                        stats["failed"] += 1
+                        logging.warning(f"Crawl: couldn't fetch '{link}': {message}")
+                    continue
+
+                stats["discovered"] += self.frontier.add([found for found in links if self._wanted(found, depth + 1)],
+                                                         depth + 1)
+                if next_link:
+                    stats["discovered"] += self.frontier.add([next_link], depth)
+                self.frontier.done(link, data if self.store_documents else None)
+                stats["fetched"] += 1
+
+    def run(self, max_links: int = None) -> dict:
+        """
+        Crawls until every link in the frontier was fetched. Seed it first, or it goes on with the crawl in the file
+        :param max_links: Stop after this many links, the rest stays in the frontier for the next run
+        :return: A dict with how many links were fetched, failed, retried, discovered and resumed, and how long it took
+        """
+        stats = {"fetched": 0, "failed": 0, "retried": 0, "discovered": 0, "resumed": self.frontier.resume()}
+        if stats["resumed"]:
+            logging.info(f"Crawl: fetching {stats['resumed']} links again that were being fetched when it stopped")
+
+        budget = SharedRateBudget(self.rate, self.burst, context=self.context)
+        pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=self.context,
+                                   initializer=_init_crawl_worker, initargs=(self.url_prefix, budget, self.threads))
+        started = time.perf_counter()
+        claimed = 0
+        pending = {} # future: {link: depth} of the batch
+        try:
+            while True:
+                # Two batches for every worker, so they don't wait for us between batches
+                while len(pending) < self.processes * 2 and (max_links is None or claimed < max_links):
+                    size = self.batch_size if max_links is None else min(self.batch_size, max_links - claimed)
+                    batch = self.frontier.claim(size)
+                    if not batch:
+                        break
+                    claimed += len(batch)
+                    pending[pool.submit(_crawl_batch, [link for link, _ in batch])] = dict(batch)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._checkpoint(future.result(), pending.pop(future), stats)
+                logging.debug(f"Crawl: {stats['fetched']} links fetched, {self.frontier.counts()['pending']} to go")
+        except BaseException:
+            # The batches that weren't written stay in progress, and are fetched again by the next run
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+        stats["seconds"] = time.perf_counter() - started
+        stats["links_per_second"] = stats["fetched"] / stats["seconds"] if stats["seconds"] else 0.0
+        logging.info(f"Crawl: {stats['fetched']} links fetched in {stats['seconds']:.1f} seconds, "
+                     f"{stats['failed']} failed, {stats['discovered']} new links found")
+        return stats
+
+    def close(self) -> None:
+        self.frontier.close()
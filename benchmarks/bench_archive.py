@@ -0,0 +1,54 @@
+"""
+Fills a LeaderboardArchive with made up race snapshots and times how long it takes to write them, and to get the
+history of one player across all of them. Shows how much memory the lookup used, which stays small because the
+files are read with mmap.
+
+Usage: python benchmarks/bench_archive.py [--races 200] [--snapshots 10] [--entries 5000] [--directory DIR]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from BTD6API import LeaderboardArchive, BTD6CompactSubmissionEntry  # noqa: E402
+from bench_models import submission_entry  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--races", type=int, default=200)
+    parser.add_argument("--snapshots", type=int, default=10)
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--directory", default=None, help="where to put the archive, a temporary folder if not set")
+    args = parser.parse_args()
+
+    directory = args.directory or tempfile.mkdtemp(prefix="btd6archive")
+    archive = LeaderboardArchive(directory)
+    entries = [BTD6CompactSubmissionEntry.from_dict(submission_entry(i)) for i in range(args.entries)]
+
+    t0 = time.perf_counter()
+    for race in range(args.races):
+        for snapshot in range(args.snapshots):
+            archive.append(f"Race_{race}", entries, snapshot_time=1700000000000 + race * 604800000 + snapshot)
+    elapsed = time.perf_counter() - t0
+    records = args.races * args.snapshots * args.entries
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"wrote {records} records in {elapsed:.2f} s ({records / elapsed:.0f} records/s), {size / 1e6:.1f} MB")
+
+    profile = entries[args.entries // 2].profile
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    history = archive.player_history(profile, last=args.races)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"player_history over {args.races} races: {len(history)} rows in {elapsed * 1000:.1f} ms, "
+          f"peak {peak / 1e6:.2f} MB of Python memory")
+    print(f"archive in {directory}")
+
+
+if __name__ == "__main__":
+    main()
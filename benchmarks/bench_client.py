@@ -0,0 +1,187 @@
+"""
+Benchmarks the whole client against the replay server (benchmarks/replay_server.py), so nothing is sent to
+data.ninjakiwi.com. Every scenario is run once to time it and once more to measure allocations with tracemalloc.
+
+Scenarios:
+  lists     the lists of races, bosses and challenges
+  hydrate   every race and boss with their metadata and the first page of their leaderboards
+  bundles   every leaderboard (both difficulties, teams of 1 to 4) and metadata of every boss, with get_boss_bundle
+  profiles  the profiles of everyone on the first page of the race leaderboards, with get_user_profiles
+  crawl     every page of every race leaderboard, with iter_race_leaderboard
+
+For every scenario it prints the requests/sec, the latency percentiles of the requests, and the peak memory.
+Use --json to save the results, so they can be compared between runs.
+
+Usage: python benchmarks/bench_client.py [--scenarios lists,hydrate,bundles,profiles,crawl] [--latency 5]
+                                         [--error-rate 0] [--stall-rate 0.01] [--hedge] [--breaker]
+                                         [--races 20] [--pages 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from BTD6API import BTD6API, CircuitBreaker, HedgePolicy, RequestScheduler  # noqa: E402
+from replay_server import ReplayServer, SyntheticFixtures  # noqa: E402
+
+
+class TimedSession:
+    """
+    Wraps the session of the client and remembers how long every request took
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def get(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        response = self.session.get(*args, **kwargs)
+        response.content # read the whole body
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.latencies.append(elapsed)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+def scenario_lists(api, args):
+    items = 0
+    for _ in range(args.repeat):
+        items += len(api.get_available_race_events())
+        items += len(api.get_available_boss_events())
+        items += len(api.get_challenges_with_filter("newest"))
+    return items
+
+
+def scenario_hydrate(api, args):
+    items = 0
+    for event in api.get_available_race_events() + api.get_available_boss_events():
+        event.prefetch()
+        items += 1
+    return items
+
+
+def scenario_bundles(api, args):
+    bundles = [api.get_boss_bundle(boss, max_workers=args.workers) for boss in api.get_available_boss_events()]
+    return sum(len(bundle.leaderboards) + len(bundle.metadata) for bundle in bundles)
+
+
+def scenario_profiles(api, args):
+    profiles = []
+    for race in api.get_available_race_events():
+        profiles += [entry.profile for entry in api.get_race_leaderboard(race.id).get_leaderboard()]
+    return sum(result.ok for result in api.get_user_profiles(profiles, max_workers=args.workers))
+
+
+def scenario_crawl(api, args):
+    return sum(sum(1 for _ in api.iter_race_leaderboard(race.id)) for race in api.get_available_race_events())
+
+
+SCENARIOS = {
+    "lists": scenario_lists,
+    "hydrate": scenario_hydrate,
+    "bundles": scenario_bundles,
+    "profiles": scenario_profiles,
+    "crawl": scenario_crawl,
+}
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run(name, api, server, session, args):
+    function = SCENARIOS[name]
+    session.latencies.clear()
+    requests_before = server.requests
+    t0 = time.perf_counter()
+    items = function(api, args)
+    wall = time.perf_counter() - t0
+    requests = server.requests - requests_before
+    latencies = sorted(session.latencies)
+
+    # Measured separately, tracemalloc slows everything down a lot
+    tracemalloc.start()
+    function(api, args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "items": items,
+        "requests": requests,
+        "seconds": wall,
+        "requests_per_second": requests / wall if wall else 0.0,
+        "items_per_second": items / wall if wall else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_memory_mb": peak / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--races", type=int, default=20)
+    parser.add_argument("--bosses", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20, help="how many times the lists are fetched")
+    parser.add_argument("--workers", type=int, default=8, help="threads for get_user_profiles")
+    parser.add_argument("--latency", type=float, default=0.0, help="average delay of a response in ms")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--stall", type=float, default=2.0, help="seconds a hanging request hangs")
+    parser.add_argument("--hedge", action="store_true", help="send a hedge for slow requests")
+    parser.add_argument("--breaker", action="store_true", help="use a circuit breaker")
+    parser.add_argument("--rate", type=float, default=10000.0, help="requests/sec allowed by the scheduler")
+    parser.add_argument("--cache", action="store_true", help="use the response cache of the client")
+    parser.add_argument("--json", default=None, help="save the results to this file")
+    args = parser.parse_args()
+
+    fixtures = SyntheticFixtures(races=args.races, bosses=args.bosses, pages=args.pages, page_size=args.page_size)
+    server = ReplayServer(fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          throttle_rate=args.throttle_rate, seed=1, stall_rate=args.stall_rate,
+                          stall=args.stall).start()
+    session = TimedSession(BTD6API.create_session(max(10, args.workers)))
+    api = BTD6API(base_url=server.url, session=session, cache=args.cache, pool_size=max(10, args.workers),
+                  scheduler=RequestScheduler(rate=args.rate, burst=int(args.rate), backoff_base=0.05),
+                  hedge=HedgePolicy(min_samples=10) if args.hedge else False,
+                  breaker=CircuitBreaker() if args.breaker else False)
+
+    results = []
+    print(f"{'scenario':<10}{'items':>8}{'requests':>10}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'peak MB':>9}")
+    for name in args.scenarios.split(","):
+        result = run(name.strip(), api, server, session, args)
+        results.append(result)
+        print(f"{result['scenario']:<10}{result['items']:>8}{result['requests']:>10}"
+              f"{result['requests_per_second']:>10.0f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{result['peak_memory_mb']:>9.2f}")
+    if server.injected_errors:
+        print(f"{server.injected_errors} errors injected, {api.scheduler.retries} retries")
+    if api.hedge is not None:
+        print(f"{api.hedge.hedges} hedges sent, {api.hedge.wins} came back first")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"arguments": vars(args), "results": results}, file, indent=2)
+
+    api.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Crawls the replay server (benchmarks/replay_server.py) with CrawlPipeline, starting from every race, boss, CT event and
+challenge list, and following every link to the API in the responses (leaderboards, profiles, challenges, tiles, ...).
+The crawl is run once for every number of worker processes, each time with a new frontier.
+
+With --interrupt SECONDS the first crawl is killed after that many seconds, like a crash, and then resumed from its
+frontier, to see how many links are fetched twice.
+
+Usage: python benchmarks/bench_crawl.py [--processes 1,2,4] [--threads 8] [--latency 20] [--rate 10000]
+                                        [--races 20] [--pages 5] [--interrupt 2]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from BTD6API import CrawlFrontier, CrawlPipeline  # noqa: E402
+from replay_server import ReplayServer, SyntheticFixtures  # noqa: E402
+
+
+def crawl(path, server, processes, args):
+    pipeline = CrawlPipeline(path, base_url=server.url, processes=processes, threads=args.threads, rate=args.rate,
+                             burst=max(1, int(args.rate / 10)))
+    pipeline.seed()
+    stats = pipeline.run()
+    stats["links"] = len(pipeline.frontier)
+    pipeline.close()
+    return stats
+
+
+def interrupted(path, server, processes, args):
+    # The crawl runs in its own process group, so the workers are killed with it
+    code = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r} + '/..')\n"
+            f"from BTD6API import CrawlPipeline\n"
+            f"pipeline = CrawlPipeline({path!r}, base_url={server.url!r}, processes={processes}, "
+            f"threads={args.threads}, rate={args.rate}, burst={max(1, int(args.rate / 10))})\n"
+            f"pipeline.seed()\n"
+            f"pipeline.run()\n")
+    process = subprocess.Popen([sys.executable, "-c", code], start_new_session=True)
+    time.sleep(args.interrupt)
+    os.killpg(process.pid, signal.SIGKILL)
+    process.wait()
+
+    frontier = CrawlFrontier(path)
+    counts = frontier.counts()
+    frontier.close()
+    print(f"killed after {args.interrupt}s: {counts['done']} done, {counts['in_progress']} in progress, "
+          f"{counts['pending']} pending")
+    return crawl(path, server, processes, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=8, help="threads of every worker process")
+    parser.add_argument("--rate", type=float, default=10000.0, help="requests/sec for all the workers together")
+    parser.add_argument("--races", type=int, default=20)
+    parser.add_argument("--bosses", type=int, default=10)
+    parser.add_argument("--challenges", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=20.0, help="average delay of a response in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--interrupt", type=float, default=None, help="kill the first crawl after this many seconds")
+    args = parser.parse_args()
+
+    fixtures = SyntheticFixtures(races=args.races, bosses=args.bosses, challenges=args.challenges, pages=args.pages,
+                                 page_size=args.page_size)
+    server = ReplayServer(fixtures, latency=args.latency, error_rate=args.error_rate, seed=1).start()
+    directory = tempfile.mkdtemp()
+
+    print(f"{'processes':<10}{'links':>8}{'requests':>10}{'links/s':>10}{'resumed':>9}{'failed':>8}")
+    for i, processes in enumerate(int(count) for count in args.processes.split(",")):
+        path = os.path.join(directory, f"crawl{processes}.db")
+        requests_before = server.requests
+        if i == 0 and args.interrupt:
+            stats = interrupted(path, server, processes, args)
+        else:
+            stats = crawl(path, server, processes, args)
+        print(f"{processes:<10}{stats['links']:>8}{server.requests - requests_before:>10}"
+              f"{stats['links_per_second']:>10.0f}{stats['resumed']:>9}{stats['failed']:>8}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures how many entries per second can be decoded from the raw bytes of a response into model objects,
+with the old way (json.loads, then cls(**dict)) and with decode_models on every JSON backend that's installed.
+
+Usage: python benchmarks/bench_decode.py [--entries 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import BTD6API  # noqa: E402
+from BTD6API import BTD6SubmissionEntry, BTD6CompactSubmissionEntry, BTD6ChallengeDocument, decode_models  # noqa: E402
+from bench_models import submission_entry, challenge_document  # noqa: E402
+
+
+def backends():
+    found = {"json": json.loads}
+    try:
+        import orjson
+        found["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        found["msgspec"] = msgspec.json.Decoder().decode
+    except ImportError:
+        pass
+    return found
+
+
+def old_way(payload, cls):
+    body = json.loads(payload)["body"]
+    return [cls(**elem) for elem in body]
+
+
+def old_way_document(payload, cls):
+    body = json.loads(payload)["body"]
+    objects = []
+    for elem in body:
+        elem["id_"] = elem.pop("id")
+        elem["map_"] = elem.pop("map")
+        objects.append(cls(**elem))
+    return objects
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("SubmissionEntry", submission_entry, BTD6SubmissionEntry, old_way, args.entries),
+        ("CompactSubmissionEntry", submission_entry, BTD6CompactSubmissionEntry, old_way, args.entries),
+        ("ChallengeDocument", challenge_document, BTD6ChallengeDocument, old_way_document, args.entries // 10),
+    ]
+    for name, make, cls, old, count in cases:
+        payload = json.dumps({"success": True, "error": None, "body": [make(i) for i in range(count)]}).encode()
+        print(f"{name}: {count} entries, {len(payload) / 1e6:.1f} MB")
+
+        elapsed = best_time(lambda: old(payload, cls), args.repeat)
+        print(f"  {'json.loads + cls(**dict)':<32}{count / elapsed:>12.0f} entries/s")
+
+        for backend, loads in backends().items():
+            BTD6API.decode_json = loads
+            elapsed = best_time(lambda: decode_models(payload, cls), args.repeat)
+            print(f"  {'decode_models (' + backend + ')':<32}{count / elapsed:>12.0f} entries/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares the regular model classes with the compact (__slots__) ones: how long it takes to build them
+and how much memory they take.
+
+Usage: python benchmarks/bench_models.py [--count 200000]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from BTD6API import (  # noqa: E402
+    BTD6SubmissionEntry, BTD6CompactSubmissionEntry,
+    BTD6ChallengeDocument, BTD6CompactChallengeDocument,
+    BTD6UserProfile, BTD6CompactUserProfile,
+    BTD6RaceEvent, BTD6CompactRaceEvent,
+    BTD6BossEvent, BTD6CompactBossEvent,
+)
+
+
+def submission_entry(i):
+    return {
+        "displayName": f"Player{i}",
+        "score": 30000 + i,
+        "scoreParts": [{"score": 30000 + i, "type": "time", "name": "Game Time"}],
+        "submissionTime": 1700000000000 + i,
+        "profile": f"https://data.ninjakiwi.com/btd6/users/{i:016x}",
+    }
+
+
+def challenge_document(i):
+    return {
+        "name": f"Challenge {i}", "createdAt": 1700000000000 + i, "id": f"C{i:07d}",
+        "creator": f"https://data.ninjakiwi.com/btd6/users/{i:016x}", "gameVersion": "40.2", "map": "MonkeyMeadow",
+        "mapURL": "https://static-api.nkstatic.com/appdocs/4/maps/MonkeyMeadow.png", "mode": "Standard",
+        "difficulty": "Medium", "disableDoubleCash": False, "disableInstas": True, "disableMK": False,
+        "disablePowers": True, "disableSelling": False, "startingCash": 650, "lives": 150, "maxLives": 150,
+        "maxTowers": 10, "maxParagons": 1, "startRound": 1, "endRound": 60, "plays": 1000 + i, "wins": 500,
+        "losses": 500, "upvotes": 20, "playsUnique": 800, "restarts": 100, "winsUnique": 400, "lossesUnique": 400,
+        "abilityCooldownReductionMultiplier": 1.0, "leastCashUsed": -1, "leastTiersUsed": -1, "noContinues": False,
+        "seed": i, "removeableCostMultiplier": 1.0, "roundSets": ["default"],
+        "_powers": [{"name": "CashDrop", "max": 0}], "_bloonModifiers": {"speedMultiplier": 1.0},
+        "_towers": [{"tower": "DartMonkey", "max": -1, "path1NumBlockedTiers": 0}],
+    }
+
+
+def user_profile(i):
+    return {
+        "displayName": f"Player{i}", "rank": 155, "veteranRank": 20, "achievements": 150,
+        "mostExperiencedMonkey": "DartMonkey", "avatar": "ProfileAvatar01", "banner": "TeamsBannerDeafult",
+        "avatarURL": "https://static-api.nkstatic.com/appdocs/4/assets/opendata/a.png",
+        "bannerURL": "https://static-api.nkstatic.com/appdocs/4/assets/opendata/b.png", "followers": 10 + i,
+        "bloonsPopped": {"bloonsPopped": 1000000}, "gameplay": {"gameCount": 1000}, "heroesPlaced": {"Quincy": 10},
+        "_medalsSinglePlayer": {"Easy": 1}, "_medalsMultiplayer": {}, "_medalsBoss": {}, "_medalsBossElite": {},
+        "_medalsCTLocal": {}, "_medalsCTGlobal": {}, "_medalsRace": {},
+    }
+
+
+def race_event(i):
+    return {
+        "id": f"Race_{i}", "name": f"Race {i}", "start": 1700000000000, "end": 1700345600000, "totalScores": 40000,
+        "leaderboard": f"https://data.ninjakiwi.com/btd6/races/Race_{i}/leaderboard",
+        "metadata": f"https://data.ninjakiwi.com/btd6/races/Race_{i}/metadata",
+    }
+
+
+def boss_event(i):
+    return {
+        "id": f"Boss_{i}", "name": f"Boss {i}", "start": 1700000000000, "end": 1700345600000, "bossType": "bloonarius",
+        "bossTypeURL": "https://static-api.nkstatic.com/appdocs/4/assets/opendata/bloonarius.png",
+        "totalScores_standard": 40000, "totalScores_elite": 20000,
+        "leaderboard_standard_players_1": f"https://data.ninjakiwi.com/btd6/bosses/Boss_{i}/leaderboard/standard/1",
+        "leaderboard_elite_players_1": f"https://data.ninjakiwi.com/btd6/bosses/Boss_{i}/leaderboard/elite/1",
+        "metadataStandard": f"https://data.ninjakiwi.com/btd6/bosses/Boss_{i}/metadata/standard",
+        "metadataElite": f"https://data.ninjakiwi.com/btd6/bosses/Boss_{i}/metadata/elite",
+        "scoringType": "GameTime",
+    }
+
+
+def measure(cls, dicts):
+    gc.collect()
+    t0 = time.perf_counter()
+    objects = [cls.from_dict(d) for d in dicts]
+    elapsed = time.perf_counter() - t0
+    del objects
+
+    # Measured separately, tracemalloc slows down building a lot
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [cls.from_dict(d) for d in dicts]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return elapsed, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args()
+
+    cases = [
+        ("SubmissionEntry", submission_entry, BTD6SubmissionEntry, BTD6CompactSubmissionEntry, args.count),
+        ("ChallengeDocument", challenge_document, BTD6ChallengeDocument, BTD6CompactChallengeDocument, args.count // 10),
+        ("UserProfile", user_profile, BTD6UserProfile, BTD6CompactUserProfile, args.count // 10),
+        ("RaceEvent", race_event, BTD6RaceEvent, BTD6CompactRaceEvent, args.count // 10),
+        ("BossEvent", boss_event, BTD6BossEvent, BTD6CompactBossEvent, args.count // 10),
+    ]
+
+    print(f"{'model':<20}{'count':>9}{'build (regular)':>18}{'build (compact)':>18}"
+          f"{'B/obj (regular)':>18}{'B/obj (compact)':>18}")
+    for name, make, regular, compact, count in cases:
+        dicts = [make(i) for i in range(count)]
+        regular_time, regular_bytes = measure(regular, dicts)
+        compact_time, compact_bytes = measure(compact, dicts)
+        print(f"{name:<20}{count:>9}{regular_time * 1000:>15.1f} ms{compact_time * 1000:>15.1f} ms"
+              f"{regular_bytes / count:>18.0f}{compact_bytes / count:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
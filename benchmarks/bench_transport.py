@@ -0,0 +1,107 @@
+"""
+Compares the pooled session of BTD6API with a plain requests.get for every call (the old behaviour)
+against a local stand-in for data.ninjakiwi.com, and prints requests/sec and p50/p99 latency.
+
+Usage: python benchmarks/bench_transport.py [--requests 2000] [--threads 1]
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from BTD6API import BTD6API  # noqa: E402
+
+RACES_BODY = json.dumps({
+    "success": True,
+    "error": None,
+    "body": [
+        {
+            "id": f"Race_{i}",
+            "name": f"Race {i}",
+            "start": 1700000000000 + i * 604800000,
+            "end": 1700000000000 + i * 604800000 + 345600000,
+            "totalScores": 40000 + i,
+            "leaderboard": f"https://data.ninjakiwi.com/btd6/races/Race_{i}/leaderboard",
+            "metadata": f"https://data.ninjakiwi.com/btd6/races/Race_{i}/metadata",
+        }
+        for i in range(20)
+    ],
+}).encode()
+RACES_BODY_GZIP = gzip.compress(RACES_BODY)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = RACES_BODY_GZIP
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            payload = RACES_BODY
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(label, fetch, url, total, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        t0 = time.perf_counter()
+        fetch(url).content
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<28} {total / wall:>10.0f} req/s   p50 {p50:>7.3f} ms   p99 {p99:>7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/btd6/races"
+
+    api = BTD6API(pool_size=max(10, args.threads))
+
+    print(f"{args.requests} requests, {args.threads} thread(s)")
+    run("requests.get (per call)", requests.get, url, args.requests, args.threads)
+    run("BTD6API pooled session", lambda u: api.session.get(u, timeout=api.timeout), url, args.requests, args.threads)
+
+    api.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
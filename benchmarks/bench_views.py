@@ -0,0 +1,121 @@
+"""
+Compares the regular models with the views (BTD6UserProfileView, BTD6ChallengeDocumentView) when a lot of profiles
+and challenge documents are ingested: how long it takes to go from the raw bytes of the response to an object, and
+how much memory the objects take, counting the raw bytes a view keeps.
+
+The views are measured with msgspec (when it's installed) and with the scanner that's used without it. Reading only
+the display name / name is measured separately from reading one of the nested fields as well.
+
+Usage: python benchmarks/bench_views.py [--count 20000] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import BTD6API  # noqa: E402
+from BTD6API import (  # noqa: E402
+    BTD6UserProfile, BTD6UserProfileView, BTD6ChallengeDocument, BTD6ChallengeDocumentView, decode_envelope,
+    decode_json,
+)
+from bench_models import user_profile, challenge_document  # noqa: E402
+
+
+def full_profile(i):
+    # The nested fields of real profiles have a lot more keys than the ones in bench_models
+    profile = user_profile(i)
+    profile["gameplay"] = {f"stat{k}": k * i for k in range(40)}
+    profile["bloonsPopped"] = {f"popped{k}": k * i for k in range(15)}
+    profile["heroesPlaced"] = {f"Hero{k}": k + i for k in range(16)}
+    for medals in ("_medalsSinglePlayer", "_medalsMultiplayer", "_medalsBoss", "_medalsBossElite", "_medalsCTLocal",
+                   "_medalsCTGlobal", "_medalsRace"):
+        profile[medals] = {f"Medal{k}": k for k in range(12)}
+    return profile
+
+
+def full_challenge(i):
+    document = challenge_document(i)
+    document["_towers"] = [{"tower": f"Tower{k}", "max": -1, "path1NumBlockedTiers": 0, "path2NumBlockedTiers": 0,
+                            "path3NumBlockedTiers": 0, "isHero": k < 2} for k in range(23)]
+    document["_powers"] = [{"name": f"Power{k}", "max": 0} for k in range(15)]
+    return document
+
+
+def model(payload, cls, view):
+    return cls.from_dict(decode_json(payload)["body"])
+
+
+def view_msgspec(payload, cls, view):
+    return view.from_bytes(decode_envelope(payload)["body"])
+
+
+def view_scanner(payload, cls, view):
+    return view(BTD6API._split_object(BTD6API._split_object(payload)["body"]))
+
+
+def build(function, payloads, cls, view, nested):
+    objects = [function(payload, cls, view) for payload in payloads]
+    for obj in objects:
+        getattr(obj, "displayName", None) or obj.name
+        if nested:
+            getattr(obj, nested)
+    return objects
+
+
+def measure(function, payloads, cls, view, nested, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        objects = build(function, payloads, cls, view, nested)
+        best = min(best, time.perf_counter() - t0)
+        del objects
+
+    # Measured separately, tracemalloc slows everything down a lot. The payloads are made again, so the
+    # raw bytes that the views keep are counted
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copies = [bytes(bytearray(payload)) for payload in payloads]
+    objects = build(function, copies, cls, view, nested)
+    del copies
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return best, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ways = [("model (" + BTD6API.JSON_BACKEND + ")", model)]
+    if BTD6API.msgspec is not None:
+        ways.append(("view (msgspec)", view_msgspec))
+    ways.append(("view (scanner)", view_scanner))
+
+    cases = [
+        ("UserProfile", full_profile, BTD6UserProfile, BTD6UserProfileView, "gameplay"),
+        ("ChallengeDocument", full_challenge, BTD6ChallengeDocument, BTD6ChallengeDocumentView, "towers"),
+    ]
+    for name, make, cls, view, nested in cases:
+        payloads = [json.dumps({"success": True, "error": None, "body": make(i)}).encode() for i in range(args.count)]
+        print(f"{name}: {args.count} objects, {sum(map(len, payloads)) / args.count:.0f} bytes each")
+        print(f"  {'':<22}{'us/obj':>10}{'B/obj':>10}{'us/obj':>12}{'B/obj':>10}")
+        print(f"  {'':<22}{'(name only)':>20}{'(+ ' + nested + ')':>22}")
+        for label, function in ways:
+            name_time, name_bytes = measure(function, payloads, cls, view, None, args.repeat)
+            nested_time, nested_bytes = measure(function, payloads, cls, view, nested, args.repeat)
+            print(f"  {label:<22}{name_time / args.count * 1e6:>10.1f}{name_bytes / args.count:>10.0f}"
+                  f"{nested_time / args.count * 1e6:>12.1f}{nested_bytes / args.count:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
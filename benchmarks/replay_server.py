@@ -0,0 +1,414 @@
+"""
+A local stand-in for data.ninjakiwi.com. It serves recorded responses (fixtures) for races, bosses, challenges,
+Contested Territory, guilds and users, so the client can be tested and benchmarked without touching the real API.
+Links in the responses are rewritten to point to the stand-in, and latency and errors can be added to see how the
+client copes.
+
+Without --fixtures, made up data is served: races, bosses, challenges, CT events with their tiles, guilds, users and
+leaderboards with pages.
+With --fixtures DIR, the responses saved in DIR are served, and with --record the ones that aren't there yet are
+downloaded from the real API and saved first.
+
+Use it with BTD6API(base_url=server.url), or from Python:
+    with ReplayServer(latency=20) as server:
+        api = BTD6API(base_url=server.url)
+
+Usage: python benchmarks/replay_server.py [--port 8000] [--fixtures DIR [--record]] [--latency 20] [--jitter 5]
+                                          [--error-rate 0.01] [--throttle-rate 0.01] [--stall-rate 0.01]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_models import submission_entry, challenge_document, user_profile, race_event, boss_event  # noqa: E402
+
+UPSTREAM = "https://data.ninjakiwi.com"
+TILE_TYPES = ("Regular", "Regular", "Regular", "Banner", "Relic", "TeamStart")
+
+
+def envelope(body, next_link=None, prev_link=None) -> dict:
+    response = {"success": True, "error": None, "body": body}
+    if next_link is not None or prev_link is not None:
+        response["next"] = next_link
+        response["prev"] = prev_link
+    return response
+
+
+def error(message: str) -> dict:
+    return {"success": False, "error": message, "body": None}
+
+
+class SyntheticFixtures:
+    """
+    Makes up responses for every endpoint the client uses. The same link always gives the same response
+
+    :param races: How many race events there are
+    :param bosses: How many boss events there are
+    :param challenges: How many challenges there are
+    :param pages: How many pages every leaderboard has
+    :param page_size: How many entries are on a page
+    :param ct_events: How many CT events there are
+    :param ct_tiles: How many tiles every CT event has. The tiles of odd events only link to a document per tile,
+        the others have all their data in the list of tiles
+    """
+
+    def __init__(self, races: int = 20, bosses: int = 10, challenges: int = 500, pages: int = 5, page_size: int = 50,
+                 ct_events: int = 3, ct_tiles: int = 150):
+        self.races = races
+        self.bosses = bosses
+        self.challenges = challenges
+        self.pages = pages
+        self.page_size = page_size
+        self.ct_events = ct_events
+        self.ct_tiles = ct_tiles
+        self.routes = [
+            (re.compile(r"/btd6/races"), self.race_list),
+            (re.compile(r"/btd6/races/Race_(\d+)/leaderboard"), self.race_leaderboard),
+            (re.compile(r"/btd6/races/Race_(\d+)/metadata"), self.race_metadata),
+            (re.compile(r"/btd6/bosses"), self.boss_list),
+            (re.compile(r"/btd6/bosses/Boss_(\d+)/leaderboard/(\w+)/(\d+)"), self.boss_leaderboard),
+            (re.compile(r"/btd6/bosses/Boss_(\d+)/metadata/(\w+)"), self.boss_metadata),
+            (re.compile(r"/btd6/users/([0-9a-fA-F]+)"), self.user),
+            (re.compile(r"/btd6/challenges/filter/(\w+)"), self.challenge_list),
+            (re.compile(r"/btd6/challenges/challenge/C(\d+)"), self.challenge),
+            (re.compile(r"/btd6/ct"), self.ct_list),
+            (re.compile(r"/btd6/ct/CT_(\d+)/tiles"), self.ct_tiles_list),
+            (re.compile(r"/btd6/ct/CT_(\d+)/tiles/([A-Z]{3})"), self.ct_tile),
+            (re.compile(r"/btd6/ct/CT_(\d+)/leaderboard/(\w+)"), self.ct_leaderboard),
+            (re.compile(r"/btd6/guild/([0-9a-fA-F]+)"), self.guild),
+        ]
+
+    def get(self, path: str, query: str = "") -> dict:
+        page = int(query.split("page=", 1)[1].split("&", 1)[0]) if "page=" in query else 1
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                return handler(*match.groups(), page=page)
+        return error("Not found")
+
+    def _leaderboard(self, path: str, seed: int, page: int) -> dict:
+        if page > self.pages:
+            return error("No Scores Available")
+        start = (page - 1) * self.page_size
+        body = []
+        for i in range(start, start + self.page_size):
+            entry = submission_entry(seed * 100000 + i)
+            entry["score"] = 30000 + i * 7 # already sorted
+            body.append(entry)
+        next_link = f"{UPSTREAM}{path}?page={page + 1}" if page < self.pages else None
+        prev_link = f"{UPSTREAM}{path}?page={page - 1}" if page > 1 else None
+        return envelope(body, next_link, prev_link)
+
+    def race_list(self, page=1):
+        return envelope([race_event(i) for i in range(self.races)])
+
+    def race_leaderboard(self, i, page=1):
+        if int(i) >= self.races:
+            return error("No race with that id exists")
+        return self._leaderboard(f"/btd6/races/Race_{i}/leaderboard", int(i), page)
+
+    def race_metadata(self, i, page=1):
+        if int(i) >= self.races:
+            return error("No race with that id exists")
+        return envelope(challenge_document(int(i)))
+
+    def boss_list(self, page=1):
+        return envelope([boss_event(i) for i in range(self.bosses)])
+
+    def boss_leaderboard(self, i, type_, team_size, page=1):
+        if int(i) >= self.bosses:
+            return error("No boss with that id exists")
+        if type_ not in ("standard", "elite"):
+            return error("Invalid boss type")
+        if not 1 <= int(team_size) <= 4:
+            return error("Invalid team size")
+        if type_ == "elite" and int(team_size) == 4 and int(i) % 2:
+            return error("No Scores Available") # some brackets are empty on the real API too
+        seed = 1000 + int(i) * 10 + (type_ == "elite") * 5 + int(team_size)
+        return self._leaderboard(f"/btd6/bosses/Boss_{i}/leaderboard/{type_}/{team_size}", seed, page)
+
+    def boss_metadata(self, i, difficulty, page=1):
+        if int(i) >= self.bosses:
+            return error("No boss with that id exists")
+        if difficulty not in ("standard", "elite"):
+            return error("Invalid boss difficulty")
+        return envelope(challenge_document(100000 + int(i)))
+
+    def user(self, user_id, page=1):
+        return envelope(user_profile(int(user_id, 16)))
+
+    def challenge_list(self, filter_, page=1):
+        if filter_ not in ("newest", "trending", "daily"):
+            return error("Invalid filter type")
+        body = []
+        for i in range(min(self.challenges, 50)):
+            document = challenge_document(i)
+            body.append({
+                "name": document["name"], "createdAt": document["createdAt"], "id": document["id"],
+                "creator": document["creator"], "metadata": f"{UPSTREAM}/btd6/challenges/challenge/{document['id']}",
+            })
+        return envelope(body)
+
+    def challenge(self, i, page=1):
+        if int(i) >= self.challenges:
+            return error("No challenge with that id exists")
+        return envelope(challenge_document(int(i)))
+
+    @staticmethod
+    def tile_id(n: int) -> str:
+        return "".join(chr(65 + n // 26 ** k % 26) for k in (2, 1, 0))
+
+    def _tile(self, i: int, n: int) -> dict:
+        document = challenge_document(200000 + i * 1000 + n)
+        return {
+            "id": self.tile_id(n), "type": TILE_TYPES[n % len(TILE_TYPES)],
+            "gameData": {"selectedMap": document["map"], "selectedMode": document["mode"],
+                         "selectedDifficulty": document["difficulty"], "dcModel": document},
+        }
+
+    def ct_list(self, page=1):
+        body = []
+        for i in range(self.ct_events):
+            path = f"{UPSTREAM}/btd6/ct/CT_{i}"
+            body.append({
+                "id": f"CT_{i}", "start": 1700000000000 + i * 604800000, "end": 1700604800000 + i * 604800000,
+                "totalScores_player": 50000, "totalScores_team": 8000, "tiles": f"{path}/tiles",
+                "leaderboard_player": f"{path}/leaderboard/player", "leaderboard_team": f"{path}/leaderboard/team",
+            })
+        return envelope(body)
+
+    def ct_tiles_list(self, i, page=1):
+        if int(i) >= self.ct_events:
+            return error("No CT with that id exists")
+        tiles = [self._tile(int(i), n) for n in range(self.ct_tiles)]
+        if int(i) % 2:
+            link = f"{UPSTREAM}/btd6/ct/CT_{i}/tiles"
+            tiles = [{"id": tile["id"], "type": tile["type"], "metadata": f"{link}/{tile['id']}"} for tile in tiles]
+        return envelope({"tiles": tiles})
+
+    def ct_tile(self, i, tile_id, page=1):
+        n = sum((ord(c) - 65) * 26 ** k for c, k in zip(tile_id, (2, 1, 0)))
+        if int(i) >= self.ct_events or n >= self.ct_tiles:
+            return error("Not found")
+        return envelope(self._tile(int(i), n))
+
+    def ct_leaderboard(self, i, type_, page=1):
+        if int(i) >= self.ct_events:
+            return error("No CT with that id exists")
+        if type_ not in ("player", "team"):
+            return error("Invalid leaderboard type")
+        response = self._leaderboard(f"/btd6/ct/CT_{i}/leaderboard/{type_}", 3000 + int(i) * 2 + (type_ == "team"),
+                                     page)
+        if type_ == "team" and response["body"]:
+            for n, entry in enumerate(response["body"]):
+                entry["displayName"] = f"Team{n}"
+                entry["profile"] = entry["profile"].replace("/btd6/users/", "/btd6/guild/")
+        return response
+
+    def guild(self, guild_id, page=1):
+        return envelope({
+            "id": guild_id, "name": f"Guild {guild_id[-4:]}", "numMembers": 1 + int(guild_id, 16) % 25,
+            "status": "OPEN", "owner": f"{UPSTREAM}/btd6/users/{guild_id}", "tags": ["Casual"], "banner": "Banner1",
+            "bannerURL": "https://static-api.nkstatic.com/appdocs/4/assets/opendata/banner.png",
+        })
+
+
+class FixtureDirectory:
+    """
+    Responses saved in a folder, one file per link. With record, the links that aren't saved yet are downloaded from
+    the real API and saved
+
+    :param directory: The folder with the fixtures
+    :param record: Download and save missing fixtures
+    """
+
+    def __init__(self, directory: str, record: bool = False):
+        self.directory = directory
+        self.record = record
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, path: str, query: str) -> str:
+        return os.path.join(self.directory, quote(f"{path}?{query}" if query else path, safe="") + ".json")
+
+    def get(self, path: str, query: str = "") -> bytes:
+        file_path = self._path(path, query)
+        try:
+            with open(file_path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            if not self.record:
+                return json.dumps(error("Not found")).encode()
+
+        import requests
+        link = f"{UPSTREAM}{path}?{query}" if query else f"{UPSTREAM}{path}"
+        content = requests.get(link, timeout=(3.05, 30)).content
+        with self._lock:
+            with open(file_path, "wb") as file:
+                file.write(content)
+        return content
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        replay = self.server.replay
+        status, headers, payload = replay.respond(self.path, self.headers)
+        if payload and "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # the client gave up, for example a hedged request that lost
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # with the default of 5, connections opened at the same time wait a second to be retried
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError): # clients that were killed, like in bench_crawl.py
+            super().handle_error(request, client_address)
+
+
+class ReplayServer:
+    """
+    Serves fixtures over HTTP on a background thread
+
+    :param fixtures: A SyntheticFixtures or FixtureDirectory, made up data if None
+    :param host: Where to listen
+    :param port: Which port to listen on, a free one if 0
+    :param latency: Milliseconds every response is delayed on average
+    :param jitter: Standard deviation of the delay in milliseconds
+    :param error_rate: Fraction of requests that fail with a 500, 502 or 503
+    :param throttle_rate: Fraction of requests that get a 429 with a Retry-After
+    :param seed: Seed for the random latency and errors
+    :param stall_rate: Fraction of requests that hang for stall seconds before they're answered
+    :param stall: Seconds a stalled request hangs
+    """
+
+    def __init__(self, fixtures=None, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = None,
+                 stall_rate: float = 0.0, stall: float = 5.0):
+        self.fixtures = fixtures if fixtures is not None else SyntheticFixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.injected_errors = 0
+
+        self.server = _HTTPServer((host, port), ReplayHandler)
+        self.server.replay = self
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def respond(self, request_path: str, request_headers) -> tuple:
+        """
+        :return: (status, headers, payload) for a request
+        """
+        with self.lock:
+            self.requests += 1
+            roll = self.random.random()
+            delay = max(0.0, self.random.gauss(self.latency, self.jitter)) if self.latency or self.jitter else 0.0
+            if self.stall_rate and self.random.random() < self.stall_rate:
+                delay += self.stall * 1000
+            failure = self.random.choice((500, 502, 503)) if roll < self.error_rate else None
+            if failure is None and roll < self.error_rate + self.throttle_rate:
+                failure = 429
+            if failure is not None:
+                self.injected_errors += 1
+        if delay:
+            time.sleep(delay / 1000)
+
+        if failure == 429:
+            return 429, {"Retry-After": "1", "Content-Type": "application/json"}, b""
+        if failure is not None:
+            return failure, {"Content-Type": "text/html"}, b"<html>Server error</html>"
+
+        parts = urlsplit(request_path)
+        content = self.fixtures.get(parts.path, parts.query)
+        if isinstance(content, dict):
+            content = json.dumps(content).encode()
+        content = content.replace(UPSTREAM.encode(), self.url.encode()) # links point to the stand-in
+
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        headers = {"Content-Type": "application/json", "ETag": etag}
+        if request_headers.get("If-None-Match") == etag:
+            return 304, headers, b""
+        return 200, headers, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixtures", default=None, help="folder with recorded responses, made up data if not set")
+    parser.add_argument("--record", action="store_true", help="download and save responses missing from --fixtures")
+    parser.add_argument("--latency", type=float, default=0.0, help="average delay of a response in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the delay in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that get a 5xx")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests that get a 429")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--stall", type=float, default=5.0, help="seconds a hanging request hangs")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    fixtures = FixtureDirectory(args.fixtures, args.record) if args.fixtures else SyntheticFixtures()
+    server = ReplayServer(fixtures, args.host, args.port, args.latency, args.jitter, args.error_rate,
+                          args.throttle_rate, args.seed, args.stall_rate, args.stall)
+    print(f"Serving on {server.url}, use BTD6API(base_url=\"{server.url}\")")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from contextlib import nullcontext
+
+from BTD6API import BTD6RaceEvent, EventPoller, RequestFailed
+
+
+class FakeAPI:
+    """
+    Stands in for BTD6API, the lists and leaderboards fail while the links are in failing
+    """
+
+    def __init__(self, races):
+        self.races = races
+        self.failing = set()
+        self.requests = []
+
+    def priority(self, priority):
+        return nullcontext()
+
+    def get_available_race_events(self):
+        self.requests.append("/btd6/races")
+        if "/btd6/races" in self.failing:
+            raise RequestFailed("The API responded with HTTP 503")
+        return self.races
+
+    def get_available_boss_events(self):
+        return []
+
+    def get_response(self, link, raw=False):
+        self.requests.append(link)
+        if link in self.failing:
+            raise RequestFailed("The API responded with HTTP 503")
+        return {"body": [{"displayName": "A", "score": 1, "scoreParts": [], "submissionTime": 1, "profile": "a"}],
+                "next": None}
+
+
+def race(race_id):
+    return BTD6RaceEvent(race_id, race_id, 0, 10_000_000, 1, None, None)
+
+
+def test_failed_refresh_is_tried_again():
+    api = FakeAPI([race("Race1")])
+    api.failing.add("/btd6/races")
+    poller = EventPoller(api, lambda *args: None, live_interval=30, refresh_interval=3600)
+
+    assert poller.step(now=100) == 130 # tried again after live_interval, not refresh_interval
+    assert poller.failures[None] == 1
+    assert poller.step(now=130) == 190 # and twice as long after the next failure
+
+    api.failing.clear()
+    poller.step(now=190)
+    assert None not in poller.failures
+    assert [event.id for event in poller.events] == ["Race1"]
+    assert poller.next_refresh == 190 + 3600
+
+
+def test_failing_event_backs_off_and_others_are_still_polled():
+    api = FakeAPI([race("Race1"), race("Race2")])
+    api.failing.add("/btd6/races/Race1/leaderboard")
+    polled = []
+    poller = EventPoller(api, lambda event, watcher, changes: polled.append(event.id), live_interval=30)
+
+    poller.step(now=100)
+    assert polled == ["Race2"]
+    assert poller.retry_at["Race1"] == 130
+
+    poller.step(now=130) # fails again, waits 60 seconds now
+    assert poller.retry_at["Race1"] == 190
+    poller.step(now=160)
+    assert api.requests.count("/btd6/races/Race1/leaderboard") == 2
+
+    api.failing.clear()
+    poller.step(now=190)
+    assert polled.count("Race1") == 1
+    assert "Race1" not in poller.retry_at and "Race1" not in poller.failures
+
+
+def test_callback_errors_dont_stop_the_poller():
+    api = FakeAPI([race("Race1")])
+
+    def callback(event, watcher, changes):
+        raise ValueError("bug in the callback")
+
+    poller = EventPoller(api, callback, live_interval=30)
+    assert poller.step(now=100) == 130
+    assert poller.failures["Race1"] == 1
+    assert poller.step(now=130) == 160
+    assert poller.failures["Race1"] == 2
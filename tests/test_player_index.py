@@ -0,0 +1,44 @@
+import pytest
+
+from BTD6API import BTD6CompactSubmissionEntry, PlayerIndex, RequestFailed
+
+
+def entry(user, score):
+    return BTD6CompactSubmissionEntry(f"Player {user}", score, [], 1000 + score,
+                                      f"https://data.ninjakiwi.com/btd6/users/{user}")
+
+
+def failing(entries, after):
+    # Like iter_race_leaderboard when a page fails
+    for i, elem in enumerate(entries):
+        if i == after:
+            raise RequestFailed("The API responded with HTTP 502")
+        yield elem
+
+
+def test_failed_add_keeps_the_old_results():
+    index = PlayerIndex()
+    index.add("Race1", [entry("a", 10), entry("b", 20), entry("c", 30)])
+
+    with pytest.raises(RequestFailed):
+        index.add("Race1", failing([entry("d", 5), entry("e", 6), entry("a", 7), entry("f", 8)], after=3))
+
+    assert sorted(index.players) == ["a", "b", "c"]
+    assert index.lookup("a")[0].score == 10
+    assert index.events["Race1"]["players"] == ["a", "b", "c"]
+
+    index.remove_event("Race1")
+    assert index.players == {}
+
+
+def test_add_again_replaces_the_results():
+    index = PlayerIndex()
+    index.add("Race1", [entry("a", 10), entry("b", 20)])
+    index.add("Race2", [entry("b", 1)])
+    index.add("Race1", [entry("b", 15), entry("c", 30)])
+
+    assert sorted(index.players) == ["b", "c"]
+    assert {result.event_id: result.rank for result in index.lookup("b")} == {"Race1": 1, "Race2": 1}
+
+    index.remove_event("Race1")
+    assert sorted(index.players) == ["b"]
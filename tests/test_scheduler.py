@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+
+from BTD6API import (BTD6API, PRIORITY_BACKGROUND, PRIORITY_LIVE, InvalidUserID, RequestFailed, SharedRateBudget,
+                     SharedRequestScheduler)
+
+
+def test_shared_tokens_go_to_the_highest_priority():
+    scheduler = SharedRequestScheduler(SharedRateBudget(rate=5, burst=1))
+    scheduler.acquire() # the shared budget is empty now, the local one isn't
+    order = []
+
+    def request(name, priority):
+        scheduler.acquire(priority)
+        order.append(name)
+
+    background = threading.Thread(target=request, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    time.sleep(0.05)
+    live = threading.Thread(target=request, args=("live", PRIORITY_LIVE))
+    live.start()
+    background.join()
+    live.join()
+    assert order == ["live", "background"]
+
+
+def test_reserve_doesnt_take_a_local_token_without_a_shared_one():
+    scheduler = SharedRequestScheduler(SharedRateBudget(rate=5, burst=1))
+    assert scheduler.reserve() == 0
+    tokens = scheduler.tokens
+    assert scheduler.reserve() > 0
+    assert scheduler.tokens >= tokens # only refilled
+
+
+def test_unknown_api_errors_raise():
+    with pytest.raises(InvalidUserID):
+        BTD6API.get_error("Invalid user ID / Player Does not play this game")
+    with pytest.raises(RequestFailed):
+        BTD6API.get_error("Something new went wrong")
+    with pytest.raises(RequestFailed):
+        BTD6API.get_error(None)
@@ -0,0 +1,16 @@
+import json
+
+from BTD6API import _split_object
+
+
+def test_nested_values_are_raw():
+    values = _split_object(b'{"a": 1, "b": [1, {"c": "]"}], "d": {"e": "{"}, "f": "x"}')
+    assert values == {"a": 1, "b": b'[1, {"c": "]"}]', "d": b'{"e": "{"}', "f": "x"}
+
+
+def test_strings_that_look_like_placeholders_are_kept():
+    document = {"name": "\u0000 0", "other": "\u00001", "first": [1], "second": {"x": 2}}
+    values = _split_object(json.dumps(document).encode())
+    assert values["name"] == "\u0000 0"
+    assert values["other"] == "\u00001"
+    assert values["first"] == [1] and values["second"] == {"x": 2} # decoded completely